@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Any, Awaitable, List, Optional
+from fastapi import APIRouter
+from api.responses import FastJSONResponse
+from api.routes import schedule_weeks
+from bot.utils.api import ScheduleAPI
+from database.connection import db
+from database.monitoring import pool_stats
+from database.invalidation import bus as invalidation_bus
+from database.write_behind import member_buffer
+from database.models import TenantsManager, LinksManager, GroupMembersManager, SettingsManager
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+class Readiness:
+    """Стан прогріву процесу: тривалість кожного етапу та час холодного старту"""
+
+    def __init__(self):
+        self.ready = False
+        self.started_at = time.perf_counter()
+        self.cold_start: Optional[float] = None
+        self.phases: Dict[str, Dict[str, Any]] = {}
+
+    async def run(self, name: str, awaitable: Awaitable[Any]):
+        started = time.perf_counter()
+        self.phases[name] = {"status": "running"}
+        try:
+            await awaitable
+            self.phases[name] = {"status": "ok"}
+        except Exception as e:
+            logger.error(f"Прогрів '{name}' не вдався: {e}")
+            self.phases[name] = {"status": "failed", "error": str(e)}
+        self.phases[name]["seconds"] = round(time.perf_counter() - started, 3)
+
+    def failed(self) -> List[str]:
+        return [name for name, phase in self.phases.items() if phase["status"] != "ok"]
+
+    def mark_ready(self):
+        """Кінець прогріву; процес готовий, лише якщо всі етапи вдалися"""
+        self.cold_start = round(time.perf_counter() - self.started_at, 3)
+        failed = self.failed()
+        self.ready = not failed
+        if failed:
+            logger.error(f"Прогрів завершено з помилками ({', '.join(failed)}), процес не готовий")
+        else:
+            logger.info(f"Прогрів завершено, холодний старт: {self.cold_start} с")
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "uptime": round(time.perf_counter() - self.started_at, 3),
+            "coldStart": self.cold_start,
+            "phases": self.phases,
+            "indexes": db.index_status,
+            "pool": pool_stats.snapshot(),
+            "invalidation": invalidation_bus.state(),
+            "memberBuffer": {"pending": len(member_buffer), **member_buffer.stats},
+        }
+
+
+readiness = Readiness()
+
+
+async def _expect(awaitable: Awaitable[bool], error: str):
+    """Завантаження кешів ковтають помилки й повертають False — тут це збій етапу"""
+    if not await awaitable:
+        raise RuntimeError(error)
+
+
+async def _load_schedules(tenants: List[Dict[str, Any]]):
+    kpi_groups = [t.get("kpiGroupId") for t in tenants]
+    schedules = await asyncio.gather(*(ScheduleAPI.get_schedule(k) for k in kpi_groups))
+    missing = [str(k) for k, schedule in zip(kpi_groups, schedules) if schedule is None]
+    if missing:
+        raise RuntimeError(f"Розклад недоступний: {', '.join(missing)}")
+
+
+async def _build_timetables(tenants: List[Dict[str, Any]]):
+    group_ids = [t["groupId"] for t in tenants]
+    weeks = await asyncio.gather(*(schedule_weeks(g) for g in group_ids))
+    missing = [str(g) for g, view in zip(group_ids, weeks) if view is None]
+    if missing:
+        raise RuntimeError(f"Розклад для Mini App не побудовано: {', '.join(missing)}")
+
+
+async def warm_up(**extra: Awaitable[Any]):
+    """Паралельне наповнення кешів до того, як бот почне приймати оновлення.
+
+    Розклад з API КПІ, індекс посилань, учасники, налаштування та додаткові
+    етапи (extra) виконуються одночасно; скомпільований розклад для Mini App
+    будується після них, бо залежить від розкладу й посилань.
+    """
+    tenants = TenantsManager.all()
+    await asyncio.gather(
+        readiness.run("settings", _expect(SettingsManager.load(), "Налаштування не завантажено")),
+        readiness.run("links", _expect(LinksManager.load_index(), "Індекс посилань не побудовано")),
+        readiness.run("members", _expect(GroupMembersManager.load_membership(), "Учасників не завантажено")),
+        readiness.run("schedule", _load_schedules(tenants)),
+        *(readiness.run(name, awaitable) for name, awaitable in extra.items()),
+    )
+    await readiness.run("timetable", _build_timetables(tenants))
+
+
+@router.get("/healthz")
+async def healthz():
+    """Процес живий (для перевірок платформи, не чекає прогріву)"""
+    return {"status": "ok"}
+
+
+@router.get("/readyz")
+async def readyz():
+    """200 після успішного прогріву кешів; до того або після збою етапу — 503 зі станом етапів"""
+    return FastJSONResponse(readiness.state(), status_code=200 if readiness.ready else 503)
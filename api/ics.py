@@ -0,0 +1,152 @@
+import hashlib
+from datetime import datetime, date, timedelta
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from bot.utils.api import ScheduleAPI, get_class_end_time
+
+# Тривалість пари, якщо її початок не збігається з CLASS_TIMINGS
+DEFAULT_PAIR_MINUTES = 95
+
+DAY_INDEX = {'Пн': 0, 'Вв': 1, 'Ср': 2, 'Чт': 3, 'Пт': 4, 'Сб': 5}
+
+TZID = "Europe/Kiev"
+
+# Правила переходу на літній час для Europe/Kiev (EET/EEST)
+VTIMEZONE = [
+    "BEGIN:VTIMEZONE",
+    f"TZID:{TZID}",
+    "BEGIN:STANDARD",
+    "DTSTART:19701025T040000",
+    "TZOFFSETFROM:+0300",
+    "TZOFFSETTO:+0200",
+    "RRULE:FREQ=YEARLY;BYMONTH=10;BYDAY=-1SU",
+    "TZNAME:EET",
+    "END:STANDARD",
+    "BEGIN:DAYLIGHT",
+    "DTSTART:19700329T030000",
+    "TZOFFSETFROM:+0200",
+    "TZOFFSETTO:+0300",
+    "RRULE:FREQ=YEARLY;BYMONTH=3;BYDAY=-1SU",
+    "TZNAME:EEST",
+    "END:DAYLIGHT",
+    "END:VTIMEZONE",
+]
+
+
+def escape_text(value: str) -> str:
+    return (value or "").replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def fold(line: str) -> str:
+    """Перенесення рядка на 75 октетів (RFC 5545, 3.1)"""
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return line
+    parts, start, limit = [], 0, 75
+    while start < len(raw):
+        end = min(start + limit, len(raw))
+        # Не розрізаємо багатобайтовий символ UTF-8
+        while end < len(raw) and (raw[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(raw[start:end].decode("utf-8"))
+        start, limit = end, 74
+    return "\r\n ".join(parts)
+
+
+def _uid(*parts: Any) -> str:
+    return hashlib.sha1("|".join(map(str, parts)).encode("utf-8")).hexdigest()[:20] + "@ip-55"
+
+
+def _first_occurrence(semester_start: date, weekday: int, week_number: int) -> date:
+    """Перша дата семестру з потрібним днем тижня та парністю тижня ротації"""
+    day = semester_start + timedelta(days=(weekday - semester_start.weekday()) % 7)
+    if ScheduleAPI.get_week_number(datetime.combine(day, datetime.min.time())) != week_number:
+        day += timedelta(weeks=1)
+    return day
+
+
+def _pair_events(schedule_data: Dict[str, Any], semester: Tuple[date, date], group_id: int,
+                 link_for: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]], stamp: str) -> List[str]:
+    semester_start, next_semester = semester
+    until = (next_semester - timedelta(days=1)).strftime("%Y%m%dT235959Z")
+    lines = []
+    for week_number, week_key in ((1, 'scheduleFirstWeek'), (2, 'scheduleSecondWeek')):
+        for day in schedule_data.get(week_key) or []:
+            weekday = DAY_INDEX.get(day.get('day'))
+            if weekday is None:
+                continue
+            first = _first_occurrence(semester_start, weekday, week_number)
+            for pair in day.get('pairs') or []:
+                start_str = pair.get('time') or ''
+                try:
+                    start = datetime.combine(first, datetime.strptime(start_str[:5], '%H:%M').time())
+                except ValueError:
+                    continue
+                end_str = get_class_end_time(start_str[:5])
+                end = (datetime.combine(first, datetime.strptime(end_str, '%H:%M:%S').time())
+                       if end_str else start + timedelta(minutes=DEFAULT_PAIR_MINUTES))
+
+                description = [pair.get('type', ''), pair.get('teacherName', '')]
+                link = link_for(pair)
+                url = (link.get('meet_link') or link.get('classroom_link')) if link else None
+                if link and link.get('classroom_link'):
+                    description.append(f"Classroom: {link['classroom_link']}")
+
+                lines += [
+                    "BEGIN:VEVENT",
+                    f"UID:{_uid(group_id, week_number, weekday, start_str, pair.get('name'), pair.get('type'))}",
+                    f"DTSTAMP:{stamp}",
+                    f"DTSTART;TZID={TZID}:{start.strftime('%Y%m%dT%H%M%S')}",
+                    f"DTEND;TZID={TZID}:{end.strftime('%Y%m%dT%H%M%S')}",
+                    f"RRULE:FREQ=WEEKLY;INTERVAL=2;UNTIL={until}",
+                    f"SUMMARY:{escape_text(pair.get('name', ''))}",
+                    f"DESCRIPTION:{escape_text(chr(10).join(d for d in description if d))}",
+                ]
+                if pair.get('place'):
+                    lines.append(f"LOCATION:{escape_text(pair['place'])}")
+                if url:
+                    lines.append(f"URL:{url}")
+                lines.append("END:VEVENT")
+    return lines
+
+
+def _homework_events(homeworks: List[Dict[str, Any]], subject_names: Dict[str, str], stamp: str) -> List[str]:
+    lines = []
+    for h in homeworks:
+        deadline = h.get("deadlineAt")
+        if not deadline:
+            continue
+        subject = subject_names.get(h.get("subjectId"), "")
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{_uid('hw', h.get('_id'))}",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{deadline.strftime('%Y%m%dT%H%M%SZ')}",
+            f"DTEND:{deadline.strftime('%Y%m%dT%H%M%SZ')}",
+            f"SUMMARY:{escape_text(f'📝 {subject}: дедлайн' if subject else '📝 Дедлайн')}",
+            f"DESCRIPTION:{escape_text(h.get('text', ''))}",
+            "END:VEVENT",
+        ]
+    return lines
+
+
+def build_calendar(schedule_data: Dict[str, Any], semester: Tuple[date, date], group_id: int,
+                   link_for: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+                   homeworks: List[Dict[str, Any]], subject_names: Dict[str, str],
+                   title: Optional[str] = None) -> str:
+    """iCalendar (RFC 5545) з двотижневою ротацією пар семестру та дедлайнами ДЗ"""
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//ip-55//schedule//UK",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{escape_text(title or 'Розклад')}",
+        f"X-WR-TIMEZONE:{TZID}",
+        "REFRESH-INTERVAL;VALUE=DURATION:PT1H",
+        *VTIMEZONE,
+        *_pair_events(schedule_data or {}, semester, group_id, link_for, stamp),
+        *_homework_events(homeworks, subject_names, stamp),
+        "END:VCALENDAR",
+    ]
+    return "\r\n".join(fold(line) for line in lines) + "\r\n"
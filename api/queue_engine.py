@@ -0,0 +1,231 @@
+import heapq
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+# Дзеркало CONFIG.DEFAULT_QUEUE_CONFIG з webapp/config.js
+DEFAULT_QUEUE_CONFIG = {
+    "maxSlots": 31,
+    "minMaxRule": True,
+    "priorityMove": True,
+    "maxAttempts": 3
+}
+
+QUEUE_STATUSES = {"waiting", "preparing", "defending", "completed", "failed", "skipped"}
+
+# Статуси, що беруть участь у правилі мін-макс
+ACTIVE_STATUSES = {"preparing", "defending", "completed"}
+
+# Максимальний відрив номера лаби від мінімальної активної
+MIN_MAX_GAP = 2
+
+
+class QueueError(Exception):
+    """Порушення правил черги (повідомлення показується користувачу)"""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+
+class QueueEngine:
+    """Стан черги з індексами за позицією та користувачем.
+
+    Перевірка зайнятості місця і пошук записів користувача — O(1),
+    мінімальна активна лаба підтримується лічильником і лінивою купою,
+    тож не перераховується по всьому масиву на кожен запис.
+    Записи залишаються звичайними dict у форматі документа queues.entries.
+    Операції журналюються, і take_update() перетворює журнал на точкове
+    оновлення документа ($push/$pull/позиційний $set) замість перезапису
+    всього масиву.
+    """
+
+    def __init__(self, entries: Optional[List[Dict[str, Any]]] = None, config: Optional[Dict[str, Any]] = None):
+        self.configure(config)
+        self.by_position: Dict[int, Dict[str, Any]] = {}
+        self.by_user: Dict[str, Set[int]] = {}
+        self._active_labs: Counter = Counter()
+        self._labs_heap: List[int] = []
+        self._journal: List[Tuple[str, Any]] = []
+        for entry in entries or []:
+            self._insert(entry)
+
+    @classmethod
+    def from_doc(cls, queue: Dict[str, Any]) -> "QueueEngine":
+        return cls(queue.get("entries", []), queue.get("config"))
+
+    def configure(self, config: Optional[Dict[str, Any]]):
+        self.config = {**DEFAULT_QUEUE_CONFIG, **(config or {})}
+
+    # --- Індекси ---
+
+    def _track_lab(self, entry: Dict[str, Any], delta: int):
+        if entry.get("status") not in ACTIVE_STATUSES or entry.get("labNumber") is None:
+            return
+        lab = entry["labNumber"]
+        self._active_labs[lab] += delta
+        if delta > 0 and self._active_labs[lab] == 1:
+            heapq.heappush(self._labs_heap, lab)
+
+    def _insert(self, entry: Dict[str, Any]):
+        position = entry["position"]
+        self.by_position[position] = entry
+        self.by_user.setdefault(entry["userId"], set()).add(position)
+        self._track_lab(entry, 1)
+
+    def _remove(self, position: int) -> Dict[str, Any]:
+        entry = self.by_position.pop(position)
+        positions = self.by_user.get(entry["userId"])
+        if positions is not None:
+            positions.discard(position)
+            if not positions:
+                del self.by_user[entry["userId"]]
+        self._track_lab(entry, -1)
+        return entry
+
+    def _relocate(self, entry: Dict[str, Any], position: int):
+        self._remove(entry["position"])
+        entry["position"] = position
+        self._insert(entry)
+
+    @property
+    def min_active_lab(self) -> Optional[int]:
+        while self._labs_heap and self._active_labs[self._labs_heap[0]] <= 0:
+            lab = heapq.heappop(self._labs_heap)
+            del self._active_labs[lab]
+        return self._labs_heap[0] if self._labs_heap else None
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Записи у порядку позицій (для збереження в документі)"""
+        return [self.by_position[p] for p in sorted(self.by_position)]
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._journal)
+
+    def take_update(self) -> Tuple[Dict[str, Any], Optional[List[Dict[str, Any]]]]:
+        """Оновлення документа для змін з журналу та array_filters до нього.
+
+        Журнал очищується. Порожній словник — змін не було; суміш операцій
+        або переміщення записуються повним масивом entries.
+        """
+        journal, self._journal = self._journal, []
+        kinds = {kind for kind, _ in journal}
+        if not journal:
+            return {}, None
+        if kinds == {"push"}:
+            return {"$push": {"entries": {"$each": [entry for _, entry in journal], "$sort": {"position": 1}}}}, None
+        if kinds == {"pull"}:
+            return {"$pull": {"entries": {"userId": {"$in": [user_id for _, user_id in journal]}}}}, None
+        if kinds == {"status"} and len(journal) == 1:
+            entry = journal[0][1]
+            return (
+                {"$set": {"entries.$[e].status": entry["status"], "entries.$[e].attempts": entry["attempts"]}},
+                [{"e.position": entry["position"]}]
+            )
+        return {"$set": {"entries": self.entries()}}, None
+
+    def user_entry(self, user_id: str) -> Optional[Dict[str, Any]]:
+        positions = self.by_user.get(user_id)
+        return self.by_position[min(positions)] if positions else None
+
+    def _check_position(self, position: int):
+        # Нове порівняно з обробниками до рушія: позиція має бути цілим числом
+        # у межах maxSlots з конфігурації черги (як і у webapp)
+        if not isinstance(position, int) or not 1 <= position <= self.config["maxSlots"]:
+            raise QueueError(f"Місця #{position} не існує (1-{self.config['maxSlots']})")
+
+    # --- Операції ---
+
+    def join(self, user_id: str, lab_number: int, position: int, is_admin_add: bool = False) -> Dict[str, Any]:
+        self._check_position(position)
+        if user_id in self.by_user and not is_admin_add:
+            raise QueueError("Ви вже в черзі")
+        if position in self.by_position:
+            raise QueueError("Місце зайняте")
+
+        if self.config.get("minMaxRule", True) and not is_admin_add:
+            min_lab = self.min_active_lab
+            if min_lab is not None and lab_number > min_lab + MIN_MAX_GAP:
+                raise QueueError(f"Правило черги: Макс. лаба = {min_lab + MIN_MAX_GAP} (Мін: {min_lab})")
+
+        entry = {
+            "userId": user_id,
+            "labNumber": lab_number,
+            "position": position,
+            "status": "waiting",
+            "attempts": 0,
+            "joinedAt": datetime.utcnow().isoformat()
+        }
+        self._insert(entry)
+        self._journal.append(("push", entry))
+        return entry
+
+    def kick(self, user_id: str) -> int:
+        """Видалення всіх записів користувача; повертає кількість видалених"""
+        positions = list(self.by_user.get(user_id, ()))
+        for position in positions:
+            self._remove(position)
+        if positions:
+            self._journal.append(("pull", user_id))
+        return len(positions)
+
+    def set_status(self, user_id: str, status: str) -> Dict[str, Any]:
+        if status not in QUEUE_STATUSES:
+            raise QueueError("Невідомий статус")
+        entry = self.user_entry(user_id)
+        if entry is None:
+            raise QueueError("Користувача немає в черзі")
+
+        # Обмежується лише нова невдала спроба: адмін може змінити статус
+        # останньої невдалої, наприклад на completed
+        attempts = entry.get("attempts", 0)
+        if status == "failed":
+            if attempts >= self.config["maxAttempts"]:
+                raise QueueError(f"Вичерпано спроби здачі ({self.config['maxAttempts']})")
+            attempts += 1
+
+        self._track_lab(entry, -1)
+        entry["status"] = status
+        entry["attempts"] = attempts
+        self._track_lab(entry, 1)
+        self._journal.append(("status", entry))
+        return entry
+
+    def move(self, user_id: str, position: int, priority: bool = False) -> Dict[str, Any]:
+        """Переміщення запису на іншу позицію.
+
+        На вільне місце — завжди. На зайняте — лише з priority і увімкненим
+        priorityMove: суцільний блок записів від цільової позиції зсувається на одну вниз.
+        """
+        self._check_position(position)
+        entry = self.user_entry(user_id)
+        if entry is None:
+            raise QueueError("Користувача немає в черзі")
+        if entry["position"] == position:
+            return entry
+
+        if position in self.by_position:
+            if not (priority and self.config.get("priorityMove", True)):
+                raise QueueError("Місце зайняте")
+            self._remove(entry["position"])
+            end = position
+            while end in self.by_position:
+                end += 1
+            if end > self.config["maxSlots"]:
+                self._insert(entry)
+                raise QueueError("Немає вільного місця для зсуву черги")
+            for p in range(end - 1, position - 1, -1):
+                self._relocate(self.by_position[p], p + 1)
+            entry["position"] = position
+            self._insert(entry)
+            self._journal.append(("move", entry))
+            return entry
+
+        self._relocate(entry, position)
+        self._journal.append(("move", entry))
+        return entry
+
+    def prioritize(self, user_id: str) -> Dict[str, Any]:
+        """Пріоритетний запис: переміщення на першу позицію зі зсувом решти"""
+        return self.move(user_id, 1, priority=True)
@@ -0,0 +1,87 @@
+import json
+import logging
+from typing import Any, AsyncIterator, Iterable
+from bson import ObjectId
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from database.documents import Document
+
+try:
+    import orjson
+except ImportError:  # orjson необов'язковий: без нього стандартний json
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Скільки документів кодувати в одну частину потокової відповіді
+STREAM_CHUNK_DOCS = 200
+
+
+def _default(value: Any) -> Any:
+    """Типи BSON, яких не знає кодувальник"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Document):
+        return value.to_bson()
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+if orjson is not None:
+    def dumps(value: Any) -> bytes:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+else:
+    def dumps(value: Any) -> bytes:
+        return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON через orjson; ObjectId, datetime та документи з бази кодуються напряму.
+
+    Якщо маршрут повертає цю відповідь сам, FastAPI не проганяє дані
+    через jsonable_encoder.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+async def _json_array(head: list, docs: AsyncIterator[Any]) -> AsyncIterator[bytes]:
+    yield b"[" + b",".join(head)
+    chunk = []
+    try:
+        async for doc in docs:
+            chunk.append(dumps(doc))
+            if len(chunk) >= STREAM_CHUNK_DOCS:
+                yield b"," + b",".join(chunk)
+                chunk = []
+    except Exception as e:
+        # Заголовки вже надіслано: обриваємо відповідь, а не віддаємо
+        # урізаний, але валідний масив зі статусом 200
+        logger.error(f"Помилка читання курсора для потокової відповіді: {e}")
+        raise
+    yield (b"," + b",".join(chunk) if chunk else b"") + b"]"
+
+
+async def _iterate(items: Iterable[Any]) -> AsyncIterator[Any]:
+    for item in items:
+        yield item
+
+
+async def stream_json(docs) -> Response:
+    """JSON-масив частинами прямо з курсора Motor (або будь-якого ітерованого).
+
+    Першу частину читаємо до відправлення заголовків: помилка курсора на
+    старті дає звичайну 500. Якщо весь результат вмістився в першу частину,
+    віддаємо його однією відповіддю без потоку.
+    """
+    if not hasattr(docs, "__aiter__"):
+        docs = _iterate(docs)
+    docs = docs.__aiter__()
+    head = []
+    while len(head) < STREAM_CHUNK_DOCS:
+        try:
+            head.append(dumps(await docs.__anext__()))
+        except StopAsyncIteration:
+            return Response(b"[" + b",".join(head) + b"]", media_type="application/json")
+    return StreamingResponse(_json_array(head, docs), media_type="application/json")
@@ -1,12 +1,37 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from pydantic import BaseModel
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Any, Callable, Tuple
 from datetime import datetime
+import hashlib
+from collections import OrderedDict
 from database.connection import db
-from database.models import HomeworkManager, TopicsManager, SubjectsManager, UsersManager
-from config import ADMIN_IDS
+from database.models import HomeworkManager, TopicsManager, SubjectsManager, UsersManager, TenantsManager, LinksManager
+from database.documents import Queue, User
+from config import GROUP_ID, MAX_TOPICS_PER_USER, LINK_MATCH_THRESHOLD
 from bot.utils.api import ScheduleAPI
+from bot.utils.schedule_refresh import schedule_refresher, semester_bounds
+from bot.utils.link_index import get_link_index
+from bot.utils.clock import clock
 from bson import ObjectId
+from api.queue_engine import QueueEngine, QueueError, DEFAULT_QUEUE_CONFIG
+from api.ics import build_calendar
+from api.responses import FastJSONResponse, stream_json
+from api.tenancy import tenant_group, registered_group
+from api.schedule_view import build_weeks, current_and_next, day_pairs, DAY_CODES
+from datetime import timedelta
+
+QUEUE_WRITE_RETRIES = 5
+QUEUE_ENGINE_CACHE_SIZE = 256
+
+# Рушії черг між запитами: queueId -> (version документа, QueueEngine).
+# Запит забирає рушій з кешу на час зміни, тож паралельні запити одного
+# процесу не бачать чужих незаписаних змін
+_queue_engines: "OrderedDict[str, Tuple[Any, QueueEngine]]" = OrderedDict()
+
+# Календар для підписки: groupId -> (ключ знімка, тіло, ETag)
+_ics_cache: Dict[int, Tuple[tuple, bytes, str]] = {}
+# Обрізаний розклад для Mini App: groupId -> (ключ знімка, тижні)
+_view_cache: Dict[int, Tuple[tuple, dict]] = {}
 
 router = APIRouter()
 
@@ -39,13 +64,41 @@ class QueueConfig(BaseModel):
     adminId: int
     minMaxRule: bool
 
+def _json(value: Any) -> FastJSONResponse:
+    """Документи з бази одразу в JSON, без обходу jsonable_encoder"""
+    return FastJSONResponse(value)
+
+def _is_admin(admin_id, group_id: int) -> bool:
+    """Адмін групи запиту"""
+    if admin_id is None: return False
+    return TenantsManager.is_admin(int(admin_id), group_id)
+
+def _check_group(doc: Optional[dict], group_id: int, what: str = "Not found") -> dict:
+    """Документ має належати групі запиту; чужий або відсутній — 404"""
+    if not doc or doc.get("groupId", GROUP_ID) != group_id:
+        raise HTTPException(404, what)
+    return doc
+
+async def _owned(collection: str, doc_id: str, group_id: int, what: str = "Not found") -> dict:
+    """Документ за id з перевіркою групи (читається лише groupId)"""
+    if not ObjectId.is_valid(doc_id): raise HTTPException(404, what)
+    doc = await db.db[collection].find_one({"_id": ObjectId(doc_id)}, {"groupId": 1})
+    return _check_group(doc, group_id, what)
+
+async def _owned_subject(subject_id: str, group_id: int):
+    if await SubjectsManager.get_group_id(subject_id) != group_id:
+        raise HTTPException(404, "Subject not found")
+
 # --- Users ---
 @router.get("/users")
-async def get_all_users():
-    return await UsersManager.get_all_users()
+async def get_all_users(groupId: int = Depends(tenant_group)):
+    """Користувачі групи запиту: активні учасники та адміни"""
+    member_ids = await db.db.group_members.distinct("user_id", {"groupId": groupId, "is_active": True})
+    telegram_ids = set(member_ids) | set(TenantsManager.get(groupId).get("adminIds", []))
+    return await stream_json(db.db.users.find({"telegramId": {"$in": list(telegram_ids)}}))
 
 @router.post("/users/update")
-async def update_user(data: dict):
+async def update_user(data: dict, groupId: int = Depends(tenant_group)):
     update_data = {
         "username": data["username"],
         "avatarUrl": data.get("avatarUrl")
@@ -61,93 +114,151 @@ async def update_user(data: dict):
     return {"success": True}
 
 @router.get("/users/{telegram_id}")
-async def get_user(telegram_id: int):
-    user = await db.db.users.find_one({"telegramId": telegram_id})
-    if user:
-        user["_id"] = str(user["_id"])
-        return user
-    return None
+async def get_user(telegram_id: int, groupId: int = Depends(tenant_group)):
+    user = await UsersManager.get_by_telegram_id(telegram_id)
+    return _json(user) if user else None
 
 # --- Subjects ---
 @router.get("/subjects")
-async def get_subjects():
-    subjects = await db.db.subjects.find().to_list(1000)
-    for s in subjects: s["_id"] = str(s["_id"])
-    return subjects
+async def get_subjects(groupId: int = Depends(tenant_group)):
+    return await stream_json(db.db.subjects.find({"groupId": groupId}).limit(1000))
 
 @router.post("/subjects")
-async def create_subject(subject: SubjectModel):
-    result = await db.db.subjects.insert_one(subject.dict())
-    return {"success": True, "id": str(result.inserted_id)}
+async def create_subject(subject: SubjectModel, groupId: int = Depends(tenant_group)):
+    subject_id = await SubjectsManager.create_subject(subject.model_dump(), groupId)
+    return {"success": True, "id": subject_id}
 
 @router.put("/subjects/{subject_id}")
-async def update_subject(subject_id: str, subject: SubjectModel):
-    await SubjectsManager.update_subject(subject_id, subject.dict())
+async def update_subject(subject_id: str, subject: SubjectModel, groupId: int = Depends(tenant_group)):
+    await _owned_subject(subject_id, groupId)
+    await SubjectsManager.update_subject(subject_id, subject.model_dump())
     return {"success": True}
 
 @router.delete("/subjects/{subject_id}")
-async def delete_subject(subject_id: str):
-    await db.db.subjects.delete_one({"_id": ObjectId(subject_id)})
+async def delete_subject(subject_id: str, groupId: int = Depends(tenant_group)):
+    await _owned_subject(subject_id, groupId)
+    await SubjectsManager.delete_subject(subject_id)
     return {"success": True}
 
 # --- Queue ---
 @router.get("/queues/subject/{subject_id}")
-async def get_queue(subject_id: str):
-    queue = await db.db.queues.find_one({"subjectId": subject_id})
+async def get_queue(subject_id: str, groupId: int = Depends(tenant_group)):
+    await _owned_subject(subject_id, groupId)
+    queue = Queue.from_bson(await db.db.queues.find_one({"subjectId": subject_id, "groupId": groupId}))
     if not queue: return None
-    queue["_id"] = str(queue["_id"])
-    
-    entries_data = []
-    for entry in queue.get("entries", []):
-        if "userId" in entry:
-            user = await db.db.users.find_one({"_id": ObjectId(entry["userId"])})
-            if user:
-                entry["user"] = {
-                    "_id": str(user["_id"]),
-                    "fullName": user.get("fullName"),
-                    "officialName": user.get("officialName"),
-                    "avatarUrl": user.get("avatarUrl"),
-                    "telegramId": user.get("telegramId")
-                }
-        entries_data.append(entry)
-    queue["entries"] = entries_data
-    return queue
+    entries = queue.get("entries", [])
+
+    # Усі учасники черги одним запитом
+    user_ids = {ObjectId(e["userId"]) for e in entries if ObjectId.is_valid(e.get("userId", ""))}
+    users = await db.db.users.find({"_id": {"$in": list(user_ids)}}).to_list(None) if user_ids else []
+    by_id = {u.id: u for u in User.from_bson_list(users)}
+
+    result = queue.to_bson()
+    result["entries"] = [
+        {**e, "user": by_id[e["userId"]].public()} if e.get("userId") in by_id else e
+        for e in entries
+    ]
+    return FastJSONResponse(result)
 
 @router.post("/queues")
-async def create_queue(data: dict):
+async def create_queue(data: dict, groupId: int = Depends(tenant_group)):
     subject_id = data.get("subjectId")
+    await _owned_subject(subject_id, groupId)
     if await db.db.queues.find_one({"subjectId": subject_id}):
         return {"success": False, "message": "Queue exists"}
     
     new_queue = {
+        "groupId": groupId,
         "subjectId": subject_id,
         "isActive": True,
-        "config": {"minMaxRule": True},
+        "config": dict(DEFAULT_QUEUE_CONFIG),
         "entries": [],
+        "version": 0,
         "createdAt": datetime.utcnow()
     }
     res = await db.db.queues.insert_one(new_queue)
     return {"success": True, "id": str(res.inserted_id)}
 
+def _cache_engine(queue_id: str, version: Any, engine: QueueEngine):
+    _queue_engines[queue_id] = (version, engine)
+    _queue_engines.move_to_end(queue_id)
+    while len(_queue_engines) > QUEUE_ENGINE_CACHE_SIZE:
+        _queue_engines.popitem(last=False)
+
+async def _mutate_queue(queue_id: str, group_id: int, mutate: Callable[[dict, QueueEngine], Any]):
+    """Зміна записів черги з оптимістичним блокуванням за полем version.
+
+    Кожен запис у entries збільшує version, тож рушій з кешу для поточної
+    версії відповідає документу і entries не читаються й не індексуються
+    заново. У базу йде лише точкова зміна з журналу рушія. Черга іншої
+    групи — 404.
+    """
+    if not ObjectId.is_valid(queue_id): raise HTTPException(404, "Queue not found")
+    for _ in range(QUEUE_WRITE_RETRIES):
+        queue = _check_group(
+            await db.db.queues.find_one({"_id": ObjectId(queue_id)}, {"entries": 0}), group_id, "Queue not found"
+        )
+        cached = _queue_engines.pop(queue_id, None)
+        if cached is not None and cached[0] == queue.get("version"):
+            engine = cached[1]
+            engine.configure(queue.get("config"))
+        else:
+            queue = _check_group(await db.db.queues.find_one({"_id": ObjectId(queue_id)}), group_id, "Queue not found")
+            engine = QueueEngine.from_doc(queue)
+        version = queue.get("version")
+        try:
+            result = mutate(queue, engine)
+        except QueueError as e:
+            # Відхилена операція рушій не змінює
+            if not engine.dirty:
+                _cache_engine(queue_id, version, engine)
+            raise HTTPException(400, e.message)
+        update, array_filters = engine.take_update()
+        if not update:
+            _cache_engine(queue_id, version, engine)
+            return result
+        update["$inc"] = {"version": 1}
+        res = await db.db.queues.update_one(
+            {"_id": queue["_id"], "version": version}, update, array_filters=array_filters
+        )
+        if res.matched_count:
+            _cache_engine(queue_id, (version or 0) + 1, engine)
+            return result
+    raise HTTPException(409, "Черга змінилася, спробуйте ще раз")
+
+async def _queue_config(queue_id: str, group_id: int) -> dict:
+    if not ObjectId.is_valid(queue_id): raise HTTPException(404, "Queue not found")
+    queue = await db.db.queues.find_one({"_id": ObjectId(queue_id)}, {"config": 1, "groupId": 1})
+    _check_group(queue, group_id, "Queue not found")
+    return {**DEFAULT_QUEUE_CONFIG, **queue.get("config", {})}
+
 @router.patch("/queues/config")
-async def update_queue_config(config: QueueConfig):
-    if config.adminId not in ADMIN_IDS: raise HTTPException(403)
+async def update_queue_config(config: QueueConfig, groupId: int = Depends(tenant_group)):
+    if not _is_admin(config.adminId, groupId): raise HTTPException(403)
+    await _owned("queues", config.queueId, groupId, "Queue not found")
     await db.db.queues.update_one(
         {"_id": ObjectId(config.queueId)},
         {"$set": {"config.minMaxRule": config.minMaxRule}}
     )
     return {"success": True}
 
+@router.get("/queues/{queue_id}/config")
+async def get_queue_config(queue_id: str, groupId: int = Depends(tenant_group)):
+    return await _queue_config(queue_id, groupId)
+
+@router.patch("/queues/{queue_id}/config")
+async def patch_queue_config(queue_id: str, data: dict, groupId: int = Depends(tenant_group)):
+    if not _is_admin(data.get("adminId"), groupId): raise HTTPException(403)
+    await _owned("queues", queue_id, groupId, "Queue not found")
+    update = {f"config.{k}": v for k, v in data.items() if k in DEFAULT_QUEUE_CONFIG}
+    if update:
+        await db.db.queues.update_one({"_id": ObjectId(queue_id)}, {"$set": update})
+    return await _queue_config(queue_id, groupId)
+
 @router.post("/queues/join")
-async def join_queue(data: dict):
-    queue = await db.db.queues.find_one({"_id": ObjectId(data["queueId"])})
-    if not queue: raise HTTPException(404, "Queue not found")
-    
+async def join_queue(data: dict, groupId: int = Depends(tenant_group)):
     is_admin_add = data.get("isAdminAdd", False)
 
-    if not queue.get("isActive", True) and not is_admin_add:
-        raise HTTPException(400, "Черга закрита")
-
     if is_admin_add:
         target_user_id = data.get("targetUserId") 
         if not target_user_id: raise HTTPException(400, "No user selected")
@@ -159,115 +270,278 @@ async def join_queue(data: dict):
             raise HTTPException(400, "Будь ласка, вкажіть ваше ПІБ в налаштуваннях!")
         user_id = str(user["_id"])
 
-    entries = queue.get("entries", [])
-    if any(e["userId"] == user_id for e in entries) and not is_admin_add:
-        raise HTTPException(400, "Ви вже в черзі")
-    if any(e["position"] == data["position"] for e in entries):
-        raise HTTPException(400, "Місце зайняте")
-
-    if queue.get("config", {}).get("minMaxRule", True) and not is_admin_add:
-        active_labs = [e["labNumber"] for e in entries if e.get("status") in ["preparing", "defending", "completed"]]
-        if active_labs:
-            min_lab = min(active_labs)
-            if data["labNumber"] > min_lab + 2:
-                raise HTTPException(400, f"Правило черги: Макс. лаба = {min_lab + 2} (Мін: {min_lab})")
-
-    new_entry = {
-        "userId": user_id,
-        "labNumber": data["labNumber"],
-        "position": data["position"],
-        "status": "waiting",
-        "joinedAt": datetime.utcnow().isoformat()
-    }
-    entries.append(new_entry)
-    await db.db.queues.update_one({"_id": ObjectId(data["queueId"])}, {"$set": {"entries": entries}})
+    def mutate(queue: dict, engine: QueueEngine):
+        if not queue.get("isActive", True) and not is_admin_add:
+            raise QueueError("Черга закрита")
+        engine.join(user_id, data["labNumber"], data["position"], is_admin_add)
+
+    await _mutate_queue(data["queueId"], groupId, mutate)
     return {"success": True}
 
 @router.post("/queues/leave")
-async def leave_queue(data: dict):
+async def leave_queue(data: dict, groupId: int = Depends(tenant_group)):
     if data.get("isAdminKick", False):
         user_id = data.get("targetUserId")
     else:
         user = await db.db.users.find_one({"telegramId": data["telegramId"]})
+        if not user: raise HTTPException(404, "User not found")
         user_id = str(user["_id"])
 
+    await _owned("queues", data["queueId"], groupId, "Queue not found")
     await db.db.queues.update_one(
-        {"_id": ObjectId(data["queueId"])},
-        {"$pull": {"entries": {"userId": user_id}}}
+        {"_id": ObjectId(data["queueId"]), "groupId": groupId},
+        {"$pull": {"entries": {"userId": user_id}}, "$inc": {"version": 1}}
     )
     return {"success": True}
 
+@router.post("/queues/kick")
+async def kick_from_queue(data: dict, groupId: int = Depends(tenant_group)):
+    if not _is_admin(data.get("adminId"), groupId): raise HTTPException(403)
+    removed = await _mutate_queue(data["queueId"], groupId, lambda q, engine: engine.kick(data["targetUserId"]))
+    return {"success": True, "removed": removed}
+
+@router.post("/queues/move")
+async def move_in_queue(data: dict, groupId: int = Depends(tenant_group)):
+    is_admin = _is_admin(data.get("adminId"), groupId)
+    if data.get("targetUserId"):
+        if not is_admin: raise HTTPException(403)
+        user_id = data["targetUserId"]
+    else:
+        user = await db.db.users.find_one({"telegramId": data["telegramId"]})
+        if not user: raise HTTPException(404, "User not found")
+        user_id = str(user["_id"])
+
+    # Зсув зайнятих місць і пріоритет — лише для адміна
+    priority = is_admin and data.get("priority", False)
+
+    def mutate(queue: dict, engine: QueueEngine):
+        if data.get("position") is None:
+            if not priority: raise QueueError("Не вказано позицію")
+            return engine.prioritize(user_id)
+        return engine.move(user_id, data["position"], priority)
+
+    entry = await _mutate_queue(data["queueId"], groupId, mutate)
+    return {"success": True, "position": entry["position"]}
+
 @router.patch("/queues/status")
-async def set_status(data: dict):
-    if data["adminId"] not in ADMIN_IDS: raise HTTPException(403)
-    queue = await db.db.queues.find_one({"_id": ObjectId(data["queueId"])})
-    entries = queue["entries"]
-    for e in entries:
-        if e["userId"] == data["userId"]:
-            e["status"] = data["status"]
-            break
-    await db.db.queues.update_one({"_id": ObjectId(data["queueId"])}, {"$set": {"entries": entries}})
+async def set_status(data: dict, groupId: int = Depends(tenant_group)):
+    if not _is_admin(data["adminId"], groupId): raise HTTPException(403)
+    await _mutate_queue(data["queueId"], groupId, lambda q, engine: engine.set_status(data["userId"], data["status"]))
     return {"success": True}
 
 @router.post("/queues/toggle")
-async def toggle_queue(data: dict):
-    if data["adminId"] not in ADMIN_IDS: raise HTTPException(403)
-    queue = await db.db.queues.find_one({"_id": ObjectId(data["queueId"])})
+async def toggle_queue(data: dict, groupId: int = Depends(tenant_group)):
+    if not _is_admin(data["adminId"], groupId): raise HTTPException(403)
+    if not ObjectId.is_valid(data["queueId"]): raise HTTPException(404, "Queue not found")
+    queue = _check_group(await db.db.queues.find_one({"_id": ObjectId(data["queueId"])}, {"isActive": 1, "groupId": 1}), groupId, "Queue not found")
     await db.db.queues.update_one({"_id": ObjectId(data["queueId"])}, {"$set": {"isActive": not queue.get("isActive", True)}})
     return {"success": True}
 
 # --- Topics ---
 @router.get("/topics/{subject_id}")
-async def get_topics(subject_id: str):
-    return await TopicsManager.get_topics(subject_id)
+async def get_topics(subject_id: str, groupId: int = Depends(tenant_group)):
+    await _owned_subject(subject_id, groupId)
+    return _json(await TopicsManager.get_topics(subject_id))
 
 @router.post("/topics")
-async def create_topic(data: dict):
-    if data["adminId"] not in ADMIN_IDS: raise HTTPException(403)
-    await TopicsManager.create_topic(data["subjectId"], data["title"])
+async def create_topic(data: dict, groupId: int = Depends(tenant_group)):
+    if not _is_admin(data["adminId"], groupId): raise HTTPException(403)
+    await _owned_subject(data["subjectId"], groupId)
+    await TopicsManager.create_topic(data["subjectId"], data["title"], data.get("maxUsers"), groupId)
     return {"success": True}
 
 @router.put("/topics/{topic_id}")
-async def update_topic(topic_id: str, data: dict):
-    if data["adminId"] not in ADMIN_IDS: raise HTTPException(403)
+async def update_topic(topic_id: str, data: dict, groupId: int = Depends(tenant_group)):
+    if not _is_admin(data["adminId"], groupId): raise HTTPException(403)
+    await _owned("topics", topic_id, groupId, "Тему не знайдено")
     await TopicsManager.update_topic(topic_id, data["title"])
     return {"success": True}
 
 @router.delete("/topics/{topic_id}")
-async def delete_topic(topic_id: str, adminId: int):
-    if int(adminId) not in ADMIN_IDS: raise HTTPException(403)
+async def delete_topic(topic_id: str, adminId: int, groupId: int = Depends(tenant_group)):
+    if not _is_admin(adminId, groupId): raise HTTPException(403)
+    await _owned("topics", topic_id, groupId, "Тему не знайдено")
     await TopicsManager.delete_topic(topic_id)
     return {"success": True}
 
+TOPIC_ERRORS = {
+    "not_found": (404, "Тему не знайдено"),
+    "already": (400, "Ви вже обрали цю тему"),
+    "full": (400, "Тема вже зайнята"),
+    "limit": (400, f"Можна обрати не більше {MAX_TOPICS_PER_USER} тем з предмета"),
+}
+
+async def _topic_user(telegram_id: int):
+    user = await db.db.users.find_one({"telegramId": telegram_id})
+    if not user: raise HTTPException(404, "User not found")
+    return user
+
+def _topic_result(res: str):
+    if res in TOPIC_ERRORS:
+        status, message = TOPIC_ERRORS[res]
+        raise HTTPException(status, message)
+    return {"success": True, "result": res}
+
 @router.post("/topics/toggle")
-async def toggle_topic(data: dict):
-    user = await db.db.users.find_one({"telegramId": data["telegramId"]})
-    res = await TopicsManager.toggle_topic(data["topicId"], str(user["_id"]), user["fullName"])
-    return {"success": True}
+async def toggle_topic(data: dict, groupId: int = Depends(tenant_group)):
+    await _owned("topics", data["topicId"], groupId, "Тему не знайдено")
+    user = await _topic_user(data["telegramId"])
+    res = await TopicsManager.toggle_topic(data["topicId"], str(user["_id"]), user.get("fullName"))
+    return _topic_result(res)
+
+@router.post("/topics/claim")
+async def claim_topic(data: dict, groupId: int = Depends(tenant_group)):
+    await _owned("topics", data["topicId"], groupId, "Тему не знайдено")
+    user = await _topic_user(data["telegramId"])
+    res = await TopicsManager.claim_topic(data["topicId"], str(user["_id"]), user.get("fullName"))
+    return _topic_result(res)
+
+@router.post("/topics/release")
+async def release_topic(data: dict, groupId: int = Depends(tenant_group)):
+    await _owned("topics", data["topicId"], groupId, "Тему не знайдено")
+    user = await _topic_user(data["telegramId"])
+    if not await TopicsManager.release_topic(data["topicId"], str(user["_id"])):
+        raise HTTPException(400, "Ви не бронювали цю тему")
+    return {"success": True, "result": "released"}
 
 # --- Homework ---
+@router.get("/homework")
+async def get_upcoming_hw(hours: Optional[int] = None, groupId: int = Depends(tenant_group)):
+    return _json(await HomeworkManager.get_upcoming(hours, groupId))
+
 @router.get("/homework/{subject_id}")
-async def get_hw(subject_id: str):
-    return await HomeworkManager.get_hw(subject_id)
+async def get_hw(subject_id: str, groupId: int = Depends(tenant_group)):
+    await _owned_subject(subject_id, groupId)
+    return _json(await HomeworkManager.get_hw(subject_id))
 
 @router.post("/homework")
-async def add_hw(data: dict):
-    await HomeworkManager.add_hw(data["subjectId"], data["text"], data["deadline"], data["authorId"])
+async def add_hw(data: dict, groupId: int = Depends(tenant_group)):
+    await _owned_subject(data["subjectId"], groupId)
+    await HomeworkManager.add_hw(data["subjectId"], data["text"], data["deadline"], data["authorId"], groupId)
     return {"success": True}
 
 @router.put("/homework/{hw_id}")
-async def update_hw(hw_id: str, data: dict):
-    if data["adminId"] not in ADMIN_IDS: raise HTTPException(403)
+async def update_hw(hw_id: str, data: dict, groupId: int = Depends(tenant_group)):
+    if not _is_admin(data["adminId"], groupId): raise HTTPException(403)
+    await _owned("homework", hw_id, groupId, "Homework not found")
     await HomeworkManager.update_hw(hw_id, data["text"], data["deadline"])
     return {"success": True}
 
 @router.delete("/homework/{hw_id}")
-async def delete_hw(hw_id: str, adminId: int):
-    if int(adminId) not in ADMIN_IDS: raise HTTPException(403)
+async def delete_hw(hw_id: str, adminId: int, groupId: int = Depends(tenant_group)):
+    if not _is_admin(adminId, groupId): raise HTTPException(403)
+    await _owned("homework", hw_id, groupId, "Homework not found")
     await HomeworkManager.delete_hw(hw_id)
     return {"success": True}
 
 # --- Utils ---
 @router.get("/schedule")
-async def get_schedule():
-    return await ScheduleAPI.get_schedule()
\ No newline at end of file
+async def get_schedule(groupId: int = Depends(tenant_group)):
+    return await ScheduleAPI.get_schedule(ScheduleAPI.kpi_group_for(groupId))
+
+@router.get("/schedule/refresh")
+async def get_schedule_refresh_state():
+    return schedule_refresher.state()
+
+def _link_resolver(group_id: int):
+    if not get_link_index(group_id).loaded:
+        return lambda pair: None
+    def link_for(pair: dict):
+        link, score = LinksManager.match_link(pair.get("name", ""), pair.get("teacherName", ""), pair.get("type", ""), group_id)
+        return link if score >= LINK_MATCH_THRESHOLD else None
+    return link_for
+
+@router.get("/schedule.ics")
+async def get_schedule_ics(request: Request, groupId: int = Depends(registered_group)):
+    """Календар для підписки; перебудовується лише при зміні розкладу, посилань чи ДЗ.
+
+    Календарні клієнти не надсилають initData, тому перевіряється лише, що
+    група зареєстрована: невідомий groupId відхиляється до побудови, і кеш
+    містить лише зареєстровані групи.
+    """
+    kpi_group_id = ScheduleAPI.kpi_group_for(groupId)
+    schedule_data = await ScheduleAPI.get_schedule(kpi_group_id)
+    semester = semester_bounds(clock.now().date())
+    key = (ScheduleAPI._version.get(kpi_group_id), HomeworkManager.version, get_link_index(groupId).version, semester)
+
+    cached = _ics_cache.get(groupId)
+    if cached is None or cached[0] != key:
+        since = datetime.combine(semester[0], datetime.min.time())
+        homeworks = await HomeworkManager.get_upcoming(None, groupId, since=since)
+        subject_names = await SubjectsManager.get_names([h.get("subjectId", "") for h in homeworks])
+        tenant = TenantsManager.get(groupId) or {}
+        body = build_calendar(
+            schedule_data, semester, groupId, _link_resolver(groupId), homeworks, subject_names, tenant.get("title")
+        ).encode("utf-8")
+        cached = _ics_cache[groupId] = (key, body, f'"{hashlib.sha1(body).hexdigest()}"')
+
+    _, body, etag = cached
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=900"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="text/calendar; charset=utf-8", headers=headers)
+
+async def schedule_weeks(group_id: int) -> Optional[dict]:
+    """Обидва тижні розкладу для Mini App; перебудовуються лише при зміні розкладу чи посилань"""
+    # Кеш лише для зареєстрованих груп: інакше kpi_group_for() підставив би
+    # розклад за замовчуванням і кожен довільний groupId займав би запис
+    if TenantsManager.get(group_id) is None:
+        return None
+    kpi_group_id = ScheduleAPI.kpi_group_for(group_id)
+    schedule_data = await ScheduleAPI.get_schedule(kpi_group_id)
+    if not schedule_data:
+        return None
+
+    key = (ScheduleAPI._version.get(kpi_group_id), get_link_index(group_id).version)
+    cached = _view_cache.get(group_id)
+    if cached is None or cached[0] != key:
+        cached = _view_cache[group_id] = (key, build_weeks(schedule_data, _link_resolver(group_id)))
+    return cached[1]
+
+@router.get("/schedule/view")
+async def get_schedule_view(groupId: int = Depends(tenant_group), week: Optional[str] = None, day: Optional[str] = None):
+    """Розклад для Mini App: потрібні поля, посилання, поточний тиждень і пара.
+
+    week: 1, 2, current або next; day: Пн..Сб, today або tomorrow.
+    """
+    weeks = await schedule_weeks(groupId)
+    if weeks is None: raise HTTPException(503, "Розклад недоступний")
+
+    now = clock.now()
+    current_week = ScheduleAPI.get_week_number(now)
+    current, next_pair = current_and_next(weeks, now)
+    result = {
+        "currentWeek": current_week,
+        "today": DAY_CODES[now.weekday()] if now.weekday() < 6 else None,
+        "current": current,
+        "next": next_pair,
+    }
+
+    if day in ("today", "tomorrow"):
+        date = now + timedelta(days=0 if day == "today" else 1)
+        result["day"] = {
+            "date": date.date().isoformat(),
+            "day": DAY_CODES[date.weekday()] if date.weekday() < 6 else None,
+            "week": ScheduleAPI.get_week_number(date),
+            "pairs": day_pairs(weeks, date)
+        }
+        return result
+
+    if week in (None, ""):
+        selected = [1, 2]
+    elif week == "current":
+        selected = [current_week]
+    elif week == "next":
+        selected = [ScheduleAPI.get_week_number(now + timedelta(weeks=1))]
+    elif week in ("1", "2"):
+        selected = [int(week)]
+    else:
+        raise HTTPException(400, "week: 1, 2, current або next")
+
+    if day and day not in DAY_CODES:
+        raise HTTPException(400, "day: Пн..Сб, today або tomorrow")
+    result["weeks"] = {
+        str(n): [d for d in weeks[n] if not day or d["day"] == day]
+        for n in selected
+    }
+    return result
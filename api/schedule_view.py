@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Callable
+from bot.utils.api import ScheduleAPI, get_class_end_time
+
+DAY_CODES = ['Пн', 'Вв', 'Ср', 'Чт', 'Пт', 'Сб']
+WEEK_KEYS = {1: 'scheduleFirstWeek', 2: 'scheduleSecondWeek'}
+
+
+def _pair_view(pair: Dict[str, Any], link_for: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Лише поля, які показує Mini App, та посилання з бази"""
+    start = (pair.get('time') or '')[:5]
+    end = get_class_end_time(start) if start else None
+    link = link_for(pair)
+    return {
+        "time": start,
+        "end": end[:5] if end else None,
+        "name": pair.get('name', ''),
+        "type": pair.get('type', ''),
+        "teacher": pair.get('teacherName', ''),
+        "place": pair.get('place') or None,
+        "meetLink": link.get('meet_link') if link else None,
+        "classroomLink": link.get('classroom_link') if link else None,
+    }
+
+
+def build_weeks(schedule_data: Dict[str, Any],
+                link_for: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]) -> Dict[int, List[Dict[str, Any]]]:
+    """Обидва тижні ротації: {1: [{"day": "Пн", "pairs": [...]}, ...], 2: [...]}"""
+    weeks = {}
+    for week_number, week_key in WEEK_KEYS.items():
+        days = {d.get('day'): d.get('pairs') or [] for d in (schedule_data or {}).get(week_key) or []}
+        weeks[week_number] = [
+            {"day": code, "pairs": [_pair_view(p, link_for) for p in days[code]]}
+            for code in DAY_CODES if days.get(code)
+        ]
+    return weeks
+
+
+def day_pairs(weeks: Dict[int, List[Dict[str, Any]]], date: datetime) -> List[Dict[str, Any]]:
+    if date.weekday() > 5:
+        return []
+    code = DAY_CODES[date.weekday()]
+    week = weeks.get(ScheduleAPI.get_week_number(date), [])
+    return next((d["pairs"] for d in week if d["day"] == code), [])
+
+
+def current_and_next(weeks: Dict[int, List[Dict[str, Any]]], now: datetime):
+    """Поточна пара (якщо йде) і наступна, з датою; пошук на два тижні вперед"""
+    hm = now.strftime('%H:%M')
+    current = None
+    for pair in day_pairs(weeks, now):
+        if pair["end"] and pair["time"] <= hm < pair["end"]:
+            current = {**pair, "date": now.date().isoformat()}
+            break
+
+    for offset in range(15):
+        date = now + timedelta(days=offset)
+        for pair in day_pairs(weeks, date):
+            if offset == 0 and pair["time"] <= hm:
+                continue
+            return current, {**pair, "date": date.date().isoformat()}
+    return current, None
@@ -0,0 +1,56 @@
+import mimetypes
+import os
+import re
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles, NotModifiedResponse
+from starlette.types import Scope
+from api.compression import pick_encoding, COMPRESSIBLE_EXTENSIONS
+
+# app.3f2a9c1e.js — ім'я з хешем вмісту, файл ніколи не змінюється
+HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{8,}\.[a-z0-9]+$")
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+DEFAULT_CACHE = "public, max-age=3600"
+
+ENCODING_SUFFIX = {"br": ".br", "gzip": ".gz"}
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles з попередньо стисненими файлами та Cache-Control за типом файлу.
+
+    Якщо поруч із файлом лежить .br/.gz і клієнт їх приймає, віддається
+    стиснений варіант. Файли з хешем в імені кешуються назавжди, HTML —
+    лише з перевіркою ETag, щоб нова збірка підхоплювалась одразу.
+    """
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        path = os.fspath(full_path)
+        extension = os.path.splitext(path)[1]
+
+        response = None
+        if extension in COMPRESSIBLE_EXTENSIONS:
+            available = [e for e, suffix in ENCODING_SUFFIX.items() if os.path.exists(path + suffix)]
+            encoding = pick_encoding(request_headers.get("accept-encoding", ""), available)
+            if encoding:
+                compressed = path + ENCODING_SUFFIX[encoding]
+                media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                response = FileResponse(compressed, status_code=status_code, stat_result=os.stat(compressed), media_type=media_type)
+                response.headers["content-encoding"] = encoding
+        if response is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+
+        if extension in COMPRESSIBLE_EXTENSIONS:
+            response.headers["vary"] = "Accept-Encoding"
+        if HASHED_NAME_RE.search(os.path.basename(path)):
+            response.headers["cache-control"] = IMMUTABLE_CACHE
+        elif extension == ".html":
+            response.headers["cache-control"] = REVALIDATE_CACHE
+        else:
+            response.headers["cache-control"] = DEFAULT_CACHE
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
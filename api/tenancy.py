@@ -0,0 +1,75 @@
+import hashlib
+import hmac
+import json
+import time
+from typing import Dict, Any, Optional
+from urllib.parse import parse_qsl
+from fastapi import HTTPException, Request
+from config import BOT_TOKEN, GROUP_ID
+from database.models import TenantsManager, GroupMembersManager
+
+# Заголовок, в якому Mini App передає Telegram.WebApp.initData
+INIT_DATA_HEADER = "X-Telegram-Init-Data"
+# Скільки діє підписаний initData (секунди)
+INIT_DATA_MAX_AGE = 24 * 3600
+
+
+def verify_init_data(init_data: str, max_age: int = INIT_DATA_MAX_AGE) -> Optional[Dict[str, Any]]:
+    """Користувач з initData Telegram WebApp або None, якщо підпис недійсний чи застарів.
+
+    Перевірка за документацією Bot API: HMAC-SHA256 від відсортованих полів
+    ключем HMAC("WebAppData", токен бота).
+    """
+    fields = dict(parse_qsl(init_data, keep_blank_values=True))
+    received = fields.pop("hash", None)
+    if not received or not BOT_TOKEN:
+        return None
+    check_string = "\n".join(f"{k}={v}" for k, v in sorted(fields.items()))
+    secret = hmac.new(b"WebAppData", BOT_TOKEN.encode(), hashlib.sha256).digest()
+    expected = hmac.new(secret, check_string.encode(), hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(expected, received):
+        return None
+    try:
+        if time.time() - int(fields.get("auth_date", 0)) > max_age:
+            return None
+        user = json.loads(fields.get("user") or "null")
+    except ValueError:
+        return None
+    return user if isinstance(user, dict) and "id" in user else None
+
+
+def init_data_user(request: Request) -> Dict[str, Any]:
+    """Користувач Mini App з підписаного initData; без заголовка чи з недійсним підписом — 401"""
+    init_data = request.headers.get(INIT_DATA_HEADER)
+    if not init_data:
+        raise HTTPException(401, "initData required")
+    user = verify_init_data(init_data)
+    if user is None:
+        raise HTTPException(401, "Invalid initData")
+    return user
+
+
+async def registered_group(groupId: Optional[int] = None) -> int:
+    """Зареєстрована група з параметра groupId (для підписки на календар без initData).
+
+    Невідома група — 404, щоб довільний groupId не відкривав дані групи за
+    замовчуванням і не займав записи в кешах.
+    """
+    group_id = GROUP_ID if groupId is None else groupId
+    if TenantsManager.get(group_id) is None:
+        raise HTTPException(404, "Group not found")
+    return group_id
+
+
+async def tenant_group(request: Request, groupId: Optional[int] = None) -> int:
+    """Група запиту Mini App (залежність FastAPI для параметра groupId).
+
+    initData обов'язковий: користувач з підпису має бути учасником або
+    адміном групи. Документи, знайдені за id, маршрути звіряють з цією групою.
+    """
+    group_id = await registered_group(groupId)
+    user = init_data_user(request)
+    if not (TenantsManager.is_admin(user["id"], group_id)
+            or await GroupMembersManager.is_member(user["id"], group_id)):
+        raise HTTPException(403, "Not a member of this group")
+    return group_id
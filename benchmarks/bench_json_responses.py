@@ -0,0 +1,84 @@
+"""
+Серіалізація спискових відповідей API: попередній шлях (цикл str(_id),
+jsonable_encoder, стандартний json) проти FastJSONResponse (orjson з
+ObjectId/datetime) та потокової відповіді з курсора.
+
+Запуск: python -m benchmarks.bench_json_responses
+"""
+
+import asyncio
+import random
+import timeit
+from datetime import datetime, timedelta
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+from api.responses import FastJSONResponse, stream_json
+from database.documents import Subject
+
+N = 500
+
+
+def make_subjects(n: int):
+    rnd = random.Random(42)
+    start = datetime(2024, 9, 1)
+    return [
+        {
+            "_id": ObjectId(),
+            "groupId": -100123,
+            "name": f"Предмет {i}",
+            "teachers": [{"name": f"Викладач {j}", "type": "Лекція", "contact": None} for j in range(rnd.randint(1, 3))],
+            "resources": {"telegram": "https://t.me/example", "classroom": None},
+            "note": "Лабораторні щочетверга" if i % 3 else None,
+            "hasQueue": True,
+            "hasTopics": bool(i % 2),
+            "hasHomework": True,
+            "createdAt": start + timedelta(hours=i),
+        }
+        for i in range(n)
+    ]
+
+
+def legacy(docs):
+    subjects = [dict(d) for d in docs]
+    for s in subjects: s["_id"] = str(s["_id"])
+    return JSONResponse(jsonable_encoder(subjects)).body
+
+
+def fast(docs):
+    return FastJSONResponse(Subject.from_bson_list(docs)).body
+
+
+def fast_raw(docs):
+    return FastJSONResponse(docs).body
+
+
+async def _stream(docs):
+    response = await stream_json(docs)
+    if not hasattr(response, "body_iterator"):
+        return response.body
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+def streamed(docs):
+    return asyncio.run(_stream(docs))
+
+
+def main():
+    docs = make_subjects(N)
+    number = 50
+    assert len(streamed(docs)) == len(fast_raw(docs))
+
+    results = [
+        ("jsonable_encoder + json (попередній)", timeit.timeit(lambda: legacy(docs), number=number)),
+        ("FastJSONResponse з документами", timeit.timeit(lambda: fast(docs), number=number)),
+        ("FastJSONResponse з сирих dict", timeit.timeit(lambda: fast_raw(docs), number=number)),
+        ("stream_json (частинами)", timeit.timeit(lambda: streamed(docs), number=number)),
+    ]
+    print(f"Документів у відповіді: {N}, розмір {len(fast_raw(docs)) // 1024} КБ")
+    for name, total in results:
+        print(f"{name:<40}{total / number * 1e3:9.2f} мс")
+
+
+if __name__ == "__main__":
+    main()
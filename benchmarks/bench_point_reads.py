@@ -0,0 +1,114 @@
+"""
+Сплеск точкових читань під час лаби: сотні студентів одночасно відкривають
+чергу, і кожен запит робить find_one за telegramId. Порівняння прямих
+запитів до колекції з пакетуванням через BatchedCollection.
+
+База імітується: кожен запит займає з'єднання з пулу на час RTT, тож
+прямі запити стоять у черзі до пулу, а пакетні — ні.
+
+Запуск: python -m benchmarks.bench_point_reads
+"""
+
+import asyncio
+import random
+import time
+from database.batching import BatchedCollection
+
+USERS = 2000
+BURST = 300          # одночасних запитів
+DISTINCT = 120       # різних користувачів у сплеску (решта — повторні відкриття)
+RTT = 0.004          # секунди на запит до Mongo
+POOL_SIZE = 10
+
+
+class FakeCursor:
+    """Курсор, що робить один запит при першій ітерації"""
+
+    def __init__(self, fetch):
+        self._fetch = fetch
+        self._docs = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._docs is None:
+            self._docs = iter(await self._fetch())
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    """Колекція з індексом за telegramId, RTT та обмеженим пулом з'єднань"""
+
+    def __init__(self, docs):
+        self.by_id = {d["telegramId"]: d for d in docs}
+        self.pool = asyncio.Semaphore(POOL_SIZE)
+        self.queries = 0
+
+    async def _roundtrip(self):
+        async with self.pool:
+            self.queries += 1
+            await asyncio.sleep(RTT)
+
+    async def find_one(self, filter):
+        await self._roundtrip()
+        doc = self.by_id.get(filter["telegramId"])
+        return dict(doc) if doc else None
+
+    def find(self, filter):
+        keys = filter["telegramId"]["$in"]
+
+        async def fetch():
+            await self._roundtrip()
+            return [dict(self.by_id[k]) for k in keys if k in self.by_id]
+
+        return FakeCursor(fetch)
+
+
+async def burst(collection, keys):
+    latencies = []
+
+    async def request(key):
+        started = time.perf_counter()
+        user = await collection.find_one({"telegramId": key})
+        latencies.append(time.perf_counter() - started)
+        return user
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(request(k) for k in keys))
+    return time.perf_counter() - started, sorted(latencies), results
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+async def main():
+    rnd = random.Random(42)
+    docs = [{"telegramId": 100000 + i, "firstName": f"User{i}"} for i in range(USERS)]
+    hot = rnd.sample([d["telegramId"] for d in docs], DISTINCT)
+    keys = [rnd.choice(hot) for _ in range(BURST)]
+
+    direct = FakeCollection(docs)
+    direct_total, direct_lat, direct_res = await burst(direct, keys)
+
+    backend = FakeCollection(docs)
+    batched = BatchedCollection(backend, ("telegramId",))
+    batched_total, batched_lat, batched_res = await burst(batched, keys)
+
+    assert direct_res == batched_res
+    print(f"Сплеск: {BURST} запитів, {DISTINCT} різних користувачів, RTT {RTT * 1e3:.0f} мс, пул {POOL_SIZE}")
+    print(f"{'':<12}{'запитів до БД':>15}{'разом, мс':>12}{'p50, мс':>10}{'p99, мс':>10}")
+    for name, queries, total, lat in (
+        ("напряму", direct.queries, direct_total, direct_lat),
+        ("пакетами", backend.queries, batched_total, batched_lat),
+    ):
+        print(f"{name:<12}{queries:>15}{total * 1e3:>12.1f}"
+              f"{percentile(lat, 0.5) * 1e3:>10.1f}{percentile(lat, 0.99) * 1e3:>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
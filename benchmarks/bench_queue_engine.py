@@ -0,0 +1,169 @@
+"""
+Черга на 1000 записів, повний шлях маршруту POST /queues/join: читання
+документа, перевірки правил і запис. Старий обробник з api/routes.py
+(перебір масиву entries + $set усього масиву) проти _mutate_queue з
+QueueEngine — з кешованим рушієм і з побудовою рушія на кожен запит.
+
+База імітується в процесі: документ зберігається як BSON, тож читання
+платить за декодування, а запис — за кодування команди, як у драйвері.
+Час «сервера» (застосування оновлення до документа) з результатів
+віднімається, мережа не враховується.
+
+Запуск: python -m benchmarks.bench_queue_engine
+"""
+
+import asyncio
+import random
+import time
+from datetime import datetime
+import bson
+from bson import ObjectId
+from fastapi import HTTPException
+from api.queue_engine import ACTIVE_STATUSES
+from config import GROUP_ID
+
+N = 1000
+JOINS = 300
+STATUSES = ["waiting", "preparing", "defending", "completed", "failed"]
+
+
+def make_entries(n: int):
+    rnd = random.Random(42)
+    return [
+        {"userId": f"u{i}", "labNumber": rnd.randint(1, 6), "position": i + 1,
+         "status": rnd.choice(STATUSES), "attempts": 0}
+        for i in range(n)
+    ]
+
+
+class Result:
+    def __init__(self, matched_count: int):
+        self.matched_count = matched_count
+        self.modified_count = matched_count
+
+
+class FakeQueues:
+    """Колекція queues з одним документом у BSON"""
+
+    def __init__(self, doc):
+        self.raw = bson.encode(doc)
+        self.server_time = 0.0
+
+    async def find_one(self, filter, projection=None):
+        raw = self.raw
+        if projection:
+            # Проєкцію виконує сервер: клієнт декодує лише повернуті поля
+            started = time.perf_counter()
+            doc = bson.decode(raw)
+            for field, include in projection.items():
+                if not include:
+                    doc.pop(field, None)
+            raw = bson.encode(doc)
+            self.server_time += time.perf_counter() - started
+        doc = bson.decode(raw)
+        return doc if doc["_id"] == filter["_id"] else None
+
+    async def update_one(self, filter, update, array_filters=None, **kwargs):
+        bson.encode({"q": filter, "u": update, "arrayFilters": array_filters or []})
+        started = time.perf_counter()
+        try:
+            doc = bson.decode(self.raw)
+            if any(doc.get(k) != v for k, v in filter.items()):
+                return Result(0)
+            self._apply(doc, update, array_filters)
+            self.raw = bson.encode(doc)
+            return Result(1)
+        finally:
+            self.server_time += time.perf_counter() - started
+
+    @staticmethod
+    def _apply(doc, update, array_filters):
+        for path, value in update.get("$set", {}).items():
+            if path.startswith("entries.$[e]."):
+                (field_filter, wanted), = array_filters[0].items()
+                for entry in doc["entries"]:
+                    if entry.get(field_filter[2:]) == wanted:
+                        entry[path.rsplit(".", 1)[1]] = value
+            else:
+                doc[path] = value
+        for path, spec in update.get("$push", {}).items():
+            doc[path].extend(spec["$each"])
+            doc[path].sort(key=lambda e: e["position"])
+        for path, spec in update.get("$pull", {}).items():
+            gone = set(spec["userId"]["$in"])
+            doc[path] = [e for e in doc[path] if e["userId"] not in gone]
+        for path, delta in update.get("$inc", {}).items():
+            doc[path] = (doc.get(path) or 0) + delta
+
+
+class FakeUsers:
+    async def find_one(self, filter):
+        return {"_id": ObjectId(), "telegramId": filter["telegramId"], "officialName": "Студент"}
+
+
+class FakeDatabase:
+    def __init__(self, queue_doc):
+        self.queues = FakeQueues(queue_doc)
+        self.users = FakeUsers()
+
+
+async def legacy_join(db, data: dict):
+    """Обробник join_queue до QueueEngine"""
+    queue = await db.queues.find_one({"_id": ObjectId(data["queueId"])})
+    if not queue: raise HTTPException(404, "Queue not found")
+    user = await db.users.find_one({"telegramId": data["telegramId"]})
+    user_id = str(user["_id"])
+
+    entries = queue.get("entries", [])
+    if any(e["userId"] == user_id for e in entries):
+        raise HTTPException(400, "Ви вже в черзі")
+    if any(e["position"] == data["position"] for e in entries):
+        raise HTTPException(400, "Місце зайняте")
+    if queue.get("config", {}).get("minMaxRule", True):
+        active_labs = [e["labNumber"] for e in entries if e.get("status") in ACTIVE_STATUSES]
+        if active_labs and data["labNumber"] > min(active_labs) + 2:
+            raise HTTPException(400, "Правило черги")
+
+    entries.append({
+        "userId": user_id, "labNumber": data["labNumber"], "position": data["position"],
+        "status": "waiting", "joinedAt": datetime.utcnow().isoformat()
+    })
+    await db.queues.update_one({"_id": ObjectId(data["queueId"])}, {"$set": {"entries": entries}})
+
+
+async def run(label: str, join, cold: bool = False) -> float:
+    from database.connection import db
+    import api.routes as routes
+
+    queue_id = ObjectId()
+    fake = FakeDatabase({
+        "_id": queue_id, "groupId": GROUP_ID, "subjectId": "s", "isActive": True, "version": 0,
+        "config": {"maxSlots": N + JOINS, "minMaxRule": True}, "entries": make_entries(N),
+    })
+    db.db = fake
+    routes._queue_engines.clear()
+
+    started = time.perf_counter()
+    for i in range(JOINS):
+        if cold:
+            routes._queue_engines.clear()
+        await join(fake, {"queueId": str(queue_id), "telegramId": i, "labNumber": 1, "position": N + i + 1})
+    elapsed = time.perf_counter() - started - fake.queues.server_time
+    print(f"{label:<42}{elapsed / JOINS * 1e3:8.3f} мс")
+    return elapsed
+
+
+async def main():
+    from api.routes import join_queue
+
+    async def engine_join(fake, data):
+        await join_queue(data, GROUP_ID)
+
+    print(f"Записів у черзі: {N}, записів у чергу: {JOINS}")
+    await run("Старий обробник (перебір + $set масиву)", legacy_join)
+    await run("QueueEngine, рушій з кешу + $push", engine_join)
+    await run("QueueEngine, побудова на кожен запит", engine_join, cold=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
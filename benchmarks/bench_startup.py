@@ -0,0 +1,66 @@
+"""
+Час холодного старту: скільки імпортується main (після цього HTTP-сервер
+уже може відповідати на /healthz) і скільки — модулі бота, які тепер
+довантажуються у фоні під час прогріву. Кожен замір — окремий процес
+з -X importtime, плюс найповільніші модулі останнього запуску.
+
+Запуск: python -m benchmarks.bench_startup [кількість запусків]
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+TOP = 10
+
+# Для імпорту потрібні лише змінні середовища з config.py, не справжні ключі
+ENV = {
+    "BOT_TOKEN": "123456:ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghi",
+    "GROUP_ID": "-100123",
+    "KPI_GROUP_ID": "bench",
+    **os.environ,
+}
+
+STAGES = [
+    ("import main (HTTP)", "import main"),
+    ("+ модулі бота", "import main; main._import_bot_modules()"),
+]
+
+
+def measure(code: str):
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            env=ENV, capture_output=True, text=True, check=True)
+    return time.perf_counter() - started, result.stderr
+
+
+def slowest(importtime_log: str):
+    rows = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.startswith(" ") and not name.startswith("  "):
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:TOP]
+
+
+def main():
+    log = ""
+    for label, code in STAGES:
+        times = []
+        for _ in range(RUNS):
+            elapsed, log = measure(code)
+            times.append(elapsed)
+        times.sort()
+        print(f"{label:<24} медіана {times[len(times) // 2] * 1e3:8.0f} мс   мін {times[0] * 1e3:8.0f} мс")
+
+    print("\nНайповільніші імпорти верхнього рівня (останній запуск):")
+    for cumulative, name in slowest(log):
+        print(f"  {name:<40}{cumulative / 1e3:8.0f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""
+Навантажувальні сценарії бота та API з локальними замінниками Telegram
+Bot API і API розкладу КПІ.
+
+Бот працює через справжній aiogram-диспетчер з long polling до фейкового
+Bot API (затримка і 429 налаштовуються), API — через uvicorn і HTTP.
+Для кожного сценарію звіт містить p50/p99 затримки і операцій за секунду.
+
+semester проганяє осінній семестр на симульованому годиннику (bot.utils.clock)
+за десятки секунд і перевіряє кількість сповіщень, GIF, дайджестів та
+особистих нагадувань і дрейф часу надсилання; розбіжності йдуть у errors.
+
+Запуск:
+    python -m benchmarks.load --list
+    python -m benchmarks.load group_flood all_ping --mongo-url mongodb://localhost:27017
+    python -m benchmarks.load --scale 0.2 --tg-429 0.05 --json
+    python -m benchmarks.load semester
+
+Потрібна MongoDB: --mongo-url (створюється і видаляється тимчасова база),
+mongod у PATH або пакет mongomock-motor.
+"""
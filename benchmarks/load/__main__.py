@@ -0,0 +1,139 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import sys
+from .fake_telegram import FakeTelegram
+from .fake_kpi import FakeKPI
+from .metrics import format_report
+from .mongo import MongoFixture, MongoUnavailable
+
+# Значення, з якими застосунок імпортується під навантажувальним прогоном:
+# бот ніколи не звертається до справжньої групи чи API КПІ
+LOAD_GROUP_ID = -1009990001
+LOAD_ADMIN_ID = 4242
+LOAD_KPI_GROUP_ID = "load-test-group"
+LOAD_BOT_TOKEN = "123456:LOADTESTLOADTESTLOADTESTLOADTEST"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load", description="Навантажувальні сценарії бота та API")
+    parser.add_argument("scenarios", nargs="*", help="сценарії (за замовчуванням усі)")
+    parser.add_argument("--list", action="store_true", help="показати сценарії і вийти")
+    parser.add_argument("--mongo-url", help="MongoDB для прогону (інакше mongod з PATH або mongomock-motor)")
+    parser.add_argument("--scale", type=float, default=1.0, help="множник розміру сценаріїв")
+    parser.add_argument("--tg-latency", type=float, default=0.03, help="затримка Bot API, с")
+    parser.add_argument("--tg-429", type=float, default=0.0, help="частка відповідей 429 на надсилання")
+    parser.add_argument("--tg-max-per-second", type=float, help="ліміт надсилань на секунду (далі 429)")
+    parser.add_argument("--kpi-latency", type=float, default=0.15, help="затримка API КПІ, с")
+    parser.add_argument("--json", action="store_true", help="результати у JSON")
+    parser.add_argument("--verbose", action="store_true", help="журнал застосунку")
+    return parser.parse_args(argv)
+
+
+async def run(args) -> list:
+    telegram = FakeTelegram(
+        latency=args.tg_latency, rate_limit_ratio=args.tg_429, max_per_second=args.tg_max_per_second,
+        admin_ids=[LOAD_ADMIN_ID], member_count=250
+    )
+    kpi = FakeKPI(latency=args.kpi_latency)
+    mongo = MongoFixture(args.mongo_url)
+    database_env = mongo.prepare()
+    await telegram.start()
+    await kpi.start()
+
+    # config читає оточення під час імпорту, тож застосунок імпортується лише тепер
+    os.environ.update({
+        "BOT_TOKEN": LOAD_BOT_TOKEN,
+        "GROUP_ID": str(LOAD_GROUP_ID),
+        "ADMIN_ID": str(LOAD_ADMIN_ID),
+        "KPI_GROUP_ID": LOAD_KPI_GROUP_ID,
+        "TELEGRAM_API_URL": telegram.url,
+        "KPI_API_BASE": kpi.url,
+        **database_env,
+    })
+    import aiohttp
+    import uvicorn
+    import main
+    from api.health import warm_up
+    from bot.utils.api import ScheduleAPI
+    from database.models import TenantsManager
+    from database.write_behind import member_buffer
+    from .scenarios import Harness, SCENARIOS
+
+    names = args.scenarios or list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Невідомі сценарії: {', '.join(unknown)}")
+
+    await mongo.connect()
+    server = None
+    polling = None
+    bot = None
+    try:
+        await TenantsManager.load()
+        await warm_up(bot=asyncio.to_thread(main._import_bot_modules))
+        bot, dp = main._create_bot()
+        member_buffer.start()
+
+        port = _free_port()
+        server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, lifespan="off", log_level="warning"))
+        serving = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.05)
+
+        harness = Harness(telegram, kpi, bot, dp, f"http://127.0.0.1:{port}", LOAD_GROUP_ID, LOAD_ADMIN_ID, args.scale)
+        dp.update.outer_middleware(harness.track_update)
+        polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False, close_bot_session=False, polling_timeout=1))
+
+        summaries = []
+        async with aiohttp.ClientSession() as harness.http:
+            for name in names:
+                print(f"→ {name}", file=sys.stderr)
+                recorder = await SCENARIOS[name](harness)
+                summaries.append(recorder.summary())
+        return summaries
+    finally:
+        if polling is not None:
+            try:
+                await dp.stop_polling()
+            except RuntimeError:
+                pass
+            await asyncio.gather(polling, return_exceptions=True)
+        if server is not None:
+            server.should_exit = True
+            await serving
+        await member_buffer.stop()
+        await ScheduleAPI.close()
+        if bot is not None:
+            await bot.session.close()
+        await mongo.close()
+        await kpi.stop()
+        await telegram.stop()
+
+
+def main(argv=None):
+    args = parse_args(argv if argv is not None else sys.argv[1:])
+    if args.list:
+        from .scenarios import SCENARIOS
+        for name, scenario in SCENARIOS.items():
+            print(f"{name:<18}{scenario.__doc__}")
+        return
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL)
+    try:
+        summaries = asyncio.run(run(args))
+    except MongoUnavailable as e:
+        raise SystemExit(str(e))
+    print(json.dumps(summaries, ensure_ascii=False, indent=2) if args.json else format_report(summaries))
+
+
+if __name__ == "__main__":
+    main()
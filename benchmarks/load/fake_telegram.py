@@ -0,0 +1,200 @@
+import asyncio
+import json
+import random
+import time
+from typing import Dict, Any, List, Optional
+from aiohttp import web
+
+BOT_ID = 777000
+BOT_USERNAME = "load_test_bot"
+
+# Методи, що надсилають повідомлення: на них діють ліміти і 429
+SEND_METHODS = {"sendMessage", "sendAnimation", "sendPhoto", "sendDocument", "editMessageText", "copyMessage"}
+
+
+def _value(raw: Any) -> Any:
+    """aiogram передає складні параметри як JSON-рядки у формі"""
+    if isinstance(raw, str) and raw[:1] in "[{":
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return raw
+    return raw
+
+
+class FakeTelegram:
+    """Локальна заміна Bot API для навантажувальних тестів.
+
+    getUpdates віддає оновлення з черги (push_update) з довгим опитуванням,
+    надіслані повідомлення записуються разом із часом. Кожен виклик
+    затримується на latency (± jitter), методи надсилання відповідають 429
+    з імовірністю rate_limit_ratio або коли перевищено max_per_second.
+    """
+
+    def __init__(self, latency: float = 0.03, jitter: float = 0.3, rate_limit_ratio: float = 0.0,
+                 retry_after: int = 1, max_per_second: Optional[float] = None,
+                 admin_ids: Optional[List[int]] = None, member_count: int = 0, seed: int = 42):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_ratio = rate_limit_ratio
+        self.retry_after = retry_after
+        self.max_per_second = max_per_second
+        self.admin_ids = list(admin_ids or [])
+        self.member_count = member_count
+        # user_id -> статус для getChatMember (решта — member)
+        self.member_status: Dict[int, str] = {}
+        self._rnd = random.Random(seed)
+        self._updates: List[Dict[str, Any]] = []
+        self._update_id = 0
+        self._message_id = 0
+        self._new_update = asyncio.Event()
+        self._sent_changed = asyncio.Event()
+        self._window: List[float] = []
+        self.pushed_at: Dict[int, float] = {}
+        self.sent: List[Dict[str, Any]] = []
+        self.calls: Dict[str, int] = {}
+        self.rate_limited = 0
+        self._runner: Optional[web.AppRunner] = None
+        self.url: Optional[str] = None
+
+    # --- Оновлення ---
+
+    def next_message_id(self) -> int:
+        self._message_id += 1
+        return self._message_id
+
+    def push_update(self, update: Dict[str, Any]) -> int:
+        self._update_id += 1
+        update = {"update_id": self._update_id, **update}
+        self._updates.append(update)
+        self.pushed_at[self._update_id] = time.perf_counter()
+        self._new_update.set()
+        return self._update_id
+
+    def push_message(self, chat_id: int, user_id: int, text: str, chat_type: str = "supergroup") -> int:
+        message = {
+            "message_id": self.next_message_id(),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": chat_type, "title": "Load test" if chat_id < 0 else None},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"Student{user_id}", "username": f"student{user_id}"},
+            "text": text,
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return self.push_update({"message": message})
+
+    # --- Надіслане ---
+
+    def sent_to(self, chat_id: int, since: float = 0.0) -> List[Dict[str, Any]]:
+        return [m for m in self.sent if m["chat_id"] == chat_id and m["at"] >= since]
+
+    async def wait_sent(self, count: int, timeout: float = 30.0) -> bool:
+        """Чекати, поки загалом буде надіслано count повідомлень"""
+        deadline = time.perf_counter() + timeout
+        while len(self.sent) < count:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return False
+            self._sent_changed.clear()
+            try:
+                await asyncio.wait_for(self._sent_changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    # --- HTTP ---
+
+    def _user(self, user_id: int) -> Dict[str, Any]:
+        return {"id": user_id, "is_bot": False, "first_name": f"Student{user_id}", "username": f"student{user_id}"}
+
+    def _chat_member(self, user_id: int) -> Dict[str, Any]:
+        if user_id in self.admin_ids:
+            return {"status": "creator", "user": self._user(user_id), "is_anonymous": False}
+        status = self.member_status.get(user_id, "member")
+        if status == "kicked":
+            return {"status": "kicked", "user": self._user(user_id), "until_date": 0}
+        return {"status": status, "user": self._user(user_id)}
+
+    def _rate_limited(self) -> bool:
+        if self.rate_limit_ratio and self._rnd.random() < self.rate_limit_ratio:
+            return True
+        if self.max_per_second:
+            now = time.perf_counter()
+            self._window = [t for t in self._window if now - t < 1.0]
+            if len(self._window) >= self.max_per_second:
+                return True
+            self._window.append(now)
+        return False
+
+    async def _get_updates(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        offset = int(params.get("offset") or 0)
+        timeout = float(params.get("timeout") or 0)
+        limit = int(params.get("limit") or 100)
+        self._updates = [u for u in self._updates if u["update_id"] >= offset]
+        if not self._updates and timeout:
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[:limit]
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = {k: _value(v) for k, v in (await request.post()).items()}
+        params.update({k: _value(v) for k, v in request.query.items()})
+        self.calls[method] = self.calls.get(method, 0) + 1
+
+        if method != "getUpdates" and self.latency:
+            await asyncio.sleep(self.latency * self._rnd.uniform(1 - self.jitter, 1 + self.jitter))
+
+        if method in SEND_METHODS and self._rate_limited():
+            self.rate_limited += 1
+            return web.json_response({
+                "ok": False, "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after},
+            }, status=429)
+
+        return web.json_response({"ok": True, "result": await self._result(method, params)})
+
+    async def _result(self, method: str, params: Dict[str, Any]) -> Any:
+        if method == "getUpdates":
+            return await self._get_updates(params)
+        if method == "getMe":
+            return {"id": BOT_ID, "is_bot": True, "first_name": "Load", "username": BOT_USERNAME}
+        if method in SEND_METHODS:
+            chat_id = int(params.get("chat_id") or 0)
+            self.sent.append({"at": time.perf_counter(), "method": method, "chat_id": chat_id, "text": params.get("text") or params.get("caption")})
+            self._sent_changed.set()
+            return {
+                "message_id": self.next_message_id(),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "supergroup" if chat_id < 0 else "private"},
+                "from": {"id": BOT_ID, "is_bot": True, "first_name": "Load"},
+                "text": params.get("text") or "",
+            }
+        if method == "getChatMember":
+            return self._chat_member(int(params["user_id"]))
+        if method == "getChatAdministrators":
+            return [self._chat_member(user_id) for user_id in self.admin_ids]
+        if method == "getChatMemberCount":
+            return self.member_count
+        # answerCallbackQuery, deleteMessage, deleteWebhook, setMyCommands...
+        return True
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_route("*", "/bot{token}/{method}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,82 @@
+import time
+from typing import Dict, Any, List, Optional
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Перцентиль з лінійною інтерполяцією (p від 0 до 100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class Recorder:
+    """Затримки операцій сценарію та пропускна здатність за час від start() до stop()"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []
+        self.errors: Dict[str, int] = {}
+        self.extra: Dict[str, Any] = {}
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def start(self):
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    def add(self, seconds: float):
+        self.latencies.append(seconds)
+
+    def error(self, kind: str):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    async def measure(self, awaitable):
+        """Виконати операцію і записати її затримку (або тип помилки)"""
+        started = time.perf_counter()
+        try:
+            result = await awaitable
+        except Exception as e:
+            self.error(type(e).__name__)
+            return None
+        self.add(time.perf_counter() - started)
+        return result
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    def summary(self) -> Dict[str, Any]:
+        ops = len(self.latencies)
+        return {
+            "scenario": self.name,
+            "ops": ops,
+            "errors": sum(self.errors.values()),
+            "seconds": round(self.elapsed, 3),
+            "opsPerSecond": round(ops / self.elapsed, 1) if self.elapsed else 0.0,
+            "p50Ms": round(percentile(self.latencies, 50) * 1e3, 2),
+            "p99Ms": round(percentile(self.latencies, 99) * 1e3, 2),
+            "maxMs": round(max(self.latencies, default=0.0) * 1e3, 2),
+            **self.extra,
+        }
+
+
+def format_report(summaries: List[Dict[str, Any]]) -> str:
+    header = f"{'сценарій':<22}{'операцій':>10}{'помилок':>9}{'оп/с':>10}{'p50, мс':>10}{'p99, мс':>10}{'max, мс':>10}"
+    lines = [header, "-" * len(header)]
+    for s in summaries:
+        lines.append(
+            f"{s['scenario']:<22}{s['ops']:>10}{s['errors']:>9}{s['opsPerSecond']:>10}"
+            f"{s['p50Ms']:>10}{s['p99Ms']:>10}{s['maxMs']:>10}"
+        )
+        details = {k: v for k, v in s.items() if k not in ("scenario", "ops", "errors", "seconds", "opsPerSecond", "p50Ms", "p99Ms", "maxMs")}
+        if details:
+            lines.append("    " + ", ".join(f"{k}={v}" for k, v in details.items()))
+    return "\n".join(lines)
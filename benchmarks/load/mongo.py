@@ -0,0 +1,92 @@
+import asyncio
+import importlib.util
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+from typing import Dict, Optional
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class MongoUnavailable(RuntimeError):
+    pass
+
+
+class MongoFixture:
+    """База для навантажувальних сценаріїв.
+
+    За пріоритетом: --mongo-url (окрема тимчасова база на ньому), mongod з
+    PATH (запускається в тимчасовому каталозі і зупиняється після прогону),
+    mongomock-motor (у пам'яті, без мережі — затримки бази не відображає).
+    prepare() викликається до імпорту застосунку, бо config читає змінні
+    середовища під час імпорту.
+    """
+
+    def __init__(self, url: Optional[str] = None):
+        self.url = url
+        self.database = f"load_test_{os.getpid()}"
+        self.kind: Optional[str] = None
+        self._process: Optional[subprocess.Popen] = None
+        self._dbpath: Optional[str] = None
+
+    def prepare(self) -> Dict[str, str]:
+        if self.url:
+            self.kind = "url"
+        elif shutil.which("mongod"):
+            self.kind = "mongod"
+            port = _free_port()
+            self._dbpath = tempfile.mkdtemp(prefix="load-mongo-")
+            self._process = subprocess.Popen(
+                ["mongod", "--dbpath", self._dbpath, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            self.url = f"mongodb://127.0.0.1:{port}"
+        elif importlib.util.find_spec("mongomock_motor") is not None:
+            self.kind = "mongomock"
+            self.url = "mongodb://mongomock"
+        else:
+            raise MongoUnavailable("Потрібна MongoDB: --mongo-url, mongod у PATH або pip install mongomock-motor")
+        return {"MONGODB_URL": self.url, "MONGO_DATABASE": self.database}
+
+    async def connect(self):
+        from database.connection import db, DATABASE_NAME
+        if self.kind == "mongomock":
+            from mongomock_motor import AsyncMongoMockClient
+            from database.batching import BatchedDatabase
+            from config import MONGO_BATCHED_READS
+            db.client = AsyncMongoMockClient()
+            db.db = BatchedDatabase(db.client[DATABASE_NAME], MONGO_BATCHED_READS)
+            db.read_db = db.client[DATABASE_NAME]
+            await db.create_indexes()
+            return
+
+        # Щойно запущений mongod приймає з'єднання не одразу
+        for attempt in range(20):
+            try:
+                await db.connect()
+                break
+            except Exception:
+                if attempt == 19:
+                    raise
+                await asyncio.sleep(0.5)
+        await db.index_task
+
+    async def close(self):
+        from database.connection import db
+        try:
+            if db.client is not None:
+                await db.client.drop_database(self.database)
+        finally:
+            if self.kind != "mongomock":
+                await db.disconnect()
+            if self._process is not None:
+                self._process.terminate()
+                self._process.wait(timeout=10)
+            if self._dbpath:
+                shutil.rmtree(self._dbpath, ignore_errors=True)
@@ -0,0 +1,452 @@
+import asyncio
+import json
+import random
+import re
+import time
+from collections import Counter
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Dict, Any, List, Callable, Awaitable, Optional, Tuple
+import aiohttp
+import pytz
+from .fake_telegram import FakeTelegram
+from .fake_kpi import FakeKPI
+from .metrics import Recorder
+
+# Перший тиждень навчання (понеділок) для симуляції дня планувальника
+SIMULATED_DAY = datetime(2025, 9, 8)
+# Осінній семестр: 1 вересня 2025 — понеділок першого тижня, 26 жовтня
+# перехід на зимовий час
+SEMESTER_START = date(2025, 9, 1)
+SEMESTER_WEEKS = 17
+SEMESTER_FIRST_TICK, SEMESTER_LAST_TICK = 7, 23
+PAIR_MINUTES = 95
+SEMESTER_REMINDER_LEAD = 10
+PAIR_TIME_RE = re.compile(r"⏰ \*\*Час:\*\* (\S+)")
+PAIR_NAME_RE = re.compile(r"📚 \*\*Предмет:\*\* (.+)")
+
+
+class Harness:
+    """Усе, що потрібно сценаріям: фейкові сервери, бот, HTTP-адреса API і група"""
+
+    def __init__(self, telegram: FakeTelegram, kpi: FakeKPI, bot, dp, api_url: str,
+                 group_id: int, admin_id: int, scale: float = 1.0):
+        self.telegram = telegram
+        self.kpi = kpi
+        self.bot = bot
+        self.dp = dp
+        self.api_url = api_url
+        self.group_id = group_id
+        self.admin_id = admin_id
+        self.scale = scale
+        # Куди middleware записує час від getUpdates до завершення обробки
+        self.updates: Optional[Recorder] = None
+        self.http: Optional[aiohttp.ClientSession] = None
+
+    def n(self, base: int) -> int:
+        return max(1, int(base * self.scale))
+
+    async def track_update(self, handler, update, data):
+        """Outer middleware диспетчера: затримка кожного оновлення від появи в getUpdates"""
+        try:
+            return await handler(update, data)
+        finally:
+            pushed = self.telegram.pushed_at.pop(update.update_id, None)
+            if pushed is not None and self.updates is not None:
+                self.updates.add(time.perf_counter() - pushed)
+
+    async def wait_updates(self, recorder: Recorder, count: int, timeout: float = 120.0):
+        deadline = time.perf_counter() + timeout
+        while len(recorder.latencies) < count and time.perf_counter() < deadline:
+            await asyncio.sleep(0.01)
+        missing = count - len(recorder.latencies)
+        if missing > 0:
+            recorder.errors["timeout"] = missing
+
+    async def request(self, recorder: Recorder, method: str, path: str, **kwargs) -> Tuple[int, Any]:
+        started = time.perf_counter()
+        try:
+            async with self.http.request(method, f"{self.api_url}{path}", **kwargs) as response:
+                body = await response.read()
+                status = response.status
+        except Exception as e:
+            recorder.error(type(e).__name__)
+            return 0, None
+        recorder.add(time.perf_counter() - started)
+        if status >= 500:
+            recorder.error(f"HTTP {status}")
+        return status, body
+
+
+# --- Дані ---
+
+async def seed_members(h: Harness, count: int, reminder_share: float = 0.0, reminder_lead: int = 10) -> List[int]:
+    from database.connection import db
+    user_ids = [100000 + i for i in range(count)]
+    now = datetime.utcnow()
+    await db.db.group_members.delete_many({"groupId": h.group_id})
+    await db.db.group_members.insert_many([
+        {
+            "groupId": h.group_id,
+            "user_id": user_id,
+            "username": f"student{user_id}",
+            "first_name": f"Student{user_id}",
+            "last_name": None,
+            "joined_at": now,
+            "is_active": True,
+            "allow_ping": True,
+            **({"reminder_leads": [reminder_lead]} if i < count * reminder_share else {}),
+        }
+        for i, user_id in enumerate(user_ids)
+    ])
+    from database.models import GroupMembersManager
+    await GroupMembersManager.load_membership()
+    return user_ids
+
+
+async def seed_users(count: int) -> List[int]:
+    from database.connection import db
+    telegram_ids = [200000 + i for i in range(count)]
+    await db.db.users.delete_many({"telegramId": {"$in": telegram_ids}})
+    await db.db.users.insert_many([
+        {"telegramId": t, "username": f"student{t}", "fullName": f"Студент {t}", "officialName": f"Студент {t}"}
+        for t in telegram_ids
+    ])
+    return telegram_ids
+
+
+async def seed_subject(h: Harness, name: str) -> str:
+    from database.connection import db
+    result = await db.db.subjects.insert_one({
+        "groupId": h.group_id, "name": name, "teachers": [], "resources": {},
+        "hasQueue": True, "hasTopics": True, "hasHomework": True,
+    })
+    return str(result.inserted_id)
+
+
+# --- Сценарії ---
+
+async def group_flood(h: Harness) -> Recorder:
+    """Сплеск повідомлень у груповому чаті: членство, буфер учасників, FSM"""
+    messages, users = h.n(2000), h.n(80)
+    recorder = Recorder("group_flood")
+    recorder.extra["users"] = users
+    h.updates = recorder
+    recorder.start()
+    for i in range(messages):
+        h.telegram.push_message(h.group_id, 300000 + i % users, f"повідомлення {i}")
+    await h.wait_updates(recorder, messages)
+    recorder.stop()
+    h.updates = None
+
+    from database.write_behind import member_buffer
+    started = time.perf_counter()
+    recorder.extra["memberUpserts"] = await member_buffer.flush()
+    recorder.extra["flushMs"] = round((time.perf_counter() - started) * 1e3, 1)
+    return recorder
+
+
+async def all_ping(h: Harness) -> Recorder:
+    """/all у групі на 200 учасників: кожна операція — повний прохід команди"""
+    members, rounds = h.n(200), max(1, h.n(2))
+    await seed_members(h, members)
+    recorder = Recorder("all_ping")
+    rate_limited = h.telegram.rate_limited
+    recorder.start()
+    for _ in range(rounds):
+        sent_before = len(h.telegram.sent)
+        h.updates = Recorder("all_ping_update")
+        started = time.perf_counter()
+        h.telegram.push_message(h.group_id, h.admin_id, "/all")
+        await h.wait_updates(h.updates, 1, timeout=members)
+        recorder.add(time.perf_counter() - started)
+        recorder.errors.update(h.updates.errors)
+        recorder.extra["messagesPerRound"] = len(h.telegram.sent) - sent_before
+    recorder.stop()
+    h.updates = None
+    recorder.extra["members"] = members
+    recorder.extra["rateLimited"] = h.telegram.rate_limited - rate_limited
+    return recorder
+
+
+async def queue_storm(h: Harness) -> Recorder:
+    """Сотні студентів одночасно записуються в одну чергу на лабу"""
+    students = h.n(300)
+    telegram_ids = await seed_users(students)
+    subject_id = await seed_subject(h, "Черга під навантаженням")
+    recorder = Recorder("queue_storm")
+    _, body = await h.request(Recorder("setup"), "POST", "/api/queues", json={"subjectId": subject_id})
+    queue_id = json.loads(body)["id"]
+
+    statuses: Dict[int, int] = {}
+    rnd = random.Random(7)
+
+    async def join(telegram_id: int):
+        status, _ = await h.request(recorder, "POST", "/api/queues/join", json={
+            "telegramId": telegram_id, "queueId": queue_id,
+            "labNumber": rnd.randint(1, 3), "position": rnd.randint(1, 31),
+        })
+        statuses[status] = statuses.get(status, 0) + 1
+
+    recorder.start()
+    await asyncio.gather(*(join(t) for t in telegram_ids))
+    recorder.stop()
+    recorder.extra["statuses"] = dict(sorted(statuses.items()))
+    _, body = await h.request(Recorder("check"), "GET", f"/api/queues/subject/{subject_id}")
+    recorder.extra["seated"] = len(json.loads(body)["entries"])
+    return recorder
+
+
+async def miniapp_viewers(h: Harness) -> Recorder:
+    """100 одночасних глядачів Mini App: розклад, предмети, домашки, черга"""
+    viewers, duration = h.n(100), max(2.0, 10.0 * min(h.scale, 1.0))
+    subject_id = await seed_subject(h, "Предмет для Mini App")
+    telegram_ids = await seed_users(viewers)
+    recorder = Recorder("miniapp_viewers")
+    paths = [
+        f"/api/schedule/view?groupId={h.group_id}",
+        f"/api/subjects?groupId={h.group_id}",
+        f"/api/homework?groupId={h.group_id}",
+        f"/api/queues/subject/{subject_id}",
+    ]
+
+    async def viewer(telegram_id: int, deadline: float):
+        rnd = random.Random(telegram_id)
+        while time.perf_counter() < deadline:
+            await h.request(recorder, "GET", rnd.choice(paths + [f"/api/users/{telegram_id}"]))
+            # Час, поки людина дивиться на екран
+            await asyncio.sleep(rnd.uniform(0.05, 0.3))
+
+    recorder.start()
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(viewer(t, deadline) for t in telegram_ids))
+    recorder.stop()
+    recorder.extra["viewers"] = viewers
+    return recorder
+
+
+async def scheduler_day(h: Harness) -> Recorder:
+    """Повний навчальний день планувальника з 07:00 до 23:00: кожна операція — один тік"""
+    from bot.utils.clock import clock
+    from bot.utils.scheduler import NotificationScheduler
+    from database.models import TenantsManager
+
+    await seed_members(h, h.n(200), reminder_share=0.3)
+    clock.simulate(SIMULATED_DAY.replace(hour=7))
+    scheduler = NotificationScheduler(h.bot)
+    await scheduler.reminders.start()
+    sent_before = len(h.telegram.sent)
+    recorder = Recorder("scheduler_day")
+    recorder.start()
+    try:
+        while clock.now().hour < 23:
+            for tenant in TenantsManager.all():
+                await recorder.measure(scheduler._run_tenant(tenant))
+            clock.advance(timedelta(minutes=1))
+        await scheduler.reminders.queue.join()
+    finally:
+        recorder.stop()
+        clock.reset()
+        await scheduler.reminders.stop()
+    recorder.extra["ticks"] = len(recorder.latencies)
+    recorder.extra["messagesSent"] = len(h.telegram.sent) - sent_before
+    recorder.extra["reminders"] = dict(scheduler.reminders.stats)
+    return recorder
+
+
+def _pair_start(day: date, pair: Dict[str, Any]) -> datetime:
+    return datetime.combine(day, datetime.strptime(pair["time"], "%H:%M:%S").time())
+
+
+def _expected_pairs(schedule: Dict[str, Any], day: date) -> List[Dict[str, Any]]:
+    """Пари дня, пораховані незалежно від ScheduleAPI.get_week_number"""
+    if day.weekday() == 6:
+        return []
+    first_week = (day - SEMESTER_START).days // 7 % 2 == 0
+    week = schedule["scheduleFirstWeek" if first_week else "scheduleSecondWeek"]
+    return week[day.weekday()]["pairs"]
+
+
+async def semester(h: Harness) -> Recorder:
+    """Осінній семестр на симульованому годиннику: сповіщення, GIF, дайджести, нагадування"""
+    from bot.utils.api import ScheduleAPI
+    from bot.utils.clock import clock
+    from bot.utils.reminders import RateLimiter
+    from bot.utils.scheduler import NotificationScheduler
+    from database.connection import db
+    from database.models import LinksManager, TenantsManager
+    from config import NOTIFICATION_MINUTES_BEFORE, HOMEWORK_REMINDER_HOUR, HOMEWORK_REMINDER_WINDOW_HOURS
+    from .fake_kpi import make_schedule
+
+    weeks = h.n(SEMESTER_WEEKS)
+    tenant = TenantsManager.get(h.group_id) or TenantsManager.default_tenant()
+    schedule = make_schedule(ScheduleAPI.kpi_group_for(h.group_id))
+
+    # Посилання на кожну пару, інакше сповіщення в групу не надсилається
+    pairs = {(p["name"], p["teacherName"], p["type"]) for key in ("scheduleFirstWeek", "scheduleSecondWeek")
+             for d in schedule[key] for p in d["pairs"]}
+    for i, (name, teacher, class_type) in enumerate(sorted(pairs)):
+        await LinksManager.add_link(name, teacher, class_type, f"https://meet.google.com/load-{i}", group_id=h.group_id)
+
+    members = await seed_members(h, h.n(50), reminder_share=0.1, reminder_lead=SEMESTER_REMINDER_LEAD)
+    subscribers = sum(1 for i in range(len(members)) if i < len(members) * 0.1)
+
+    # Щотижнева домашка з дедлайном у середу о 23:59 за київським часом
+    subject_id = await seed_subject(h, "Предмет з домашками")
+    deadlines = [
+        clock.localize(datetime.combine(SEMESTER_START + timedelta(weeks=w, days=2), dtime(23, 59)))
+        .astimezone(pytz.utc).replace(tzinfo=None)
+        for w in range(weeks + 1)
+    ]
+    await db.db.homework.delete_many({"groupId": h.group_id})
+    await db.db.homework.insert_many([
+        {"groupId": h.group_id, "subjectId": subject_id, "text": f"Домашка {i + 1}", "deadline": "",
+         "deadlineAt": deadline, "authorId": h.admin_id, "createdAt": datetime.utcnow()}
+        for i, deadline in enumerate(deadlines)
+    ])
+
+    scheduler = NotificationScheduler(h.bot, clock)
+    # Час у симуляції не йде, тож ні затримки Bot API, ні обмеження швидкості
+    scheduler.reminders.limiter = RateLimiter(1e9)
+    telegram_settings = (h.telegram.latency, h.telegram.rate_limit_ratio, h.telegram.max_per_second)
+    h.telegram.latency, h.telegram.rate_limit_ratio, h.telegram.max_per_second = 0, 0.0, None
+    await scheduler.reminders.start()
+
+    rnd = random.Random(2025)
+    notifications: List[Tuple[datetime, str]] = []
+    gifs: List[datetime] = []
+    digests: List[datetime] = []
+    reminders: List[Tuple[datetime, str]] = []
+    tomorrow: Dict[date, str] = {}
+    recorder = Recorder("semester")
+    recorder.start()
+    try:
+        for offset in range(weeks * 7):
+            day = SEMESTER_START + timedelta(days=offset)
+            if day.weekday() in (5, 6):
+                clock.simulate(datetime.combine(day, dtime(12)))
+                tomorrow[day] = await ScheduleAPI.get_tomorrow_schedule(h.group_id)
+            for minute in range(SEMESTER_FIRST_TICK * 60, SEMESTER_LAST_TICK * 60):
+                # Тік на початку хвилини з затримкою циклу; нульова затримка —
+                # межовий випадок, коли сусідні тіки рівно за 60 с
+                jitter = rnd.choice((0.0, rnd.uniform(0, 1.5)))
+                clock.simulate(datetime.combine(day, dtime()) + timedelta(minutes=minute, seconds=jitter))
+                tick = clock.now()
+                sent_before = len(h.telegram.sent)
+                await recorder.measure(scheduler._run_tenant(tenant))
+                await scheduler.reminders.queue.join()
+                for message in h.telegram.sent[sent_before:]:
+                    text = message["text"] or ""
+                    if message["chat_id"] != h.group_id:
+                        reminders.append((tick, text))
+                    elif message["method"] == "sendAnimation":
+                        gifs.append(tick)
+                    elif text.startswith("🔔"):
+                        notifications.append((tick, text))
+                    elif text.startswith("📝"):
+                        digests.append(tick)
+    finally:
+        recorder.stop()
+        clock.reset()
+        await scheduler.reminders.stop()
+        h.telegram.latency, h.telegram.rate_limit_ratio, h.telegram.max_per_second = telegram_settings
+
+    # Очікування, пораховані з розкладу фейкового API, а не кодом планувальника
+    lead = timedelta(minutes=NOTIFICATION_MINUTES_BEFORE)
+    expected_notifications: List[Tuple[datetime, Dict[str, Any]]] = []
+    expected_gifs: Dict[date, datetime] = {}
+    expected_digests = 0
+    for offset in range(weeks * 7):
+        day = SEMESTER_START + timedelta(days=offset)
+        day_pairs = _expected_pairs(schedule, day)
+        for pair in day_pairs:
+            expected_notifications.append((clock.localize(_pair_start(day, pair) - lead), pair))
+        if day_pairs:
+            last = max(_pair_start(day, p) for p in day_pairs)
+            expected_gifs[day] = clock.localize(last + timedelta(minutes=PAIR_MINUTES))
+        digest_at = clock.localize(datetime.combine(day, dtime(HOMEWORK_REMINDER_HOUR))).astimezone(pytz.utc).replace(tzinfo=None)
+        window_end = digest_at + timedelta(hours=HOMEWORK_REMINDER_WINDOW_HOURS)
+        # Тік о 18:00 має затримку до 1.5 с — дедлайн 23:59 від меж вікна далеко
+        if any(digest_at <= d <= window_end for d in deadlines):
+            expected_digests += 1
+
+    failures: List[str] = []
+
+    def check(condition: bool, message: str):
+        if not condition:
+            failures.append(message)
+
+    # Кожне повідомлення зіставляється з парою за текстом, дрейф — від моменту сповіщення
+    def sent_keys(sent: List[Tuple[datetime, str]], minutes_before: timedelta):
+        keys, drift = Counter(), []
+        for tick, text in sent:
+            time_match, name_match = PAIR_TIME_RE.search(text), PAIR_NAME_RE.search(text)
+            if not time_match or not name_match:
+                failures.append(f"нерозпізнане повідомлення: {text[:40]!r}")
+                continue
+            start = datetime.combine(tick.date(), datetime.strptime(time_match.group(1), "%H:%M:%S").time())
+            keys[(tick.date(), time_match.group(1), name_match.group(1))] += 1
+            drift.append((clock.localize(start - minutes_before) - tick).total_seconds())
+        return keys, drift
+
+    expected_keys = Counter((target.date(), pair["time"], pair["name"]) for target, pair in expected_notifications)
+
+    notification_keys, drift = sent_keys(notifications, lead)
+    for key in expected_keys.keys() | notification_keys.keys():
+        check(notification_keys[key] == expected_keys[key],
+              f"сповіщення {key[0]:%d.%m} {key[1]} {key[2]}: {notification_keys[key]} замість {expected_keys[key]}")
+    # Сповіщення йде на тіку протягом хвилини перед моментом «за 10 хвилин»
+    check(all(0 < d <= 60 for d in drift), f"дрейф сповіщень {min(drift, default=0)}..{max(drift, default=0)} с")
+
+    check(len(gifs) == len(expected_gifs), f"GIF {len(gifs)}, очікувалось {len(expected_gifs)}")
+    gif_drift = []
+    for tick in gifs:
+        end = expected_gifs.get(tick.date())
+        if end is None:
+            failures.append(f"GIF у день без пар {tick:%d.%m}")
+            continue
+        gif_drift.append((tick - end).total_seconds())
+    check(all(0 <= d < 60 for d in gif_drift), f"дрейф GIF {min(gif_drift, default=0)}..{max(gif_drift, default=0)} с")
+
+    check(len(digests) == expected_digests, f"дайджестів {len(digests)}, очікувалось {expected_digests}")
+    check(all(t.hour == HOMEWORK_REMINDER_HOUR for t in digests), "дайджест не о годині HOMEWORK_REMINDER_HOUR")
+
+    reminder_keys, reminder_drift = sent_keys(reminders, timedelta(minutes=SEMESTER_REMINDER_LEAD))
+    for key in expected_keys.keys() | reminder_keys.keys():
+        check(reminder_keys[key] == expected_keys[key] * subscribers,
+              f"нагадувань {key[0]:%d.%m} {key[1]} {key[2]}: {reminder_keys[key]} замість {expected_keys[key] * subscribers}")
+    # Кошик нагадувань забирається на першому тіку своєї хвилини
+    check(all(-60 < d <= 0 for d in reminder_drift), f"дрейф нагадувань {min(reminder_drift, default=0)}..{max(reminder_drift, default=0)} с")
+
+    for day, text in tomorrow.items():
+        monday = day + timedelta(days=7 - day.weekday())
+        names = [p["name"] for p in _expected_pairs(schedule, monday)]
+        positions = [text.find(name) for name in names]
+        check(text.count(" пара**") == len(names) and all(p >= 0 for p in positions) and positions == sorted(positions),
+              f"розклад на завтра {day:%d.%m} не відповідає понеділку {monday:%d.%m}")
+
+    recorder.extra.update({
+        "weeks": weeks,
+        "ticks": len(recorder.latencies),
+        "notifications": len(notifications),
+        "gifs": len(gifs),
+        "digests": len(digests),
+        "reminders": len(reminders),
+        "notificationDriftSec": [round(min(drift, default=0), 1), round(max(drift, default=0), 1)],
+        "gifDriftSec": [round(min(gif_drift, default=0), 1), round(max(gif_drift, default=0), 1)],
+        "reminderDriftSec": [round(min(reminder_drift, default=0), 1), round(max(reminder_drift, default=0), 1)],
+    })
+    for failure in failures:
+        recorder.error(failure)
+    return recorder
+
+
+Scenario = Callable[[Harness], Awaitable[Recorder]]
+
+SCENARIOS: Dict[str, Scenario] = {
+    "group_flood": group_flood,
+    "all_ping": all_ping,
+    "queue_storm": queue_storm,
+    "miniapp_viewers": miniapp_viewers,
+    "scheduler_day": scheduler_day,
+    "semester": semester,
+}
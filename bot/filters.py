@@ -1,6 +1,7 @@
 from aiogram.filters import BaseFilter
-from aiogram.types import Message, CallbackQuery
-from typing import Union
+from aiogram.types import Message, CallbackQuery, ChatMemberUpdated
+from typing import Union, Dict, Any
+from database.models import TenantsManager
 
 class AdminFilter(BaseFilter):
     """Фільтр для перевірки адміністраторських прав"""
@@ -12,4 +13,15 @@ class AdminFilter(BaseFilter):
             elif isinstance(obj, CallbackQuery):
                 await obj.answer("❌ Ця команда доступна тільки адміністратору.", show_alert=True)
             return False
-        return True
\ No newline at end of file
+        return True
+
+class TenantChatFilter(BaseFilter):
+    """Фільтр для групових чатів, які обслуговує бот (передає tenant у хендлер)"""
+    
+    async def __call__(self, obj: Union[Message, CallbackQuery, ChatMemberUpdated]) -> Union[bool, Dict[str, Any]]:
+        if isinstance(obj, CallbackQuery):
+            chat = obj.message.chat if obj.message else None
+        else:
+            chat = obj.chat
+        tenant = TenantsManager.get(chat.id) if chat else None
+        return {"tenant": tenant} if tenant else False
@@ -3,7 +3,7 @@ from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKe
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from database.models import LinksManager, GroupMembersManager, SettingsManager
+from database.models import LinksManager, GroupMembersManager, SettingsManager, TenantsManager
 from bot.keyboards.admin import (
     get_admin_keyboard, 
     get_link_type_keyboard, 
@@ -12,7 +12,7 @@ from bot.keyboards.admin import (
 )
 
 from bot.keyboards.user import get_main_keyboard
-from config import NOTIFICATION_MINUTES_BEFORE, TIMEZONE, GROUP_ID
+from config import NOTIFICATION_MINUTES_BEFORE, TIMEZONE, ADMIN_IDS
 import logging
 
 logger = logging.getLogger(__name__)
@@ -152,7 +152,7 @@ async def process_meet_link(message: Message, state: FSMContext):
     await state.set_state(AddLinkStates.waiting_for_classroom_link)
 
 @router.message(AddLinkStates.waiting_for_classroom_link)
-async def process_classroom_link(message: Message, state: FSMContext):
+async def process_classroom_link(message: Message, state: FSMContext, tenant: dict):
     """Обробка введення посилання на Google Classroom"""
     classroom_link = None
     
@@ -170,7 +170,8 @@ async def process_classroom_link(message: Message, state: FSMContext):
         teacher_name=data['teacher_name'],
         class_type=data['class_type'],
         meet_link=data['meet_link'],
-        classroom_link=classroom_link
+        classroom_link=classroom_link,
+        group_id=tenant["groupId"]
     )
     
     if success:
@@ -193,13 +194,13 @@ async def process_classroom_link(message: Message, state: FSMContext):
     await state.clear()
 
 @router.message(F.text == "📋 Всі посилання")
-async def show_all_links_admin(message: Message, is_admin: bool):
+async def show_all_links_admin(message: Message, is_admin: bool, tenant: dict):
     """Показати всі посилання (адмін версія)"""
     if not is_admin:
         await message.answer("❌ Ця команда доступна тільки адміністратору.")
         return
         
-    links = await LinksManager.get_all_links()
+    links = await LinksManager.get_all_links(tenant["groupId"])
     
     if not links:
         await message.answer("📭 Посилання ще не додано.")
@@ -226,13 +227,13 @@ async def show_all_links_admin(message: Message, is_admin: bool):
     await message.answer(response, parse_mode="Markdown", disable_web_page_preview=True)
 
 @router.message(F.text == "👥 Учасники групи")
-async def show_group_members(message: Message, is_admin: bool):
+async def show_group_members(message: Message, is_admin: bool, tenant: dict):
     """Показати учасників групи"""
     if not is_admin:
         await message.answer("❌ Ця команда доступна тільки адміністратору.")
         return
         
-    members = await GroupMembersManager.get_all_members()
+    members = await GroupMembersManager.get_all_members(tenant["groupId"])
     
     if not members:
         await message.answer("📭 Учасників групи не знайдено.")
@@ -256,13 +257,13 @@ async def show_group_members(message: Message, is_admin: bool):
     await message.answer(response, parse_mode="Markdown")
 
 @router.message(F.text == "🗑 Видалити посилання")
-async def start_delete_link(message: Message, state: FSMContext, is_admin: bool):
+async def start_delete_link(message: Message, state: FSMContext, is_admin: bool, tenant: dict):
     """Початок процесу видалення посилання"""
     if not is_admin:
         await message.answer("❌ Ця команда доступна тільки адміністратору.")
         return
         
-    links = await LinksManager.get_all_links()
+    links = await LinksManager.get_all_links(tenant["groupId"])
     
     if not links:
         await message.answer("📭 Посилання для видалення не знайдено.")
@@ -292,22 +293,28 @@ async def start_delete_link(message: Message, state: FSMContext, is_admin: bool)
         parse_mode="Markdown"
     )
     
-    await state.update_data(links=links)
+    # У стані лише _id: список займає кілька байтів і переживає перезапуск
+    await state.update_data(link_ids=[link["_id"] for link in links])
     await state.set_state(DeleteLinkStates.waiting_for_selection)
 
+async def _selected_link(state: FSMContext, link_index: int, group_id: int):
+    """Посилання, обране зі списку видалення (None, якщо вибір невірний або його вже видалено)"""
+    link_ids = (await state.get_data()).get('link_ids', [])
+    if not 0 <= link_index < len(link_ids):
+        return None
+    return await LinksManager.get_link_by_id(link_ids[link_index], group_id)
+
 @router.callback_query(F.data.startswith("delete_link_"), DeleteLinkStates.waiting_for_selection)
-async def confirm_delete_link(callback: CallbackQuery, state: FSMContext):
+async def confirm_delete_link(callback: CallbackQuery, state: FSMContext, tenant: dict):
     """Підтвердження видалення посилання"""
     try:
         link_index = int(callback.data.replace("delete_link_", ""))
-        data = await state.get_data()
-        links = data.get('links', [])
+        selected_link = await _selected_link(state, link_index, tenant["groupId"])
         
-        if link_index >= len(links):
+        if selected_link is None:
             await callback.answer("❌ Невірний вибір")
             return
         
-        selected_link = links[link_index]
         subject = selected_link.get('subject_name', '')
         teacher = selected_link.get('teacher_name', '')
         class_type = selected_link.get('class_type', '')
@@ -327,23 +334,21 @@ async def confirm_delete_link(callback: CallbackQuery, state: FSMContext):
         await callback.answer("❌ Помилка вибору")
 
 @router.callback_query(F.data.startswith("delete_confirm_"))
-async def delete_link_confirmed(callback: CallbackQuery, state: FSMContext):
+async def delete_link_confirmed(callback: CallbackQuery, state: FSMContext, tenant: dict):
     """Остаточне видалення посилання"""
     try:
         link_index = int(callback.data.replace("delete_confirm_", ""))
-        data = await state.get_data()
-        links = data.get('links', [])
+        selected_link = await _selected_link(state, link_index, tenant["groupId"])
         
-        if link_index >= len(links):
+        if selected_link is None:
             await callback.answer("❌ Невірний вибір")
             return
         
-        selected_link = links[link_index]
         subject = selected_link.get('subject_name', '')
         teacher = selected_link.get('teacher_name', '')
         class_type = selected_link.get('class_type', '')
         
-        success = await LinksManager.delete_link(subject, teacher, class_type)
+        success = await LinksManager.delete_link(subject, teacher, class_type, tenant["groupId"])
         
         if success:
             await callback.message.edit_text(
@@ -382,21 +387,22 @@ async def switch_to_user_mode(message: Message, is_admin: bool):
     )
 
 @router.message(F.text == "⚙️ Налаштування")
-async def show_settings(message: Message, is_admin: bool):
+async def show_settings(message: Message, is_admin: bool, tenant: dict):
     """Показати налаштування бота"""
     if not is_admin:
         await message.answer("❌ Ця команда доступна тільки адміністратору.")
         return
         
-    links_count = len(await LinksManager.get_all_links())
-    members_count = len(await GroupMembersManager.get_all_members())
+    links_count = len(await LinksManager.get_all_links(tenant["groupId"]))
+    members_count = len(await GroupMembersManager.get_all_members(tenant["groupId"]))
     
     settings_text = f"""
 ⚙️ **Налаштування бота:**
 
 🔔 **Сповіщення:** За {NOTIFICATION_MINUTES_BEFORE} хв до початку пари
 🕒 **Часова зона:** {TIMEZONE}
-👥 **ID групи:** `{GROUP_ID}`
+👥 **ID групи:** `{tenant['groupId']}`
+🎓 **Група КПІ:** `{tenant.get('kpiGroupId')}`
 🤖 **Версія:** 1.0
 
 📊 **Статистика:**
@@ -420,7 +426,7 @@ async def cancel_operation(callback: CallbackQuery, state: FSMContext):
 
 
 @router.message(Command("notifications"))
-async def toggle_notifications_command(message: Message, is_admin: bool):
+async def toggle_notifications_command(message: Message, is_admin: bool, tenant: dict):
     """Увімкнення/вимкнення автоматичних сповіщень про пари"""
     if not is_admin:
         await message.answer("❌ Ця команда доступна тільки адміністратору.")
@@ -438,17 +444,17 @@ async def toggle_notifications_command(message: Message, is_admin: bool):
             await message.answer("ℹ️ Використання: /notifications [on/off]")
             return
     else:
-        current_state = await SettingsManager.get_setting("notifications_enabled", True)
+        current_state = await SettingsManager.get_setting("notifications_enabled", True, tenant["groupId"])
         new_state = not current_state
 
-    await SettingsManager.set_setting("notifications_enabled", new_state)
+    await SettingsManager.set_setting("notifications_enabled", new_state, tenant["groupId"])
     
     status_text = "✅ **УВІМКНЕНО**" if new_state else "🔕 **ВИМКНЕНО**"
     await message.answer(f"Сповіщення про пари (за 10 хв) тепер: {status_text}", parse_mode="Markdown")
 
 
 @router.message(Command("mute_ping"))
-async def mute_ping_command(message: Message, is_admin: bool):
+async def mute_ping_command(message: Message, is_admin: bool, tenant: dict):
     """Додати виключення для пінгу (@all)"""
     if not is_admin:
         await message.answer("❌ Ця команда доступна тільки адміністратору.")
@@ -470,7 +476,7 @@ async def mute_ping_command(message: Message, is_admin: bool):
             return
         
         username = args[1].replace("@", "")
-        member_data = await GroupMembersManager.get_member_by_username(username)
+        member_data = await GroupMembersManager.get_member_by_username(username, tenant["groupId"])
         
         if not member_data:
             await message.answer(f"❌ Користувача @{username} не знайдено в базі даних бота.")
@@ -481,13 +487,13 @@ async def mute_ping_command(message: Message, is_admin: bool):
         target_user = User(id=member_data['user_id'], username=member_data['username'], first_name=member_data['first_name'])
 
     if target_user:
-        await GroupMembersManager.set_ping_status(target_user.id, False)
+        await GroupMembersManager.set_ping_status(target_user.id, False, tenant["groupId"])
         name = f"@{target_user.username}" if target_user.username else target_user.first_name
         await message.answer(f"🔕 Користувача {name} виключено зі списку для тегу `/all`.")
 
 
 @router.message(Command("unmute_ping"))
-async def unmute_ping_command(message: Message, is_admin: bool):
+async def unmute_ping_command(message: Message, is_admin: bool, tenant: dict):
     """Прибрати виключення для пінгу"""
     if not is_admin:
         await message.answer("❌ Тільки для адмінів.")
@@ -502,7 +508,7 @@ async def unmute_ping_command(message: Message, is_admin: bool):
             await message.answer("ℹ️ Використання: `/unmute_ping @username` або реплаєм.")
             return
         username = args[1].replace("@", "")
-        member_data = await GroupMembersManager.get_member_by_username(username)
+        member_data = await GroupMembersManager.get_member_by_username(username, tenant["groupId"])
         if not member_data:
             await message.answer("❌ Користувача не знайдено.")
             return
@@ -511,18 +517,18 @@ async def unmute_ping_command(message: Message, is_admin: bool):
         target_user = User(id=member_data['user_id'], username=member_data['username'], first_name=member_data['first_name'])
 
     if target_user:
-        await GroupMembersManager.set_ping_status(target_user.id, True)
+        await GroupMembersManager.set_ping_status(target_user.id, True, tenant["groupId"])
         name = f"@{target_user.username}" if target_user.username else target_user.first_name
         await message.answer(f"🔔 Користувача {name} повернуто до списку для тегу `/all`.")
 
 @router.message(Command("muted", "muted_list"))
-async def show_muted_list(message: Message, is_admin: bool):
+async def show_muted_list(message: Message, is_admin: bool, tenant: dict):
     """Показати список користувачів, виключених з пінгу"""
     if not is_admin:
         await message.answer("❌ Ця команда доступна тільки адміністратору.")
         return
 
-    muted_members = await GroupMembersManager.get_muted_members()
+    muted_members = await GroupMembersManager.get_muted_members(tenant["groupId"])
 
     if not muted_members:
         await message.answer("🔕 Список виключень порожній. Всі учасники отримують пінг.")
@@ -539,4 +545,63 @@ async def show_muted_list(message: Message, is_admin: bool):
         
         response += f"{i}. **{user_label}** (ID: `{user_id}`)\n"
 
-    await message.answer(response, parse_mode="Markdown")
\ No newline at end of file
+    await message.answer(response, parse_mode="Markdown")
+
+@router.message(Command("sync"))
+async def sync_schedule_command(message: Message, is_admin: bool, tenant: dict):
+    """Синхронізація предметів і посилань з розкладом КПІ"""
+    if not is_admin:
+        await message.answer("❌ Ця команда доступна тільки адміністратору.")
+        return
+
+    from bot.utils.schedule_sync import ScheduleSync
+    stats = await ScheduleSync.run(tenant["groupId"])
+
+    await message.answer(
+        "🔄 **Синхронізацію з розкладом завершено**\n\n"
+        f"• Пар у розкладі: {stats['triples']}\n"
+        f"• Нових заготовок посилань: {stats['links_created']}\n"
+        f"• Нових предметів: {stats['subjects_created']}\n"
+        f"• Псевдонімів назв: {stats['aliases']}",
+        parse_mode="Markdown"
+    )
+
+@router.message(Command("add_group"))
+async def add_group_command(message: Message):
+    """Підключення нової групи до бота (тільки для адмінів з .env)"""
+    if message.from_user.id not in ADMIN_IDS:
+        await message.answer("❌ Ця команда доступна тільки головному адміністратору.")
+        return
+
+    args = message.text.split()
+    if len(args) < 3:
+        await message.answer(
+            "ℹ️ Використання: `/add_group <chat_id> <kpi_group_id> [admin_id,admin_id]`",
+            parse_mode="Markdown"
+        )
+        return
+
+    try:
+        group_id = int(args[1])
+        admin_ids = [int(x) for x in args[3].split(",") if x] if len(args) > 3 else [message.from_user.id]
+    except ValueError:
+        await message.answer("❌ ID групи та адмінів мають бути числами.")
+        return
+
+    success = await TenantsManager.add_tenant(group_id, args[2], admin_ids)
+    if not success:
+        await message.answer("❌ Помилка при збереженні групи.")
+        return
+
+    from bot.utils.schedule_refresh import schedule_refresher
+    schedule_refresher.add(args[2], delay=0)
+
+    from bot.utils.schedule_sync import ScheduleSync
+    stats = await ScheduleSync.run(group_id)
+
+    await message.answer(
+        f"✅ Групу `{group_id}` підключено.\n"
+        f"• Пар у розкладі: {stats['triples']}\n"
+        f"• Нових заготовок посилань: {stats['links_created']}",
+        parse_mode="Markdown"
+    )
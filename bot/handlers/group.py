@@ -2,11 +2,10 @@ from aiogram import Router, F, Bot
 from aiogram.types import Message, ChatMemberUpdated, CallbackQuery
 from aiogram.filters import ChatMemberUpdatedFilter, KICKED, LEFT, MEMBER, ADMINISTRATOR, CREATOR, Command
 from aiogram.enums import ChatMemberStatus
-from database.models import GroupMembersManager, LinksManager
-from config import GROUP_ID, ADMIN_IDS, TIMEZONE
+from database.models import GroupMembersManager, LinksManager, TenantsManager
+from bot.filters import TenantChatFilter
+from bot.utils.clock import clock
 import logging
-from datetime import datetime
-import pytz
 import asyncio
 from aiogram.enums import ChatMemberStatus
 
@@ -17,34 +16,29 @@ def escape_md(text: str) -> str:
     if not text:
         return ""
     return text.replace("_", "\\_").replace("*", "\\*").replace("`", "\\`").replace("[", "\\[")
-@router.chat_member(ChatMemberUpdatedFilter(member_status_changed=KICKED | LEFT))
-async def on_user_leave(event: ChatMemberUpdated):
+@router.chat_member(ChatMemberUpdatedFilter(member_status_changed=KICKED | LEFT), TenantChatFilter())
+async def on_user_leave(event: ChatMemberUpdated, tenant: dict):
     """Коли користувач покидає групу"""
-    if event.chat.id != GROUP_ID:
-        return
-    
     user = event.new_chat_member.user
     
-    success = await GroupMembersManager.remove_member(user.id)
+    success = await GroupMembersManager.remove_member(user.id, tenant["groupId"])
     
     if success:
         logger.info(f"Користувач покинув групу: {user.username} ({user.id})")
     else:
         logger.warning(f"Не вдалося деактивувати користувача: {user.id}")
 
-@router.chat_member(ChatMemberUpdatedFilter(member_status_changed=MEMBER | ADMINISTRATOR | CREATOR))
-async def on_user_join(event: ChatMemberUpdated):
+@router.chat_member(ChatMemberUpdatedFilter(member_status_changed=MEMBER | ADMINISTRATOR | CREATOR), TenantChatFilter())
+async def on_user_join(event: ChatMemberUpdated, tenant: dict):
     """Коли користувач приєднується до групи"""
-    if event.chat.id != GROUP_ID:
-        return
-    
     user = event.new_chat_member.user
     
     success = await GroupMembersManager.add_member(
         user_id=user.id,
         username=user.username or '',
         first_name=user.first_name or '',
-        last_name=user.last_name
+        last_name=user.last_name,
+        group_id=tenant["groupId"]
     )
     
     if success:
@@ -52,7 +46,7 @@ async def on_user_join(event: ChatMemberUpdated):
     else:
         logger.warning(f"Не вдалося додати користувача до бази: {user.id}")
 
-@router.message(F.chat.id == GROUP_ID, Command("schedule", "розклад"))
+@router.message(TenantChatFilter(), Command("schedule", "розклад"))
 async def group_schedule_command(message: Message):
     """Обробка команд розкладу в групі з інлайн кнопками"""
     from bot.keyboards.user import get_schedule_inline_keyboard
@@ -62,10 +56,10 @@ async def group_schedule_command(message: Message):
         reply_markup=get_schedule_inline_keyboard()
     )
 
-@router.message(F.chat.id == GROUP_ID, Command("links", "посилання"))
-async def group_links_command(message: Message):
+@router.message(TenantChatFilter(), Command("links", "посилання"))
+async def group_links_command(message: Message, tenant: dict):
     """Команда отримання посилань у групі (працює з /links та /посилання)"""
-    links = await LinksManager.get_all_links()
+    links = await LinksManager.get_all_links(tenant["groupId"])
     
     if not links:
         await message.reply("📭 Посилання на пари ще не додано.")
@@ -91,7 +85,7 @@ async def group_links_command(message: Message):
     
     await message.reply(response, parse_mode="Markdown", disable_web_page_preview=True)
 
-@router.message(F.chat.id == GROUP_ID, Command("help", "допомога"))
+@router.message(TenantChatFilter(), Command("help", "допомога"))
 async def group_help_command(message: Message):
     """Команда допомоги в групі (працює з /help та /допомога)"""
     help_text = """
@@ -120,33 +114,32 @@ async def group_help_command(message: Message):
     
     await message.reply(help_text)
 
-@router.message(F.chat.id == GROUP_ID, Command("now"))
-async def group_now_command(message: Message):
+@router.message(TenantChatFilter(), Command("now"))
+async def group_now_command(message: Message, tenant: dict):
     """Обробка команди /now в групі"""
     from bot.utils.api import ScheduleAPI
-    current_class = await ScheduleAPI.get_current_class_info()
+    current_class = await ScheduleAPI.get_current_class_info(tenant["groupId"])
     
     if not current_class:
         await message.reply("😌 Зараз пари немає.")
         return
         
-    class_info = await ScheduleAPI.format_class_info(current_class)
+    class_info = await ScheduleAPI.format_class_info(current_class, tenant["groupId"])
     response = "🔔 **Зараз йде пара:**\n\n" + class_info
     
     await message.reply(response, parse_mode="Markdown", disable_web_page_preview=True)
 
-@router.message(F.chat.id == GROUP_ID, Command("left"))
-async def group_left_command(message: Message):
+@router.message(TenantChatFilter(), Command("left"))
+async def group_left_command(message: Message, tenant: dict):
     """Обробка команди /left в групі"""
     from bot.utils.api import ScheduleAPI
-    current_class = await ScheduleAPI.get_current_class_info()
+    current_class = await ScheduleAPI.get_current_class_info(tenant["groupId"])
     
     if not current_class or 'end_datetime' not in current_class:
         await message.reply("😌 Зараз пари немає, тому й закінчуватись нічому.")
         return
         
-    kiev_tz = pytz.timezone(TIMEZONE)
-    now = datetime.now(kiev_tz)
+    now = clock.now()
     end_datetime = current_class['end_datetime']
     
     time_left = end_datetime - now
@@ -164,23 +157,23 @@ async def group_left_command(message: Message):
         f"⏳ До кінця пари **{subject_name}** залишилось: **{minutes_left} хв {seconds_left} с**"
     )
 
-@router.message(F.chat.id == GROUP_ID, Command("next"))
-async def group_next_command(message: Message):
+@router.message(TenantChatFilter(), Command("next"))
+async def group_next_command(message: Message, tenant: dict):
     """Обробка команди /next (розклад на завтра) в групі"""
     from bot.utils.api import ScheduleAPI
-    schedule = await ScheduleAPI.get_tomorrow_schedule()
+    schedule = await ScheduleAPI.get_tomorrow_schedule(tenant["groupId"])
     await message.reply(schedule, parse_mode="Markdown", disable_web_page_preview=True)
 
-@router.message(F.chat.id == GROUP_ID, Command("week"))
-async def group_week_command(message: Message):
+@router.message(TenantChatFilter(), Command("week"))
+async def group_week_command(message: Message, tenant: dict):
     """Обробка команди /week (розклад на наступний тиждень) в групі"""
     from bot.utils.api import ScheduleAPI
-    schedule = await ScheduleAPI.get_week_schedule(1) 
+    schedule = await ScheduleAPI.get_week_schedule(1, tenant["groupId"])
     await message.reply(schedule, parse_mode="Markdown", disable_web_page_preview=True)
 
 
-@router.message(F.chat.id == GROUP_ID, Command("all", "tagall", "everyone"))
-async def tag_all_command(message: Message, bot: Bot):
+@router.message(TenantChatFilter(), Command("all", "tagall", "everyone"))
+async def tag_all_command(message: Message, bot: Bot, tenant: dict):
     try:
         member = await bot.get_chat_member(chat_id=message.chat.id, user_id=message.from_user.id)
         if member.status not in [ChatMemberStatus.CREATOR, ChatMemberStatus.ADMINISTRATOR]:
@@ -191,7 +184,7 @@ async def tag_all_command(message: Message, bot: Bot):
         await message.reply("❌ Не вдалося перевірити ваші права.")
         return
 
-    members = await GroupMembersManager.get_all_members()
+    members = await GroupMembersManager.get_all_members(tenant["groupId"])
     if not members:
         logger.warning(f"Адмін {message.from_user.id} спробував пінганути, але база учасників порожня.")
         return
@@ -233,42 +226,43 @@ async def tag_all_command(message: Message, bot: Bot):
 
 
 
-@router.message(F.chat.id == GROUP_ID, F.text.lower().in_(["@all", "@всі"]))
-async def tag_all_text(message: Message, bot: Bot):
+@router.message(TenantChatFilter(), F.text.lower().in_(["@all", "@всі"]))
+async def tag_all_text(message: Message, bot: Bot, tenant: dict):
     """Обробка текстових команд для пінгу"""
-    await tag_all_command(message, bot)
+    await tag_all_command(message, bot, tenant)
 
-@router.message(F.chat.id == GROUP_ID, F.text.lower().in_(["посилання", "ссылки", "links"]))
-async def group_links_text(message: Message):
+@router.message(TenantChatFilter(), F.text.lower().in_(["посилання", "ссылки", "links"]))
+async def group_links_text(message: Message, tenant: dict):
     """Обробка текстових команд для посилань"""
-    await group_links_command(message)
+    await group_links_command(message, tenant)
 
-@router.message(F.chat.id == GROUP_ID, F.text.lower().in_(["розклад", "расписание", "schedule"]))
+@router.message(TenantChatFilter(), F.text.lower().in_(["розклад", "расписание", "schedule"]))
 async def group_schedule_text(message: Message):
     """Обробка текстових команд для розкладу"""
     await group_schedule_command(message)
 
-@router.message(F.chat.id == GROUP_ID, F.text.lower().in_(["допомога", "помощь", "help"]))
+@router.message(TenantChatFilter(), F.text.lower().in_(["допомога", "помощь", "help"]))
 async def group_help_text(message: Message):
     """Обробка текстових команд для допомоги"""
     await group_help_command(message)
 
-@router.callback_query(F.data.startswith("schedule_"), F.message.chat.id == GROUP_ID)
-async def process_group_schedule_callback(callback: CallbackQuery):
+@router.callback_query(F.data.startswith("schedule_"), TenantChatFilter())
+async def process_group_schedule_callback(callback: CallbackQuery, tenant: dict):
     """Обробка інлайн кнопок розкладу в групі"""
     from bot.utils.api import ScheduleAPI
     from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
     
     action = callback.data.replace("schedule_", "")
+    group_id = tenant["groupId"]
     
     if action == "today":
-        schedule = await ScheduleAPI.get_today_schedule()
+        schedule = await ScheduleAPI.get_today_schedule(group_id)
     elif action == "tomorrow":
-        schedule = await ScheduleAPI.get_tomorrow_schedule()
+        schedule = await ScheduleAPI.get_tomorrow_schedule(group_id)
     elif action == "current_week":
-        schedule = await ScheduleAPI.get_week_schedule(0)
+        schedule = await ScheduleAPI.get_week_schedule(0, group_id)
     elif action == "next_week":
-        schedule = await ScheduleAPI.get_week_schedule(1)
+        schedule = await ScheduleAPI.get_week_schedule(1, group_id)
     elif action == "back":
         from bot.keyboards.user import get_schedule_inline_keyboard
         await callback.message.edit_text(
@@ -288,61 +282,53 @@ async def process_group_schedule_callback(callback: CallbackQuery):
     await callback.message.edit_text(schedule, reply_markup=back_keyboard)
     await callback.answer()
 
-@router.message(F.chat.id == GROUP_ID, F.text.contains("сьогодні"))
-async def group_today_schedule(message: Message):
+@router.message(TenantChatFilter(), F.text.contains("сьогодні"))
+async def group_today_schedule(message: Message, tenant: dict):
     """Розклад на сьогодні через текст"""
     if any(word in message.text.lower() for word in ['/schedule', '/розклад', 'розклад']):
         from bot.utils.api import ScheduleAPI
-        schedule = await ScheduleAPI.get_today_schedule()
+        schedule = await ScheduleAPI.get_today_schedule(tenant["groupId"])
         await message.reply(schedule)
 
-@router.message(F.chat.id == GROUP_ID, F.text.contains("завтра"))
-async def group_tomorrow_schedule(message: Message):
+@router.message(TenantChatFilter(), F.text.contains("завтра"))
+async def group_tomorrow_schedule(message: Message, tenant: dict):
     """Розклад на завтра через текст"""
     if any(word in message.text.lower() for word in ['/schedule', '/розклад', 'розклад']):
         from bot.utils.api import ScheduleAPI
-        schedule = await ScheduleAPI.get_tomorrow_schedule()
+        schedule = await ScheduleAPI.get_tomorrow_schedule(tenant["groupId"])
         await message.reply(schedule)
 
-@router.message(F.chat.id == GROUP_ID, F.text.contains("тиждень"))
-async def group_week_schedule(message: Message):
+@router.message(TenantChatFilter(), F.text.contains("тиждень"))
+async def group_week_schedule(message: Message, tenant: dict):
     """Розклад на тиждень через текст"""
     if any(word in message.text.lower() for word in ['/schedule', '/розклад', 'розклад']):
         from bot.utils.api import ScheduleAPI
         if "наступ" in message.text.lower() or "next" in message.text.lower():
-            schedule = await ScheduleAPI.get_week_schedule(1)
+            schedule = await ScheduleAPI.get_week_schedule(1, tenant["groupId"])
         else:
-            schedule = await ScheduleAPI.get_week_schedule(0)
+            schedule = await ScheduleAPI.get_week_schedule(0, tenant["groupId"])
         await message.reply(schedule)
 
-@router.message(F.chat.id == GROUP_ID)
-async def handle_group_messages(message: Message):
+@router.message(TenantChatFilter())
+async def handle_group_messages(message: Message, tenant: dict):
     """Обробка повідомлень у групі"""
     user = message.from_user
+    group_id = tenant["groupId"]
     
     if not user:
         return
     
-    if user.id in ADMIN_IDS:
-        is_member = await GroupMembersManager.is_member(user.id)
-        if not is_member:
-            await GroupMembersManager.add_member(
-                user_id=user.id,
-                username=user.username or '',
-                first_name=user.first_name or '',
-                last_name=user.last_name
-            )
-        return
-    
-    is_member = await GroupMembersManager.is_member(user.id)
+    is_member = await GroupMembersManager.is_member(user.id, group_id)
     
-    if not is_member:
-        await GroupMembersManager.add_member(
-            user_id=user.id,
-            username=user.username or '',
-            first_name=user.first_name or '',
-            last_name=user.last_name
-        )
+    # Кожне повідомлення оновлює профіль і last_seen_at; запис у БД відкладений і пакетний
+    await GroupMembersManager.add_member(
+        user_id=user.id,
+        username=user.username or '',
+        first_name=user.first_name or '',
+        last_name=user.last_name,
+        group_id=group_id
+    )
+    if not is_member and not TenantsManager.is_admin(user.id, group_id):
         logger.info(f"Додано учасника з групового повідомлення: {user.username} ({user.id})")
 
 @router.message(Command("test"))
@@ -350,7 +336,8 @@ async def test_command(message: Message):
     """
     Тестова команда для перевірки роботи бота.
     """
-    is_correct_group = (message.chat.id == GROUP_ID)
+    tenant = TenantsManager.get(message.chat.id)
+    is_correct_group = tenant is not None
     status_icon = "✅" if is_correct_group else "⚠️"
     
     safe_name = escape_md(message.from_user.full_name)
@@ -359,6 +346,6 @@ async def test_command(message: Message):
         f"🤖 **Бот на зв'язку!**\n\n"
         f"👤 Ти: {safe_name}\n"
         f"🆔 ID цього чату: `{message.chat.id}`\n"
-        f"⚙️ Налаштований GROUP_ID: `{GROUP_ID}`\n"
+        f"⚙️ Група підключена до бота: {'так' if tenant else 'ні'}\n"
         f"{status_icon} Співпадіння: {is_correct_group}"
     )
\ No newline at end of file
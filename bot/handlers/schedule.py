@@ -3,15 +3,16 @@ from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKe
 from aiogram.filters import Command
 from bot.utils.api import ScheduleAPI
 from bot.keyboards.user import get_schedule_inline_keyboard, get_main_keyboard
-from database.models import LinksManager
-from config import GROUP_ID
-from database.models import LinksManager, SettingsManager
+from bot.filters import TenantChatFilter
+from database.models import LinksManager, SettingsManager, TenantsManager, GroupMembersManager, UsersManager
+from bot.utils.reminders import invalidate_reminders
+from config import REMINDER_MAX_LEADS, REMINDER_MAX_LEAD_MINUTES
 router = Router()
 
 @router.message(Command("start"))
 async def cmd_start(message: Message, is_admin: bool):
     """Обробка команди /start (тільки в приватних повідомленнях)"""
-    if message.chat.id == GROUP_ID:
+    if TenantsManager.get(message.chat.id):
         return
         
     welcome_text = "👋 Привіт! Я бот-помічник для твоєї групи.\n\n"
@@ -28,7 +29,7 @@ async def cmd_start(message: Message, is_admin: bool):
     
     await message.answer(welcome_text, reply_markup=get_main_keyboard())
 
-@router.message(Command("help"), ~F.chat.id.in_({GROUP_ID}))
+@router.message(Command("help"), ~TenantChatFilter())
 async def cmd_help(message: Message):
     """Обробка команди /help в приватних повідомленнях"""
     help_text = """
@@ -47,39 +48,42 @@ async def cmd_help(message: Message):
 ⏰ **Автоматичні повідомлення:**
 Бот надсилає в групу посилання на зустрічі за 10 хвилин до початку кожної пари.
 
+👥 **Кілька груп:**
+• /group - обрати групу, з якою працює бот в особистих повідомленнях
+
 ❓ Якщо виникли питання, зверніться до адміністратора групи.
     """
     
     await message.answer(help_text)
 
-@router.message(F.text == "📅 Розклад на сьогодні", ~F.chat.id.in_({GROUP_ID}))
-async def get_today_schedule(message: Message):
+@router.message(F.text == "📅 Розклад на сьогодні", ~TenantChatFilter())
+async def get_today_schedule(message: Message, tenant: dict):
     """Розклад на сьогодні (тільки приватні повідомлення)"""
-    schedule = await ScheduleAPI.get_today_schedule()
+    schedule = await ScheduleAPI.get_today_schedule(tenant["groupId"])
     await message.answer(schedule)
 
-@router.message(F.text == "📅 Розклад на завтра", ~F.chat.id.in_({GROUP_ID}))  
-async def get_tomorrow_schedule(message: Message):
+@router.message(F.text == "📅 Розклад на завтра", ~TenantChatFilter())  
+async def get_tomorrow_schedule(message: Message, tenant: dict):
     """Розклад на завтра (тільки приватні повідомлення)"""
-    schedule = await ScheduleAPI.get_tomorrow_schedule()
+    schedule = await ScheduleAPI.get_tomorrow_schedule(tenant["groupId"])
     await message.answer(schedule)
 
-@router.message(F.text == "📄 Поточний тиждень", ~F.chat.id.in_({GROUP_ID}))
-async def get_current_week_schedule(message: Message):
+@router.message(F.text == "📄 Поточний тиждень", ~TenantChatFilter())
+async def get_current_week_schedule(message: Message, tenant: dict):
     """Розклад на поточний тиждень (тільки приватні повідомлення)"""
-    schedule = await ScheduleAPI.get_week_schedule(0)
+    schedule = await ScheduleAPI.get_week_schedule(0, tenant["groupId"])
     await message.answer(schedule)
 
-@router.message(F.text == "📄 Наступний тиждень", ~F.chat.id.in_({GROUP_ID}))
-async def get_next_week_schedule(message: Message):
+@router.message(F.text == "📄 Наступний тиждень", ~TenantChatFilter())
+async def get_next_week_schedule(message: Message, tenant: dict):
     """Розклад на наступний тиждень (тільки приватні повідомлення)"""
-    schedule = await ScheduleAPI.get_week_schedule(1)
+    schedule = await ScheduleAPI.get_week_schedule(1, tenant["groupId"])
     await message.answer(schedule)
 
-@router.message(F.text == "🔗 Посилання на пари", ~F.chat.id.in_({GROUP_ID}))
-async def get_all_links(message: Message):
+@router.message(F.text == "🔗 Посилання на пари", ~TenantChatFilter())
+async def get_all_links(message: Message, tenant: dict):
     """Отримання всіх посилань на пари (тільки приватні повідомлення)"""
-    links = await LinksManager.get_all_links()
+    links = await LinksManager.get_all_links(tenant["groupId"])
     
     if not links:
         await message.answer("📭 Посилання на пари ще не додано.")
@@ -105,19 +109,19 @@ async def get_all_links(message: Message):
     
     await message.answer(response, parse_mode="Markdown", disable_web_page_preview=True)
 
-@router.callback_query(F.data.startswith("schedule_"), ~F.message.chat.id.in_({GROUP_ID}))
-async def process_schedule_callback(callback: CallbackQuery):
+@router.callback_query(F.data.startswith("schedule_"), ~TenantChatFilter())
+async def process_schedule_callback(callback: CallbackQuery, tenant: dict):
     """Обробка інлайн кнопок розкладу в приватних повідомленнях"""
     action = callback.data.replace("schedule_", "")
     
     if action == "today":
-        schedule = await ScheduleAPI.get_today_schedule()
+        schedule = await ScheduleAPI.get_today_schedule(tenant["groupId"])
     elif action == "tomorrow":
-        schedule = await ScheduleAPI.get_tomorrow_schedule()
+        schedule = await ScheduleAPI.get_tomorrow_schedule(tenant["groupId"])
     elif action == "current_week":
-        schedule = await ScheduleAPI.get_week_schedule(0)
+        schedule = await ScheduleAPI.get_week_schedule(0, tenant["groupId"])
     elif action == "next_week":
-        schedule = await ScheduleAPI.get_week_schedule(1)
+        schedule = await ScheduleAPI.get_week_schedule(1, tenant["groupId"])
     elif action == "back":
         await callback.message.edit_text(
             "📅 Оберіть розклад:",
@@ -136,10 +140,86 @@ async def process_schedule_callback(callback: CallbackQuery):
     await callback.message.edit_text(schedule, reply_markup=back_keyboard)
     await callback.answer()
 
-@router.message(Command("schedule"), ~F.chat.id.in_({GROUP_ID}))
+@router.message(Command("schedule"), ~TenantChatFilter())
 async def cmd_schedule(message: Message):
     """Команда /schedule з інлайн кнопками в приватних повідомленнях"""
     await message.answer(
         "📅 Оберіть розклад:",
         reply_markup=get_schedule_inline_keyboard()
-    )
\ No newline at end of file
+    )
+
+@router.message(Command("remind"), ~TenantChatFilter())
+async def cmd_remind(message: Message, tenant: dict):
+    """Особисті нагадування про пари: /remind 10 30, /remind off"""
+    group_id = tenant["groupId"]
+    args = message.text.split()[1:]
+
+    if not args:
+        member = await GroupMembersManager.get_member_by_id(message.from_user.id, group_id)
+        leads = (member or {}).get("reminder_leads") or []
+        current = ", ".join(f"{m} хв" for m in leads) if leads else "вимкнено"
+        await message.answer(
+            f"🔔 Особисті нагадування: {current}\n\n"
+            f"Використання: `/remind 10 30` — за 10 і 30 хв до пари (до {REMINDER_MAX_LEADS} значень), "
+            "`/remind off` — вимкнути.",
+            parse_mode="Markdown"
+        )
+        return
+
+    if args[0].lower() in ('off', 'вимк', '0'):
+        leads = []
+    else:
+        try:
+            leads = sorted({int(a) for a in args}, reverse=True)
+        except ValueError:
+            await message.answer("❌ Вкажіть кількість хвилин числами, наприклад `/remind 10 30`", parse_mode="Markdown")
+            return
+        if len(leads) > REMINDER_MAX_LEADS or any(not 1 <= m <= REMINDER_MAX_LEAD_MINUTES for m in leads):
+            await message.answer(f"❌ До {REMINDER_MAX_LEADS} значень від 1 до {REMINDER_MAX_LEAD_MINUTES} хв.")
+            return
+
+    if not await GroupMembersManager.set_reminder_leads(message.from_user.id, leads, group_id):
+        await message.answer("❌ Вас не знайдено серед учасників групи. Напишіть будь-що в групі та спробуйте ще раз.")
+        return
+    invalidate_reminders(group_id)
+
+    if leads:
+        await message.answer("✅ Нагадування увімкнено: " + ", ".join(f"за {m} хв" for m in leads))
+    else:
+        await message.answer("🔕 Особисті нагадування вимкнено.")
+
+def _group_title(group_id: int) -> str:
+    tenant = TenantsManager.get(group_id) or {}
+    return tenant.get("title") or str(group_id)
+
+@router.message(Command("group"), ~TenantChatFilter())
+async def cmd_group(message: Message, tenant: dict, tenant_groups: list = ()):
+    """Вибір групи, від імені якої бот працює в особистих повідомленнях"""
+    current = tenant["groupId"]
+    if len(tenant_groups) < 2:
+        await message.answer(f"👥 Ваша група: {_group_title(current)}")
+        return
+
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(
+            text=("✅ " if g == current else "") + _group_title(g),
+            callback_data=f"group_select:{g}"
+        )]
+        for g in tenant_groups
+    ])
+    await message.answer(f"👥 Поточна група: {_group_title(current)}\nОберіть іншу:", reply_markup=keyboard)
+
+@router.callback_query(F.data.startswith("group_select:"), ~TenantChatFilter())
+async def process_group_select(callback: CallbackQuery, tenant_groups: list = ()):
+    try:
+        group_id = int(callback.data.split(":", 1)[1])
+    except ValueError:
+        await callback.answer("❌ Невідома група")
+        return
+    if group_id not in tenant_groups:
+        await callback.answer("❌ Ви не належите до цієї групи", show_alert=True)
+        return
+
+    await UsersManager.set_active_group(callback.from_user.id, group_id)
+    await callback.message.edit_text(f"✅ Тепер бот працює з групою: {_group_title(group_id)}")
+    await callback.answer()
@@ -1,18 +1,18 @@
 from aiogram import Router, F
 from aiogram.types import Message, WebAppInfo, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.filters import Command
-from config import WEBAPP_URL
+from bot.keyboards.user import webapp_url
 
 router = Router()
 
 @router.message(Command("app", "webapp"))
-async def cmd_webapp(message: Message):
+async def cmd_webapp(message: Message, tenant: dict):
     
     if message.chat.type == 'private':
         keyboard = InlineKeyboardMarkup(inline_keyboard=[
             [InlineKeyboardButton(
                 text="📱 Відкрити додаток",
-                web_app=WebAppInfo(url=WEBAPP_URL)
+                web_app=WebAppInfo(url=webapp_url(tenant["groupId"]))
             )]
         ])
     else:
@@ -33,11 +33,11 @@ async def cmd_webapp(message: Message):
     )
 
 @router.message(Command("queues"))
-async def cmd_queues(message: Message):
+async def cmd_queues(message: Message, tenant: dict):
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(
             text="👥 Відкрити черги",
-            web_app=WebAppInfo(url=f"{WEBAPP_URL}?tab=queues")
+            web_app=WebAppInfo(url=webapp_url(tenant["groupId"], "queues"))
         )]
     ])
     
@@ -47,11 +47,11 @@ async def cmd_queues(message: Message):
     )
 
 @router.message(Command("topics"))
-async def cmd_topics(message: Message):
+async def cmd_topics(message: Message, tenant: dict):
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(
             text="📚 Відкрити теми",
-            web_app=WebAppInfo(url=f"{WEBAPP_URL}?tab=topics")
+            web_app=WebAppInfo(url=webapp_url(tenant["groupId"], "topics"))
         )]
     ])
     
@@ -61,11 +61,11 @@ async def cmd_topics(message: Message):
     )
 
 @router.message(Command("hw", "homework"))
-async def cmd_homework(message: Message):
+async def cmd_homework(message: Message, tenant: dict):
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(
             text="📝 Відкрити домашку",
-            web_app=WebAppInfo(url=f"{WEBAPP_URL}?tab=homework")
+            web_app=WebAppInfo(url=webapp_url(tenant["groupId"], "homework"))
         )]
     ])
     
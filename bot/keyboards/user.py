@@ -1,6 +1,15 @@
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton, WebAppInfo
+from urllib.parse import urlencode
+from typing import Optional
 from config import WEBAPP_URL
 
+def webapp_url(group_id: int, tab: Optional[str] = None) -> str:
+    """Адреса Mini App для групи: groupId передається в кожен запит до API"""
+    params = {"groupId": group_id}
+    if tab:
+        params["tab"] = tab
+    return f"{WEBAPP_URL}?{urlencode(params)}"
+
 def get_main_keyboard() -> ReplyKeyboardMarkup:
     """Головна клавіатура для користувачів"""
     keyboard = [
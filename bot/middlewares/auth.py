@@ -1,15 +1,19 @@
 from typing import Callable, Dict, Any, Awaitable
 from aiogram import BaseMiddleware
 from aiogram.types import Message, CallbackQuery
-from database.models import GroupMembersManager
-from config import ADMIN_IDS, GROUP_ID
+from database.models import GroupMembersManager, TenantsManager, UsersManager
 import logging
 
 logger = logging.getLogger(__name__)
 
 class AuthMiddleware(BaseMiddleware):
-    """Middleware для перевірки доступу до бота"""
-    
+    """Middleware для перевірки доступу до бота.
+
+    Визначає групу (тенанта), від імені якої працюють хендлери, і передає її як data['tenant']:
+    у груповому чаті — сам чат, в особистих — обрана користувачем група (/group),
+    а без вибору — перша, де він адмін або учасник. Усі доступні групи — data['tenant_groups'].
+    """
+
     async def __call__(
         self,
         handler: Callable[[Message, Dict[str, Any]], Awaitable[Any]],
@@ -17,48 +21,52 @@ class AuthMiddleware(BaseMiddleware):
         data: Dict[str, Any]
     ) -> Any:
         user = event.from_user
-        
+
         if not user:
             return
-        
-        is_group_message = False
+
+        chat_id = None
         if hasattr(event, 'chat'):
-            is_group_message = event.chat.id == GROUP_ID
+            chat_id = event.chat.id
         elif hasattr(event, 'message') and hasattr(event.message, 'chat'):
-            is_group_message = event.message.chat.id == GROUP_ID
-        
-        if is_group_message:
-            if user.id in ADMIN_IDS:
+            chat_id = event.message.chat.id
+
+        tenant = TenantsManager.get(chat_id) if chat_id is not None else None
+
+        if tenant:
+            group_id = tenant["groupId"]
+            data['tenant'] = tenant
+            if TenantsManager.is_admin(user.id, group_id):
                 data['is_admin'] = True
                 data['is_group_member'] = True
             else:
                 data['is_admin'] = False
                 data['is_group_member'] = True
-                
+
                 try:
-                    is_member = await GroupMembersManager.is_member(user.id)
+                    is_member = await GroupMembersManager.is_member(user.id, group_id)
                     if not is_member:
                         await GroupMembersManager.add_member(
                             user_id=user.id,
                             username=user.username or '',
                             first_name=user.first_name or '',
-                            last_name=user.last_name
+                            last_name=user.last_name,
+                            group_id=group_id
                         )
                         logger.info(f"Додано нового учасника з групи: {user.username} ({user.id})")
                 except Exception as e:
                     logger.error(f"Помилка додавання учасника: {e}")
                     pass
-            
-            return await handler(event, data)
-        
-        if user.id in ADMIN_IDS:
-            data['is_admin'] = True
-            data['is_group_member'] = True
+
             return await handler(event, data)
-        
-        is_member = await GroupMembersManager.is_member(user.id)
-        
-        if not is_member:
+
+        # Особисті повідомлення: група, яку користувач обрав через /group,
+        # інакше перша, де він адмін, інакше перша, де він учасник
+        admin_groups = TenantsManager.admin_groups(user.id)
+        member_groups = await GroupMembersManager.get_member_groups(user.id)
+        groups = [g for g in dict.fromkeys(admin_groups + member_groups) if TenantsManager.get(g)]
+
+        if not groups:
             if isinstance(event, Message):
                 await event.answer(
                     "❌ У вас немає доступу до цього бота.\n"
@@ -68,8 +76,12 @@ class AuthMiddleware(BaseMiddleware):
             elif isinstance(event, CallbackQuery):
                 await event.answer("❌ У вас немає доступу до цього бота.", show_alert=True)
             return
-        
-        data['is_admin'] = False
-        data['is_group_member'] = is_member
-        
-        return await handler(event, data)
\ No newline at end of file
+
+        active = await UsersManager.get_active_group(user.id)
+        group_id = active if active in groups else groups[0]
+        data['tenant'] = TenantsManager.get(group_id)
+        data['tenant_groups'] = groups
+        data['is_admin'] = TenantsManager.is_admin(user.id, group_id)
+        data['is_group_member'] = True
+
+        return await handler(event, data)
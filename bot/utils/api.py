@@ -1,8 +1,12 @@
+import asyncio
 import aiohttp
 import json
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
-from config import KPI_API_URL, DAYS_TRANSLATION, CLASS_TYPES, TIMEZONE
+from config import KPI_API_BASE, KPI_GROUP_ID, GROUP_ID, DAYS_TRANSLATION, CLASS_TYPES, TIMEZONE, SCHEDULE_CACHE_TTL
+from database.models import LinksManager, TenantsManager
+from bot.utils.clock import clock
 import pytz
 import logging
 
@@ -28,6 +32,16 @@ def get_class_end_time(start_time: str) -> Optional[str]:
 class ScheduleAPI:
     """Клас для роботи з API розкладу КПІ"""
     
+    # Кеш розкладів по KPI groupId: кілька груп з одним розкладом ділять один запис
+    _cache: Dict[str, Dict[str, Any]] = {}
+    _cache_time: Dict[str, float] = {}
+    _inflight: Dict[str, "asyncio.Task"] = {}
+    # Версія знімка розкладу: зростає лише коли KPI віддав інші дані
+    _version: Dict[str, int] = {}
+    # TTL кешу для окремих розкладів (їх оновлює ScheduleRefresher у фоні)
+    _ttl: Dict[str, float] = {}
+    _session: Optional[aiohttp.ClientSession] = None
+    
     @staticmethod
     def get_week_number(date: datetime) -> int:
         if date.tzinfo is not None:
@@ -41,35 +55,87 @@ class ScheduleAPI:
         return (weeks_diff % 2) + 1
     
     @staticmethod
-    async def get_schedule() -> Optional[Dict[str, Any]]:
+    def get_day_pairs(schedule_data: Dict[str, Any], day: datetime) -> List[Dict[str, Any]]:
+        """Пари на конкретну дату з урахуванням тижня ротації"""
+        day_code = {0: 'Пн', 1: 'Вв', 2: 'Ср', 3: 'Чт', 4: 'Пт', 5: 'Сб'}.get(day.weekday())
+        if not day_code or not schedule_data:
+            return []
+        key = 'scheduleFirstWeek' if ScheduleAPI.get_week_number(day) == 1 else 'scheduleSecondWeek'
+        return next((d.get('pairs') or [] for d in schedule_data.get(key) or [] if d.get('day') == day_code), [])
+    
+    @staticmethod
+    def kpi_group_for(group_id: int) -> str:
+        """KPI groupId для Telegram-групи"""
+        return TenantsManager.kpi_group_id(group_id) or KPI_GROUP_ID
+    
+    @staticmethod
+    async def get_schedule(kpi_group_id: Optional[str] = None, force: bool = False) -> Optional[Dict[str, Any]]:
+        """Отримання розкладу (з кешу, якщо він свіжий).
+
+        Одночасні запити одного розкладу чекають на один спільний запит до API.
+        Повертається сам закешований об'єкт, тож змінювати його не можна:
+        зміни потрапили б у /api/schedule і зламали б порівняння при оновленні.
+        """
+        kpi_group_id = kpi_group_id or KPI_GROUP_ID
+        cached = ScheduleAPI._cache.get(kpi_group_id)
+        if not force and cached is not None:
+            ttl = ScheduleAPI._ttl.get(kpi_group_id, SCHEDULE_CACHE_TTL)
+            if time.monotonic() - ScheduleAPI._cache_time.get(kpi_group_id, 0.0) < ttl:
+                return cached
+        
+        task = ScheduleAPI._inflight.get(kpi_group_id)
+        if task is None:
+            task = asyncio.ensure_future(ScheduleAPI._fetch_schedule(kpi_group_id))
+            ScheduleAPI._inflight[kpi_group_id] = task
+            task.add_done_callback(lambda _: ScheduleAPI._inflight.pop(kpi_group_id, None))
+        data = await asyncio.shield(task)
+        
+        if data is not None:
+            if data != ScheduleAPI._cache.get(kpi_group_id):
+                ScheduleAPI._version[kpi_group_id] = ScheduleAPI._version.get(kpi_group_id, 0) + 1
+            ScheduleAPI._cache[kpi_group_id] = data
+            ScheduleAPI._cache_time[kpi_group_id] = time.monotonic()
+            return data
+        
+        # Якщо API недоступне, віддаємо останній відомий розклад
+        return ScheduleAPI._cache.get(kpi_group_id)
+    
+    @staticmethod
+    async def close():
+        if ScheduleAPI._session is not None:
+            await ScheduleAPI._session.close()
+            ScheduleAPI._session = None
+    
+    @staticmethod
+    async def _fetch_schedule(kpi_group_id: str) -> Optional[Dict[str, Any]]:
         """Отримання розкладу з API з розширеним логуванням"""
+        url = f"{KPI_API_BASE}?groupId={kpi_group_id}"
         try:
-            logger.info(f"Запит розкладу: {KPI_API_URL}")
-            async with aiohttp.ClientSession() as session:
-                async with session.get(KPI_API_URL) as response:
-                    if response.status == 200:
-                        data = await response.json()
+            logger.info(f"Запит розкладу: {url}")
+            if ScheduleAPI._session is None or ScheduleAPI._session.closed:
+                ScheduleAPI._session = aiohttp.ClientSession()
+            async with ScheduleAPI._session.get(url) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    
+                    if 'data' in data and 'scheduleFirstWeek' not in data:
+                        data = data['data']
                         
-                        if 'data' in data and 'scheduleFirstWeek' not in data:
-                            data = data['data']
-                            
-                        if not data.get('scheduleFirstWeek') and not data.get('scheduleSecondWeek'):
-                            logger.warning("Отримано порожній розклад! Перевірте KPI_GROUP_ID.")
-                        else:
-                            logger.info("Розклад успішно завантажено")
-                            
-                        return data
+                    if not data.get('scheduleFirstWeek') and not data.get('scheduleSecondWeek'):
+                        logger.warning(f"Отримано порожній розклад! Перевірте KPI groupId {kpi_group_id}.")
                     else:
-                        logger.error(f"API повернув помилку: {response.status}")
-                        return None
+                        logger.info("Розклад успішно завантажено")
+                        
+                    return data
+                else:
+                    logger.error(f"API повернув помилку: {response.status}")
+                    return None
         except Exception as e:
             logger.error(f"Помилка отримання розкладу: {e}")
             return None
     
     @staticmethod
-    async def format_class_info(class_data: Dict[str, Any]) -> str:
-        from database.models import LinksManager
-        
+    async def format_class_info(class_data: Dict[str, Any], group_id: int = GROUP_ID) -> str:
         class_type = CLASS_TYPES.get(class_data.get('type', ''), class_data.get('type', ''))
         start_time = class_data.get('time', '')
         end_time_str = get_class_end_time(start_time)
@@ -86,11 +152,12 @@ class ScheduleAPI:
         info = f"{class_type}\n{time_display}\n📖 {name}\n👨‍🏫 {teacher}\n"
         if place: info += f"📍 {place}\n"
         
-        link_data = await LinksManager.get_link(name, teacher, class_data.get('type', ''))
+        link_data = await LinksManager.get_link(name, teacher, class_data.get('type', ''), group_id)
+        
+        meet_link = link_data.get('meet_link') if link_data else None
+        cls_link = link_data.get('classroom_link') if link_data else None
         
-        if link_data:
-            meet_link = link_data.get('meet_link')
-            cls_link = link_data.get('classroom_link')
+        if meet_link or cls_link:
             if meet_link: info += f"🔗 [Приєднатися]({meet_link})\n"
             if cls_link: info += f"📖 [Classroom]({cls_link})\n"
         else:
@@ -99,13 +166,13 @@ class ScheduleAPI:
         return info
     
     @staticmethod
-    async def get_current_class_info() -> Optional[Dict[str, Any]]:
+    async def get_current_class_info(group_id: int = GROUP_ID) -> Optional[Dict[str, Any]]:
         try:
-            schedule_data = await ScheduleAPI.get_schedule()
+            schedule_data = await ScheduleAPI.get_schedule(ScheduleAPI.kpi_group_for(group_id))
             if not schedule_data: return None
             
             kiev_tz = pytz.timezone(TIMEZONE)
-            now = datetime.now(kiev_tz)
+            now = clock.now()
             week_number = ScheduleAPI.get_week_number(now)
             week_key = 'scheduleFirstWeek' if week_number == 1 else 'scheduleSecondWeek'
             
@@ -125,17 +192,17 @@ class ScheduleAPI:
                 e_dt = kiev_tz.localize(datetime.combine(now.date(), datetime.strptime(end, '%H:%M:%S').time()))
                 
                 if s_dt <= now <= e_dt:
-                    class_data['end_datetime'] = e_dt
-                    return class_data
+                    # Копія: class_data — частина спільного кешу розкладу
+                    return {**class_data, 'end_datetime': e_dt}
             return None
         except Exception: return None
 
     @staticmethod
-    async def get_today_schedule() -> str:
-        schedule = await ScheduleAPI.get_schedule()
+    async def get_today_schedule(group_id: int = GROUP_ID) -> str:
+        schedule = await ScheduleAPI.get_schedule(ScheduleAPI.kpi_group_for(group_id))
         if not schedule: return "❌ Помилка розкладу"
         
-        now = datetime.now(pytz.timezone(TIMEZONE))
+        now = clock.now()
         day_map = {'Monday':'Пн', 'Tuesday':'Вв', 'Wednesday':'Ср', 'Thursday':'Чт', 'Friday':'Пт', 'Saturday':'Сб'}
         day_code = day_map.get(now.strftime('%A'))
         if not day_code: return "📅 Сьогодні вихідний"
@@ -148,18 +215,18 @@ class ScheduleAPI:
         
         res = f"📅 Розклад на сьогодні ({DAYS_TRANSLATION[day_code]}):\n\n"
         for i, p in enumerate(pairs, 1):
-            res += f"**{i} пара**\n" + await ScheduleAPI.format_class_info(p) + "\n"
+            res += f"**{i} пара**\n" + await ScheduleAPI.format_class_info(p, group_id) + "\n"
         return res
 
     @staticmethod
-    async def get_tomorrow_schedule() -> str:
-        schedule = await ScheduleAPI.get_schedule()
+    async def get_tomorrow_schedule(group_id: int = GROUP_ID) -> str:
+        schedule = await ScheduleAPI.get_schedule(ScheduleAPI.kpi_group_for(group_id))
         if not schedule: return "❌ Помилка розкладу"
         
-        now = datetime.now(pytz.timezone(TIMEZONE)) + timedelta(days=1)
+        now = clock.add_days(clock.now(), 1)
         day_map = {'Monday':'Пн', 'Tuesday':'Вв', 'Wednesday':'Ср', 'Thursday':'Чт', 'Friday':'Пт', 'Saturday':'Сб', 'Sunday':'Пн'}
         day_code = day_map.get(now.strftime('%A'))
-        if now.weekday() == 6: now += timedelta(days=1) # Якщо неділя, показуємо понеділок
+        if now.weekday() == 6: now = clock.add_days(now, 1) # Якщо неділя, показуємо понеділок
         
         week = ScheduleAPI.get_week_number(now)
         key = 'scheduleFirstWeek' if week == 1 else 'scheduleSecondWeek'
@@ -169,15 +236,15 @@ class ScheduleAPI:
         
         res = f"📅 Розклад на завтра:\n\n"
         for i, p in enumerate(pairs, 1):
-            res += f"**{i} пара**\n" + await ScheduleAPI.format_class_info(p) + "\n"
+            res += f"**{i} пара**\n" + await ScheduleAPI.format_class_info(p, group_id) + "\n"
         return res
 
     @staticmethod
-    async def get_week_schedule(week_offset: int = 0) -> str:
-        schedule = await ScheduleAPI.get_schedule()
+    async def get_week_schedule(week_offset: int = 0, group_id: int = GROUP_ID) -> str:
+        schedule = await ScheduleAPI.get_schedule(ScheduleAPI.kpi_group_for(group_id))
         if not schedule: return "❌ Помилка"
         
-        now = datetime.now(pytz.timezone(TIMEZONE)) + timedelta(weeks=week_offset)
+        now = clock.add_days(clock.now(), 7 * week_offset)
         week = ScheduleAPI.get_week_number(now)
         key = 'scheduleFirstWeek' if week == 1 else 'scheduleSecondWeek'
         
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+from typing import Optional
+import pytz
+from config import TIMEZONE
+
+
+class Clock:
+    """Поточний час застосунку в часовому поясі розкладу.
+
+    Планувальник, розклад на сьогодні/завтра, Mini App і хендлери беруть
+    «зараз» звідси, а не з datetime.now(), тож simulate()/advance() переносять
+    їх у будь-який момент семестру без очікування. Без симуляції — системний час.
+    """
+
+    def __init__(self, tz: str = TIMEZONE):
+        self.tz = pytz.timezone(tz)
+        self._simulated: Optional[datetime] = None
+
+    @property
+    def simulated(self) -> bool:
+        return self._simulated is not None
+
+    def now(self) -> datetime:
+        if self._simulated is not None:
+            return self._simulated
+        return datetime.now(self.tz)
+
+    def utcnow(self) -> datetime:
+        """UTC без tzinfo, як дати в MongoDB"""
+        return self.now().astimezone(pytz.utc).replace(tzinfo=None)
+
+    def localize(self, naive: datetime) -> datetime:
+        return self.tz.localize(naive)
+
+    def add_days(self, moment: datetime, days: int) -> datetime:
+        """Той самий місцевий час через days днів (зміщення переходу на літній/зимовий час враховується)"""
+        return self.tz.localize(moment.replace(tzinfo=None) + timedelta(days=days))
+
+    def seconds_to_next_minute(self) -> float:
+        now = self.now()
+        return 60 - now.second - now.microsecond / 1e6
+
+    def simulate(self, moment: datetime):
+        """Зафіксувати час (наївний moment вважається місцевим)"""
+        self._simulated = moment.astimezone(self.tz) if moment.tzinfo else self.tz.localize(moment)
+
+    def advance(self, delta: timedelta):
+        self._simulated = self.tz.normalize(self.now() + delta)
+
+    def reset(self):
+        self._simulated = None
+
+
+clock = Clock()
@@ -0,0 +1,54 @@
+import re
+from datetime import datetime, time, timedelta
+from typing import Optional
+import pytz
+from config import TIMEZONE
+from bot.utils.clock import clock
+
+# Дедлайн без часу вважаємо кінцем дня
+END_OF_DAY = time(23, 59)
+
+_ISO_RE = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})(?:[T ](\d{1,2}):(\d{2}))?")
+_DOTTED_RE = re.compile(r"^(\d{1,2})[./](\d{1,2})(?:[./](\d{2,4}))?(?:,?\s+(\d{1,2}):(\d{2}))?$")
+
+
+def parse_deadline(value: Optional[str], now: Optional[datetime] = None) -> Optional[datetime]:
+    """Перетворення дедлайну з довільного рядка у datetime (UTC, без tzinfo, як і в MongoDB).
+
+    Підтримуються формати "2024-10-21" (поле date у webapp), "2024-10-21T18:00",
+    "21.10.2024", "21.10", "21.10 18:00" та "21/10". Для дати без року береться
+    найближча майбутня (або не старіша за тиждень).
+    """
+    if not value or not isinstance(value, str):
+        return None
+    value = value.strip()
+    kiev_tz = pytz.timezone(TIMEZONE)
+    now = now or clock.now()
+    if now.tzinfo is None:
+        now = kiev_tz.localize(now)
+
+    try:
+        match = _ISO_RE.match(value)
+        if match:
+            year, month, day = int(match[1]), int(match[2]), int(match[3])
+            hour_min = time(int(match[4]), int(match[5])) if match[4] else END_OF_DAY
+            local = datetime.combine(datetime(year, month, day).date(), hour_min)
+        else:
+            match = _DOTTED_RE.match(value)
+            if not match:
+                return None
+            day, month = int(match[1]), int(match[2])
+            hour_min = time(int(match[4]), int(match[5])) if match[4] else END_OF_DAY
+            if match[3]:
+                year = int(match[3])
+                if year < 100:
+                    year += 2000
+                local = datetime.combine(datetime(year, month, day).date(), hour_min)
+            else:
+                local = datetime.combine(datetime(now.year, month, day).date(), hour_min)
+                if kiev_tz.localize(local) < now - timedelta(days=7):
+                    local = local.replace(year=now.year + 1)
+    except ValueError:
+        return None
+
+    return kiev_tz.localize(local).astimezone(pytz.utc).replace(tzinfo=None)
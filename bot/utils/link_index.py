@@ -0,0 +1,200 @@
+import copy
+import re
+from collections import OrderedDict, defaultdict
+from typing import Dict, Any, List, Optional, Set, Tuple
+from bot.utils.names import normalize_name
+
+Key = Tuple[str, str, str]
+
+# Звання та посади, які КПІ іноді додає перед ПІБ викладача
+TEACHER_TITLES = {"доц", "проф", "ст", "викл", "асист", "ас", "пос", "зав", "каф", "к.т.н", "д.т.н", "phd"}
+
+_SPLIT_RE = re.compile(r"[\s.,]+")
+
+# Скільки різних запитів resolve пам'ятати в кожному індексі
+RESOLVE_MEMO_SIZE = 1024
+
+
+def trigrams(value: str) -> Set[str]:
+    """Множина триграм рядка (з відступами на межах слів)"""
+    padded = f"  {value} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def teacher_tokens(value: str) -> List[str]:
+    """ПІБ викладача як список токенів без звань ("Іванов І.І." -> ["іванов", "і", "і"])"""
+    tokens = [t for t in _SPLIT_RE.split(normalize_name(value)) if t]
+    return [t for t in tokens if t not in TEACHER_TITLES]
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+def teacher_similarity(a: List[str], b: List[str]) -> float:
+    """Схожість ПІБ з урахуванням ініціалів замість повних імен"""
+    if not a and not b:
+        return 1.0
+    if not a or not b:
+        return 0.5
+    surname = _jaccard(trigrams(a[0]), trigrams(b[0]))
+    rest_a, rest_b = a[1:], b[1:]
+    if not rest_a or not rest_b:
+        return surname
+    matched = 0
+    for x, y in zip(rest_a, rest_b):
+        if len(x) == 1 or len(y) == 1:
+            matched += x[0] == y[0]
+        else:
+            matched += x == y
+    return 0.7 * surname + 0.3 * matched / max(len(rest_a), len(rest_b))
+
+
+def _type_base(class_type: str) -> str:
+    for base in ('Лек', 'Прак', 'Лаб'):
+        if base in class_type:
+            return base
+    return class_type.strip()
+
+
+class _Entry:
+    __slots__ = ("link", "subject", "subject_grams", "teacher", "type_base", "has_links")
+
+    def __init__(self, link: Dict[str, Any]):
+        self.link = link
+        self.subject = normalize_name(link.get("subject_name", ""))
+        self.subject_grams = trigrams(self.subject)
+        self.teacher = teacher_tokens(link.get("teacher_name", ""))
+        self.type_base = _type_base(link.get("class_type", ""))
+        self.has_links = bool(link.get("meet_link") or link.get("classroom_link"))
+
+
+class LinkIndex:
+    """In-memory індекс посилань з нечітким пошуком за назвою предмета та ПІБ викладача.
+
+    Оцінка впевненості: subject_sim * (0.7 + 0.2 * teacher_sim + 0.1 * type_match),
+    тобто точний збіг предмета без збігу викладача і типу дає 0.7 — так само, як
+    останній крок старого ланцюжка запитів у LinksManager.get_link.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        # Зростає при кожній зміні індексу (ключ для похідних кешів)
+        self.version = 0
+        self._entries: Dict[Key, _Entry] = {}
+        self._by_normalized: Dict[Key, Key] = {}
+        self._grams: Dict[str, Set[Key]] = defaultdict(set)
+        # LRU результатів resolve за нормалізованим запитом; скидається при будь-якій зміні індексу
+        self._memo: "OrderedDict[Tuple[Key, float], Tuple[Optional[Dict[str, Any]], float]]" = OrderedDict()
+
+    @staticmethod
+    def _key(link: Dict[str, Any]) -> Key:
+        return (link.get("subject_name", ""), link.get("teacher_name", ""), link.get("class_type", ""))
+
+    @staticmethod
+    def _normalized_key(subject: str, teacher: str, class_type: str) -> Key:
+        return (normalize_name(subject), " ".join(teacher_tokens(teacher)), _type_base(class_type))
+
+    def load(self, links: List[Dict[str, Any]]):
+        """Повна перебудова індексу"""
+        self._entries.clear()
+        self._by_normalized.clear()
+        self._grams.clear()
+        self._memo.clear()
+        for link in links:
+            self.upsert(link)
+        self.loaded = True
+
+    def upsert(self, link: Dict[str, Any]):
+        """Додавання або оновлення одного посилання"""
+        key = self._key(link)
+        if key in self._entries:
+            self.remove(*key)
+        entry = _Entry(link)
+        self._memo.clear()
+        self.version += 1
+        self._entries[key] = entry
+        self._by_normalized[self._normalized_key(*key)] = key
+        for gram in entry.subject_grams:
+            self._grams[gram].add(key)
+
+    def remove(self, subject_name: str, teacher_name: str, class_type: str):
+        key = (subject_name, teacher_name, class_type)
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._memo.clear()
+        self.version += 1
+        normalized = self._normalized_key(*key)
+        if self._by_normalized.get(normalized) == key:
+            del self._by_normalized[normalized]
+        for gram in entry.subject_grams:
+            keys = self._grams.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._grams[gram]
+
+    def resolve(self, subject_name: str, teacher_name: str, class_type: str,
+                threshold: float = 0.0) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Найкраще посилання для пари та впевненість (0..1).
+
+        Заготовки без посилань програють справжнім посиланням, якщо ті проходять поріг.
+        Повертається копія посилання: записи індексу спільні для всіх викликів.
+        """
+        query = self._normalized_key(subject_name, teacher_name, class_type)
+        memo_key = (query, threshold)
+        cached = self._memo.get(memo_key)
+        if cached is not None:
+            self._memo.move_to_end(memo_key)
+        else:
+            cached = self._memo[memo_key] = self._resolve(query, threshold)
+            if len(self._memo) > RESOLVE_MEMO_SIZE:
+                self._memo.popitem(last=False)
+        link, score = cached
+        return (copy.copy(link) if link is not None else None), score
+
+    def _resolve(self, query: Key, threshold: float) -> Tuple[Optional[Dict[str, Any]], float]:
+        exact = self._by_normalized.get(query)
+        if exact is not None and self._entries[exact].has_links:
+            return self._entries[exact].link, 1.0
+
+        query_subject, query_teacher, query_type = query
+        query_grams = trigrams(query_subject)
+        shared: Dict[Key, int] = defaultdict(int)
+        for gram in query_grams:
+            for key in self._grams.get(gram, ()):
+                shared[key] += 1
+
+        query_teacher = query_teacher.split()
+
+        best_key, best_rank, best_score = None, (False, -1.0), 0.0
+        for key, common in shared.items():
+            entry = self._entries[key]
+            subject_sim = common / (len(query_grams) + len(entry.subject_grams) - common)
+            score = subject_sim * (
+                0.7
+                + 0.2 * teacher_similarity(query_teacher, entry.teacher)
+                + 0.1 * (entry.type_base == query_type)
+            )
+            rank = (entry.has_links and score >= threshold, score)
+            if rank > best_rank:
+                best_key, best_rank, best_score = key, rank, score
+
+        if best_key is None:
+            return None, 0.0
+        return self._entries[best_key].link, round(best_score, 4)
+
+
+# Окремий індекс для кожної групи (тенанта)
+_indexes: Dict[int, LinkIndex] = {}
+
+
+def get_link_index(group_id: int) -> LinkIndex:
+    index = _indexes.get(group_id)
+    if index is None:
+        index = _indexes[group_id] = LinkIndex()
+    return index
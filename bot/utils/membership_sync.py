@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional
+from aiogram import Bot
+from aiogram.enums import ChatMemberStatus
+from aiogram.exceptions import TelegramRetryAfter, TelegramBadRequest, TelegramForbiddenError
+from bot.utils.reminders import RateLimiter
+from database.models import GroupMembersManager, TenantsManager
+from config import MEMBERSHIP_SYNC_INTERVAL, MEMBERSHIP_SYNC_MAX_CHECKS, MEMBERSHIP_SYNC_RATE_PER_SECOND
+
+logger = logging.getLogger(__name__)
+
+# Перший прохід після запуску, щоб не конкурувати з прогрівом (секунди)
+FIRST_RUN_DELAY = 60
+
+GONE_STATUSES = (ChatMemberStatus.LEFT, ChatMemberStatus.KICKED)
+
+
+class MembershipReconciler:
+    """Періодична звірка group_members з Telegram.
+
+    Bot API не віддає повний список учасників, тож звірка складається з
+    того, що отримати можна: адміністратори групи додаються пакетом, кількість
+    учасників порівнюється з відомими, а до MEMBERSHIP_SYNC_MAX_CHECKS
+    учасників, яких найдовше не звіряли, перевіряються через get_chat_member.
+    Ті, хто вийшов, деактивуються одним update_many. Запити до Telegram
+    обмежені спільним RateLimiter, групи обробляються по черзі.
+    """
+
+    def __init__(self, bot: Bot, interval: float = MEMBERSHIP_SYNC_INTERVAL,
+                 max_checks: int = MEMBERSHIP_SYNC_MAX_CHECKS,
+                 rate: float = MEMBERSHIP_SYNC_RATE_PER_SECOND):
+        self.bot = bot
+        self.interval = interval
+        self.max_checks = max_checks
+        self.limiter = RateLimiter(rate)
+        self.task: Optional[asyncio.Task] = None
+        self.stats: Dict[int, Dict[str, Any]] = {}
+
+    async def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._loop())
+            logger.info("Звірку учасників з Telegram запущено")
+
+    async def stop(self):
+        task, self.task = self.task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _loop(self):
+        await asyncio.sleep(FIRST_RUN_DELAY)
+        while True:
+            await self.run_all()
+            await asyncio.sleep(self.interval)
+
+    async def run_all(self):
+        for tenant in TenantsManager.all():
+            try:
+                self.stats[tenant["groupId"]] = await self.run(tenant["groupId"])
+            except Exception as e:
+                logger.error(f"Помилка звірки учасників ({tenant['groupId']}): {e}")
+
+    async def _call(self, method, *args, attempts: int = 3):
+        """Виклик Bot API з обмеженням швидкості та паузою на 429"""
+        for _ in range(attempts):
+            await self.limiter.acquire()
+            try:
+                return await method(*args)
+            except TelegramRetryAfter as e:
+                logger.warning(f"Telegram обмежив звірку учасників, пауза {e.retry_after} с")
+                await self.limiter.pause(e.retry_after)
+        raise RuntimeError(f"Telegram не відповів після {attempts} спроб")
+
+    async def run(self, group_id: int) -> Dict[str, Any]:
+        stats = {"admins": 0, "added": 0, "checked": 0, "deactivated": 0}
+
+        admins = await self._call(self.bot.get_chat_administrators, group_id)
+        admin_users = [a.user for a in admins if not a.user.is_bot]
+        stats["admins"] = len(admin_users)
+        stats["added"] = await GroupMembersManager.upsert_members([
+            {"user_id": u.id, "username": u.username, "first_name": u.first_name, "last_name": u.last_name}
+            for u in admin_users
+        ], group_id)
+
+        stats["telegramCount"] = await self._call(self.bot.get_chat_member_count, group_id)
+
+        admin_ids = {u.id for u in admin_users}
+        candidates = [
+            user_id for user_id in await GroupMembersManager.get_least_recently_checked(group_id, self.max_checks + len(admin_ids))
+            if user_id not in admin_ids
+        ][:self.max_checks]
+        present: List[int] = []
+        gone: List[int] = []
+        for user_id in candidates:
+            try:
+                member = await self._call(self.bot.get_chat_member, group_id, user_id)
+            except TelegramBadRequest as e:
+                # Користувача не знайдено: акаунт видалено або він ніколи не був у групі
+                if "not found" in str(e).lower():
+                    gone.append(user_id)
+                else:
+                    logger.warning(f"Не вдалося перевірити учасника {user_id}: {e}")
+                continue
+            except TelegramForbiddenError as e:
+                # Бота видалили з групи: звіряти нічого
+                logger.warning(f"Немає доступу до групи {group_id}: {e}")
+                break
+            if member.status in GONE_STATUSES or (member.status == ChatMemberStatus.RESTRICTED and not member.is_member):
+                gone.append(user_id)
+            else:
+                present.append(user_id)
+        stats["checked"] = len(present) + len(gone)
+
+        await GroupMembersManager.mark_checked(present, group_id)
+        stats["deactivated"] = await GroupMembersManager.mark_inactive(gone, group_id)
+
+        stats["known"] = await GroupMembersManager.count_active(group_id)
+        logger.info(
+            f"Звірка учасників ({group_id}): у Telegram {stats['telegramCount']}, відомо {stats['known']}, "
+            f"адмінів {stats['admins']} (нових {stats['added']}), перевірено {stats['checked']}, "
+            f"деактивовано {stats['deactivated']}"
+        )
+        return stats
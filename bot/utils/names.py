@@ -0,0 +1,10 @@
+import unicodedata
+
+APOSTROPHES = "’ʼ`´‘ʹ′"
+
+def normalize_name(value: str) -> str:
+    """Нормалізація назви предмета/ПІБ для порівняння (регістр, апострофи, пробіли)"""
+    value = unicodedata.normalize('NFKC', value or '')
+    for ch in APOSTROPHES:
+        value = value.replace(ch, "'")
+    return " ".join(value.split()).casefold()
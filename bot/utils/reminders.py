@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+import pytz
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter, TelegramForbiddenError, TelegramBadRequest
+from bot.utils.api import ScheduleAPI
+from database.models import LinksManager, GroupMembersManager, TenantsManager
+from database.invalidation import ChangeEvent, on_change
+from config import TIMEZONE, REMINDER_WORKERS, REMINDER_RATE_PER_SECOND
+
+logger = logging.getLogger(__name__)
+
+REMINDER_GRACE_MINUTES = 5
+
+# Групи, де змінилися підписки: кошики перебудовуються на наступному тіку
+_stale_groups = set()
+
+
+def invalidate_reminders(group_id: int):
+    _stale_groups.add(group_id)
+
+
+@on_change("group_members")
+def _on_members_change(event: ChangeEvent):
+    # Підписки й склад групи змінюються і в інших процесах; без документа
+    # (опитування) невідомо, яка група, тож перебудовуються всі
+    if event.group_id is not None:
+        _stale_groups.add(event.group_id)
+    else:
+        _stale_groups.update(t["groupId"] for t in TenantsManager.all())
+
+
+def format_class_reminder(class_data: Dict[str, Any], link_data: Optional[Dict[str, Any]], minutes_before: int) -> str:
+    """Текст нагадування про пару (спільний для групи та особистих повідомлень)"""
+    message = f"🔔 **Нагадування про пару через {minutes_before} хвилин!**\n\n"
+    message += f"⏰ **Час:** {class_data.get('time', '')}\n"
+    message += f"📚 **Предмет:** {class_data.get('name', '')}\n"
+    message += f"👨‍🏫 **Викладач:** {class_data.get('teacherName', '')}\n"
+    message += f"📝 **Тип:** {class_data.get('type', '')}\n"
+
+    if class_data.get('place'):
+        message += f"📍 **Місце:** {class_data['place']}\n"
+
+    message += "\n"
+
+    if link_data and link_data.get('meet_link'):
+        message += f"🔗 [Приєднатися до зустрічі]({link_data['meet_link']})\n"
+    if link_data and link_data.get('classroom_link'):
+        message += f"📖 [Google Classroom]({link_data['classroom_link']})\n"
+
+    return message
+
+
+class RateLimiter:
+    """Token bucket: не більше rate подій на секунду для всіх воркерів разом"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    async def pause(self, seconds: float):
+        """Пауза для всіх воркерів (відповідь Telegram 429)"""
+        async with self._lock:
+            await asyncio.sleep(seconds)
+            self.tokens = 0
+            self.updated = time.monotonic()
+
+
+class ReminderFanout:
+    """Особисті нагадування про пари в приватні повідомлення.
+
+    Раз на день (або після зміни підписок) для кожної групи будуються
+    хвилинні кошики: момент надсилання -> [(user_id, текст)]. Щохвилини
+    планувальник лише забирає готовий кошик і кладе його в чергу, яку
+    розбирає пул воркерів з спільним обмеженням швидкості, тож
+    повідомлення в групу не чекає на розсилку.
+    """
+
+    def __init__(self, bot: Bot, workers: int = REMINDER_WORKERS, rate: float = REMINDER_RATE_PER_SECOND):
+        self.bot = bot
+        self.workers = workers
+        self.limiter = RateLimiter(rate)
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        # groupId -> {хвилина надсилання -> [(user_id, текст)]}
+        self._buckets: Dict[int, Dict[datetime, List[Tuple[int, str]]]] = {}
+        self._built_for: Dict[int, Any] = {}
+        self._sent_until: Dict[int, datetime] = {}
+        self.stats = {"sent": 0, "failed": 0, "blocked": 0}
+
+    async def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _build(self, tenant: Dict[str, Any], now: datetime):
+        group_id = tenant["groupId"]
+        buckets: Dict[datetime, List[Tuple[int, str]]] = defaultdict(list)
+        self._buckets[group_id] = buckets
+        self._built_for[group_id] = now.date()
+
+        subscribers = await GroupMembersManager.get_reminder_subscribers(group_id)
+        if not subscribers:
+            return
+        schedule_data = await ScheduleAPI.get_schedule(tenant.get("kpiGroupId"))
+        pairs = ScheduleAPI.get_day_pairs(schedule_data, now)
+        if not pairs:
+            return
+
+        kiev_tz = pytz.timezone(TIMEZONE)
+        by_lead: Dict[int, List[int]] = defaultdict(list)
+        for member in subscribers:
+            for lead in member.get("reminder_leads", []):
+                by_lead[lead].append(member["user_id"])
+
+        sent_until = self._sent_until.get(group_id)
+        for class_data in pairs:
+            try:
+                start_time = datetime.strptime(class_data.get('time', '')[:5], '%H:%M').time()
+            except ValueError:
+                continue
+            start = kiev_tz.localize(datetime.combine(now.date(), start_time))
+            link_data = await LinksManager.get_link(
+                class_data.get('name', ''), class_data.get('teacherName', ''), class_data.get('type', ''), group_id
+            )
+            for lead, user_ids in by_lead.items():
+                minute = start - timedelta(minutes=lead)
+                if sent_until is not None and minute <= sent_until:
+                    continue
+                # Текст будується раз на пару і час, а не на кожного користувача
+                text = format_class_reminder(class_data, link_data, lead)
+                buckets[minute].extend((user_id, text) for user_id in user_ids)
+
+    async def tick(self, tenant: Dict[str, Any], now: datetime):
+        """Відправка в чергу всіх кошиків групи, час яких настав"""
+        group_id = tenant["groupId"]
+        now = now.replace(second=0, microsecond=0)
+        if self._built_for.get(group_id) != now.date() or group_id in _stale_groups:
+            _stale_groups.discard(group_id)
+            await self._build(tenant, now)
+
+        buckets = self._buckets.get(group_id, {})
+        due = sorted(minute for minute in buckets if minute <= now)
+        for minute in due:
+            items = buckets.pop(minute)
+            # Після перезапуску посеред дня прострочені кошики не надсилаємо
+            if now - minute > timedelta(minutes=REMINDER_GRACE_MINUTES):
+                continue
+            for item in items:
+                self.queue.put_nowait(item)
+        self._sent_until[group_id] = now
+
+    async def _worker(self):
+        while True:
+            user_id, text = await self.queue.get()
+            try:
+                await self._deliver(user_id, text)
+            finally:
+                self.queue.task_done()
+
+    async def _deliver(self, user_id: int, text: str, attempts: int = 3):
+        for _ in range(attempts):
+            await self.limiter.acquire()
+            try:
+                await self.bot.send_message(
+                    chat_id=user_id,
+                    text=text,
+                    parse_mode='Markdown',
+                    disable_web_page_preview=True
+                )
+                self.stats["sent"] += 1
+                return
+            except TelegramRetryAfter as e:
+                logger.warning(f"Telegram обмежив розсилку, пауза {e.retry_after} с")
+                await self.limiter.pause(e.retry_after)
+            except TelegramForbiddenError:
+                # Користувач заблокував бота або не починав діалог
+                self.stats["blocked"] += 1
+                return
+            except TelegramBadRequest as e:
+                logger.error(f"Помилка нагадування для {user_id}: {e}")
+                break
+            except Exception as e:
+                logger.error(f"Помилка нагадування для {user_id}: {e}")
+                await asyncio.sleep(1)
+        self.stats["failed"] += 1
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queue.qsize(),
+            "buckets": {group_id: sum(len(v) for v in b.values()) for group_id, b in self._buckets.items()},
+            **self.stats,
+        }
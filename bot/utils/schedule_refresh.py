@@ -0,0 +1,177 @@
+import asyncio
+import heapq
+import logging
+import random
+import time
+from datetime import datetime, date
+from typing import Dict, Any, List, Optional, Tuple
+from bot.utils.api import ScheduleAPI
+from bot.utils.clock import clock
+from config import (
+    SCHEDULE_REFRESH_CONCURRENCY,
+    SCHEDULE_REFRESH_JITTER,
+    SCHEDULE_REFRESH_INTERVAL_START,
+    SCHEDULE_REFRESH_INTERVAL_DEFAULT,
+    SCHEDULE_REFRESH_INTERVAL_MIDTERM,
+    SCHEDULE_REFRESH_RETRY,
+    SEMESTER_STARTS,
+    SEMESTER_START_WEEKS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Після скількох тижнів семестру розклад вважаємо усталеним до сесії
+MIDTERM_END_WEEK = 16
+
+
+def semester_bounds(today: date) -> Tuple[date, date]:
+    """Початок поточного семестру і початок наступного"""
+    starts = sorted(date(today.year + shift, month, day) for shift in (-1, 0, 1) for month, day in SEMESTER_STARTS)
+    current = max(s for s in starts if s <= today)
+    return current, min(s for s in starts if s > today)
+
+
+def weeks_since_semester_start(today: date) -> int:
+    """Повних тижнів від початку поточного семестру"""
+    return (today - semester_bounds(today)[0]).days // 7
+
+
+def refresh_interval(now: Optional[datetime] = None) -> float:
+    """Базовий інтервал оновлення: частіше на початку семестру, рідше в середині"""
+    now = now or clock.now()
+    weeks = weeks_since_semester_start(now.date())
+    if weeks < SEMESTER_START_WEEKS:
+        return SCHEDULE_REFRESH_INTERVAL_START
+    if weeks < MIDTERM_END_WEEK:
+        return SCHEDULE_REFRESH_INTERVAL_MIDTERM
+    return SCHEDULE_REFRESH_INTERVAL_DEFAULT
+
+
+def _jittered(seconds: float) -> float:
+    return seconds * random.uniform(1 - SCHEDULE_REFRESH_JITTER, 1 + SCHEDULE_REFRESH_JITTER)
+
+
+class ScheduleRefresher:
+    """Фонове оновлення розкладів КПІ для всіх груп.
+
+    Черга з пріоритетом за часом наступного оновлення: розклади оновлюються
+    не більше ніж по SCHEDULE_REFRESH_CONCURRENCY одночасно, з розкидом
+    у часі, тож навантаження на API КПІ не росте сплесками з кількістю груп.
+    Поки розклад обслуговується тут, його кеш у ScheduleAPI живе довше за інтервал.
+    """
+
+    def __init__(self, concurrency: int = SCHEDULE_REFRESH_CONCURRENCY):
+        self.concurrency = concurrency
+        self.is_running = False
+        self.task = None
+        self._heap: List[Tuple[float, str]] = []
+        self._next_at: Dict[str, float] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._in_flight: set = set()
+        self._wakeup = asyncio.Event()
+
+    def add(self, kpi_group_id: str, delay: Optional[float] = None):
+        """Додавання розкладу в чергу; перше оновлення розкидається по інтервалу"""
+        if not kpi_group_id or kpi_group_id in self._next_at:
+            return
+        interval = refresh_interval()
+        if delay is None:
+            delay = random.uniform(0, interval)
+        self._push(kpi_group_id, time.monotonic() + delay)
+        self._stats[kpi_group_id] = {"interval": interval, "lastRefresh": None, "failures": 0}
+        ScheduleAPI._ttl[kpi_group_id] = interval * 2
+
+    def sync_groups(self):
+        """Узгодження черги з реєстром груп"""
+        from database.models import TenantsManager
+        for tenant in TenantsManager.all():
+            self.add(ScheduleAPI.kpi_group_for(tenant["groupId"]))
+
+    def _push(self, kpi_group_id: str, at: float):
+        self._next_at[kpi_group_id] = at
+        heapq.heappush(self._heap, (at, kpi_group_id))
+        self._wakeup.set()
+
+    async def start(self):
+        if not self.is_running:
+            self.sync_groups()
+            self.is_running = True
+            self.task = asyncio.create_task(self._loop())
+            logger.info(f"Фонове оновлення розкладів запущено ({len(self._next_at)} груп КПІ)")
+
+    async def stop(self):
+        self.is_running = False
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+    async def _loop(self):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        while self.is_running:
+            # Застарілі записи купи (після перепланування) пропускаємо
+            while self._heap and self._next_at.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+
+            delay = self._heap[0][0] - time.monotonic() if self._heap else 60
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, kpi_group_id = heapq.heappop(self._heap)
+            self._next_at.pop(kpi_group_id, None)
+            await semaphore.acquire()
+            self._in_flight.add(kpi_group_id)
+            task = asyncio.create_task(self._refresh(kpi_group_id))
+            task.add_done_callback(lambda _: semaphore.release())
+
+    async def _refresh(self, kpi_group_id: str):
+        stats = self._stats.setdefault(kpi_group_id, {"interval": 0, "lastRefresh": None, "failures": 0})
+        try:
+            fetched_at = ScheduleAPI._cache_time.get(kpi_group_id)
+            await ScheduleAPI.get_schedule(kpi_group_id, force=True)
+            ok = ScheduleAPI._cache_time.get(kpi_group_id) != fetched_at
+        except Exception as e:
+            logger.error(f"Помилка фонового оновлення розкладу {kpi_group_id}: {e}")
+            ok = False
+        finally:
+            self._in_flight.discard(kpi_group_id)
+
+        interval = refresh_interval()
+        if ok:
+            stats["failures"] = 0
+            stats["lastRefresh"] = datetime.utcnow().isoformat()
+            next_delay = _jittered(interval)
+        else:
+            stats["failures"] += 1
+            next_delay = _jittered(min(SCHEDULE_REFRESH_RETRY * stats["failures"], interval))
+        stats["interval"] = interval
+        ScheduleAPI._ttl[kpi_group_id] = interval * 2
+        if self.is_running:
+            self._push(kpi_group_id, time.monotonic() + next_delay)
+
+    def state(self) -> List[Dict[str, Any]]:
+        """Поточний стан черги (для моніторингу)"""
+        now = time.monotonic()
+        groups = set(self._next_at) | self._in_flight
+        return sorted(
+            (
+                {
+                    "kpiGroupId": kpi_group_id,
+                    "inFlight": kpi_group_id in self._in_flight,
+                    "nextRefreshIn": round(self._next_at[kpi_group_id] - now, 1) if kpi_group_id in self._next_at else None,
+                    **self._stats.get(kpi_group_id, {}),
+                }
+                for kpi_group_id in groups
+            ),
+            key=lambda item: item["nextRefreshIn"] if item["nextRefreshIn"] is not None else -1
+        )
+
+
+schedule_refresher = ScheduleRefresher()
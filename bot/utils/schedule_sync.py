@@ -0,0 +1,152 @@
+import logging
+from datetime import datetime
+from typing import Dict, Any, Set, Tuple
+from pymongo import UpdateOne
+from bot.utils.api import ScheduleAPI
+from bot.utils.names import normalize_name
+from database.connection import db
+from database.models import LinksManager, TenantsManager
+from database.invalidation import bus
+from database.documents import Link
+from bot.utils.link_index import get_link_index
+from config import GROUP_ID
+
+logger = logging.getLogger(__name__)
+
+Triple = Tuple[str, str, str]
+
+def _teacher_type(class_type: str) -> str:
+    return 'lecture' if 'Лек' in class_type else 'practice'
+
+def _normalize_triple(triple: Triple) -> Triple:
+    return tuple(normalize_name(part) for part in triple)
+
+
+class ScheduleSync:
+    """Синхронізація предметів і посилань з розкладом КПІ"""
+
+    @staticmethod
+    def extract_triples(schedule_data: Dict[str, Any]) -> Set[Triple]:
+        """Унікальні (назва, викладач, тип) з обох тижнів розкладу"""
+        triples = set()
+        for week_key in ('scheduleFirstWeek', 'scheduleSecondWeek'):
+            for day in schedule_data.get(week_key) or []:
+                for pair in day.get('pairs') or []:
+                    name = (pair.get('name') or '').strip()
+                    if not name:
+                        continue
+                    teacher = (pair.get('teacherName') or '').strip()
+                    class_type = (pair.get('type') or '').strip()
+                    triples.add((name, teacher, class_type))
+        return triples
+
+    @staticmethod
+    async def run_all():
+        """Синхронізація для всіх груп"""
+        for tenant in TenantsManager.all():
+            await ScheduleSync.run(tenant["groupId"])
+
+    @staticmethod
+    async def run(group_id: int = GROUP_ID) -> Dict[str, int]:
+        """Один прохід синхронізації: заготовки посилань/предметів та карта нормалізації"""
+        stats = {"triples": 0, "links_created": 0, "subjects_created": 0, "aliases": 0}
+
+        schedule_data = await ScheduleAPI.get_schedule(ScheduleAPI.kpi_group_for(group_id))
+        if not schedule_data:
+            logger.warning("Синхронізація пропущена: розклад недоступний")
+            return stats
+
+        triples = ScheduleSync.extract_triples(schedule_data)
+        stats["triples"] = len(triples)
+        if not triples:
+            return stats
+
+        projection = {"subject_name": 1, "teacher_name": 1, "class_type": 1}
+        existing_links: Dict[Triple, Triple] = {}
+        async for link in db.db.links.find({"groupId": group_id}, projection):
+            stored = (link.get("subject_name", ""), link.get("teacher_name", ""), link.get("class_type", ""))
+            existing_links.setdefault(_normalize_triple(stored), stored)
+
+        existing_subjects = set()
+        async for subject in db.db.subjects.find({"groupId": group_id}, {"name": 1}):
+            existing_subjects.add(normalize_name(subject.get("name", "")))
+
+        aliases: Dict[Triple, Triple] = {}
+        link_ops = []
+        placeholders = []
+        new_subjects: Dict[str, Dict[str, Any]] = {}
+        now = datetime.utcnow()
+
+        for triple in sorted(triples):
+            name, teacher, class_type = triple
+            stored = existing_links.get(_normalize_triple(triple))
+
+            if stored is None:
+                placeholder = {
+                    "meet_link": None,
+                    "classroom_link": None,
+                    "is_placeholder": True,
+                    "created_at": now,
+                    "updated_at": now
+                }
+                link_ops.append(UpdateOne(
+                    {"groupId": group_id, "subject_name": name, "teacher_name": teacher, "class_type": class_type},
+                    {"$setOnInsert": placeholder},
+                    upsert=True
+                ))
+                placeholders.append(Link(groupId=group_id, subject_name=name, teacher_name=teacher, class_type=class_type, **placeholder))
+                existing_links[_normalize_triple(triple)] = triple
+            elif stored != triple:
+                aliases[triple] = stored
+
+            subject_key = normalize_name(name)
+            if subject_key in existing_subjects:
+                continue
+            subject = new_subjects.setdefault(subject_key, {"name": name, "teachers": []})
+            teacher_entry = {"name": teacher, "type": _teacher_type(class_type), "contact": None}
+            if teacher and teacher_entry not in subject["teachers"]:
+                subject["teachers"].append(teacher_entry)
+
+        subject_ops = [
+            UpdateOne(
+                {"groupId": group_id, "name": subject["name"]},
+                {"$setOnInsert": {
+                    "name": subject["name"],
+                    "teachers": subject["teachers"],
+                    "resources": {},
+                    "teacherLecture": None,
+                    "teacherPractice": None,
+                    "note": None,
+                    "hasQueue": True,
+                    "hasTopics": True,
+                    "hasHomework": True
+                }},
+                upsert=True
+            )
+            for subject in new_subjects.values()
+        ]
+
+        try:
+            if link_ops:
+                result = await db.db.links.bulk_write(link_ops, ordered=False)
+                stats["links_created"] = result.upserted_count
+                index = get_link_index(group_id)
+                for placeholder in placeholders:
+                    index.upsert(placeholder)
+                await bus.publish("links")
+            if subject_ops:
+                result = await db.db.subjects.bulk_write(subject_ops, ordered=False)
+                stats["subjects_created"] = result.upserted_count
+                await bus.publish("subjects")
+        except Exception as e:
+            logger.error(f"Помилка синхронізації з розкладом: {e}")
+
+        LinksManager.set_aliases(aliases, group_id)
+        stats["aliases"] = len(aliases)
+
+        logger.info(
+            f"Синхронізація з розкладом ({group_id}): {stats['triples']} пар, "
+            f"нових посилань {stats['links_created']}, предметів {stats['subjects_created']}, "
+            f"псевдонімів {stats['aliases']}"
+        )
+        return stats
@@ -1,28 +1,35 @@
 import asyncio
 import logging
 from datetime import datetime, timedelta, date
-from typing import Optional
+from typing import Optional, Dict, Any
 import pytz
 from aiogram import Bot
 from bot.utils.api import ScheduleAPI, get_class_end_time 
-from database.models import LinksManager, SettingsManager
-from config import GROUP_ID, NOTIFICATION_MINUTES_BEFORE, TIMEZONE
+from bot.utils.reminders import ReminderFanout, format_class_reminder
+from bot.utils.clock import Clock, clock as default_clock
+from database.models import LinksManager, SettingsManager, HomeworkManager, SubjectsManager, TenantsManager
+from config import NOTIFICATION_MINUTES_BEFORE, TIMEZONE, HOMEWORK_REMINDER_HOUR, HOMEWORK_REMINDER_WINDOW_HOURS
 
 logger = logging.getLogger(__name__)
 
 class NotificationScheduler:
     """Планувальник автоматичних повідомлень про пари"""
     
-    def __init__(self, bot: Bot):
+    def __init__(self, bot: Bot, clock: Clock = default_clock):
         self.bot = bot
+        self.clock = clock
         self.is_running = False
         self.task = None
-        self.last_gif_sent_date: Optional[date] = None 
+        # Стан по групах: groupId -> дата останнього надсилання
+        self.last_gif_sent_date: Dict[int, date] = {}
+        self.last_homework_digest_date: Dict[int, date] = {}
+        self.reminders = ReminderFanout(bot)
     
     async def start(self):
         """Запуск планувальника"""
         if not self.is_running:
             self.is_running = True
+            await self.reminders.start()
             self.task = asyncio.create_task(self._schedule_loop())
             logger.info("Планувальник повідомлень запущено")
     
@@ -35,32 +42,45 @@ class NotificationScheduler:
                 await self.task
             except asyncio.CancelledError:
                 pass
+        await self.reminders.stop()
         logger.info("Планувальник повідомлень зупинено")
     
     async def _schedule_loop(self):
         """Основний цикл планувальника"""
         while self.is_running:
             try:
-                await self._check_upcoming_classes()
-                await self._check_end_of_day_gif() 
-                
-                await asyncio.sleep(60)
+                await asyncio.gather(*(self._run_tenant(t) for t in TenantsManager.all()))
             except Exception as e:
                 logger.error(f"Помилка в планувальнику: {e}")
-                await asyncio.sleep(60)
+            # Тік на початку кожної хвилини: sleep(60) після обробки накопичував
+            # затримку, і хвилинне вікно сповіщення могло випасти
+            await asyncio.sleep(self.clock.seconds_to_next_minute())
+    
+    async def _run_tenant(self, tenant: Dict[str, Any]):
+        """Усі перевірки планувальника для однієї групи"""
+        await self._check_upcoming_classes(tenant)
+        await self._check_end_of_day_gif(tenant)
+        await self._check_homework_digest(tenant)
+        await self._check_personal_reminders(tenant)
+    
+    async def _check_personal_reminders(self, tenant: Dict[str, Any]):
+        """Особисті нагадування: лише постановка в чергу, розсилають воркери"""
+        try:
+            await self.reminders.tick(tenant, self.clock.now())
+        except Exception as e:
+            logger.error(f"Помилка особистих нагадувань: {e}")
     
-    async def _check_upcoming_classes(self):
+    async def _check_upcoming_classes(self, tenant: Dict[str, Any]):
         """Перевірка майбутніх пар та надсилання сповіщень"""
         try:
-            notifications_enabled = await SettingsManager.get_setting("notifications_enabled", True)
-            if not notifications_enabled:
+            group_id = tenant["groupId"]
+            if not SettingsManager.notifications_enabled(group_id):
                 return
-            schedule_data = await ScheduleAPI.get_schedule()
+            schedule_data = await ScheduleAPI.get_schedule(tenant.get("kpiGroupId"))
             if not schedule_data:
                 return
             
-            kiev_tz = pytz.timezone(TIMEZONE)
-            now = datetime.now(kiev_tz)
+            now = self.clock.now()
             
             today = now.strftime('%A')
             
@@ -92,12 +112,12 @@ class NotificationScheduler:
                 return
             
             for class_data in today_classes:
-                await self._check_class_notification(class_data, now)
+                await self._check_class_notification(class_data, now, group_id)
                 
         except Exception as e:
             logger.error(f"Помилка перевірки майбутніх пар: {e}")
     
-    async def _check_class_notification(self, class_data: dict, current_time: datetime):
+    async def _check_class_notification(self, class_data: dict, current_time: datetime, group_id: int):
         """Перевірка конкретної пари на необхідність сповіщення"""
         try:
             class_time_str = class_data.get('time', '')
@@ -121,51 +141,34 @@ class NotificationScheduler:
             
             notification_time = class_datetime - timedelta(minutes=NOTIFICATION_MINUTES_BEFORE)
             
-            time_diff = (notification_time - current_time).total_seconds()
+            # Надсилаємо на тіку за хвилину до моменту сповіщення. Порівняння
+            # хвилин, а не вікно 0..60 с: тіки з інтервалом трохи менше хвилини
+            # потрапляли у вікно обидва і дублювали сповіщення
+            tick_minute = current_time.replace(second=0, microsecond=0)
             
-            if 0 <= time_diff <= 60:
-                await self._send_class_notification(class_data)
+            if tick_minute + timedelta(minutes=1) == notification_time.replace(second=0, microsecond=0):
+                await self._send_class_notification(class_data, group_id)
                 
         except Exception as e:
             logger.error(f"Помилка перевірки сповіщення для пари: {e}")
     
-    async def _send_class_notification(self, class_data: dict):
+    async def _send_class_notification(self, class_data: dict, group_id: int):
         """Надсилання сповіщення про пару"""
         try:
             subject_name = class_data.get('name', '')
             teacher_name = class_data.get('teacherName', '')
             class_type = class_data.get('type', '')
-            class_time = class_data.get('time', '')
-            place = class_data.get('place', '')
             
-            link_data = await LinksManager.get_link(subject_name, teacher_name, class_type)
+            link_data = await LinksManager.get_link(subject_name, teacher_name, class_type, group_id)
             
-            if not link_data:
+            if not link_data or not (link_data.get('meet_link') or link_data.get('classroom_link')):
                 logger.info(f"Посилання не знайдено для: {subject_name} - {teacher_name} ({class_type})")
                 return
             
-            message = f"🔔 **Нагадування про пару через {NOTIFICATION_MINUTES_BEFORE} хвилин!**\n\n"
-            message += f"⏰ **Час:** {class_time}\n"
-            message += f"📚 **Предмет:** {subject_name}\n"
-            message += f"👨‍🏫 **Викладач:** {teacher_name}\n"
-            message += f"📝 **Тип:** {class_type}\n"
-            
-            if place:
-                message += f"📍 **Місце:** {place}\n"
-            
-            message += "\n"
-            
-            meet_link = link_data.get('meet_link')
-            classroom_link = link_data.get('classroom_link')
-            
-            if meet_link:
-                message += f"🔗 [Приєднатися до зустрічі]({meet_link})\n"
-            
-            if classroom_link:
-                message += f"📖 [Google Classroom]({classroom_link})\n"
+            message = format_class_reminder(class_data, link_data, NOTIFICATION_MINUTES_BEFORE)
             
             await self.bot.send_message(
-                chat_id=GROUP_ID,
+                chat_id=group_id,
                 text=message,
                 parse_mode='Markdown',
                 disable_web_page_preview=True
@@ -176,22 +179,22 @@ class NotificationScheduler:
         except Exception as e:
             logger.error(f"Помилка надсилання сповіщення: {e}")
 
-    async def _check_end_of_day_gif(self):
+    async def _check_end_of_day_gif(self, tenant: Dict[str, Any]):
         """Перевірка закінчення останньої пари для надсилання GIF"""
         try:
+            group_id = tenant["groupId"]
             # 1. ПЕРЕВІРКА НАЛАШТУВАННЯ СПОВІЩЕНЬ
-            notifications_enabled = await SettingsManager.get_setting("notifications_enabled", True)
-            if not notifications_enabled:
+            if not SettingsManager.notifications_enabled(group_id):
                 return
 
             kiev_tz = pytz.timezone(TIMEZONE)
-            now = datetime.now(kiev_tz)
+            now = self.clock.now()
             today = now.date()
 
-            if self.last_gif_sent_date == today:
+            if self.last_gif_sent_date.get(group_id) == today:
                 return 
             
-            schedule_data = await ScheduleAPI.get_schedule()
+            schedule_data = await ScheduleAPI.get_schedule(tenant.get("kpiGroupId"))
             if not schedule_data:
                 return
 
@@ -244,15 +247,58 @@ class NotificationScheduler:
                 
                 try:
                     await self.bot.send_animation(
-                        chat_id=GROUP_ID,
+                        chat_id=group_id,
                         animation=gif_url,
                         caption="🎉 Пари закінчились! Час відпочивати!"
                     )
                     
-                    self.last_gif_sent_date = today
+                    self.last_gif_sent_date[group_id] = today
                     
                 except Exception as e:
                     logger.error(f"Помилка надсилання GIF: {e}")
 
         except Exception as e:
-            logger.error(f"Помилка перевірки кінця дня (GIF): {e}")
\ No newline at end of file
+            logger.error(f"Помилка перевірки кінця дня (GIF): {e}")
+
+    async def _check_homework_digest(self, tenant: Dict[str, Any]):
+        """Щоденний дайджест дедлайнів: усі домашки з вікна одним повідомленням"""
+        try:
+            group_id = tenant["groupId"]
+            if not SettingsManager.notifications_enabled(group_id):
+                return
+
+            kiev_tz = pytz.timezone(TIMEZONE)
+            now = self.clock.now()
+            today = now.date()
+
+            if self.last_homework_digest_date.get(group_id) == today or now.hour != HOMEWORK_REMINDER_HOUR:
+                return
+
+            homeworks = await HomeworkManager.get_upcoming(HOMEWORK_REMINDER_WINDOW_HOURS, group_id, now=self.clock.utcnow())
+            self.last_homework_digest_date[group_id] = today
+            if not homeworks:
+                return
+
+            subject_names = await SubjectsManager.get_names([h.get("subjectId", "") for h in homeworks])
+
+            by_subject = {}
+            for h in homeworks:
+                by_subject.setdefault(h.get("subjectId"), []).append(h)
+
+            message = f"📝 Дедлайни на найближчі {HOMEWORK_REMINDER_WINDOW_HOURS} год:\n"
+            for subject_id, items in by_subject.items():
+                message += f"\n📚 {subject_names.get(subject_id, 'Без предмета')}\n"
+                for h in items:
+                    deadline_local = pytz.utc.localize(h["deadlineAt"]).astimezone(kiev_tz)
+                    message += f"• {h.get('text', '').strip()} — до {deadline_local.strftime('%d.%m %H:%M')}\n"
+
+            await self.bot.send_message(
+                chat_id=group_id,
+                text=message,
+                parse_mode=None,
+                disable_web_page_preview=True
+            )
+            logger.info(f"Надіслано дайджест дедлайнів: {len(homeworks)} завдань")
+
+        except Exception as e:
+            logger.error(f"Помилка надсилання дайджесту дедлайнів: {e}")
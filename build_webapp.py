@@ -0,0 +1,147 @@
+"""Збірка Mini App: JSX з webapp/index.html -> мініфіковані бандли з хешем в імені.
+
+Запуск: npm install && npm run build:webapp (або python build_webapp.py [--no-budget])
+
+Потрібен esbuild версії ESBUILD_VERSION — закріплений у package.json, ставиться
+в node_modules/.bin через npm install (або лежить у PATH). Це ручний крок
+перед деплоєм, а не частина requirements: без збірки main.py роздає вихідний
+webapp/index.html з Babel у браузері, як і раніше.
+
+Компоненти розбиваються на окремі файли (спільна частина, предмети, черга, теми,
+ДЗ, розклад, App) лише для кешування: зміна одного екрана не скидає кеш решти.
+Усі бандли завантажуються одразу (defer), лінивого завантаження екранів немає.
+JSX транспілюється та мініфікується, Babel у браузері більше не завантажується.
+Результат — webapp/dist, який main.py роздає, поки він не старіший за джерело.
+"""
+import gzip
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from api.compression import precompress
+
+SOURCE = os.path.join("webapp", "index.html")
+DIST = os.path.join("webapp", "dist")
+
+# Має збігатися з devDependencies.esbuild у package.json
+ESBUILD_VERSION = "0.20.2"
+
+BABEL_SCRIPT = '<script src="https://unpkg.com/@babel/standalone/babel.min.js"></script>'
+
+# Бандл -> компоненти (функції верхнього рівня); все інше йде в "core"
+CHUNKS: List[Tuple[str, List[str]]] = [
+    ("core", []),
+    ("subjects", ["SettingsModal", "SubjectsList", "SubjectDetails", "Resources"]),
+    ("queue", ["Queue"]),
+    ("topics", ["Topics"]),
+    ("homework", ["Homework"]),
+    ("schedule", ["Schedule"]),
+    ("app", ["App"]),
+]
+
+# Бюджет розміру після gzip (байти)
+BUDGET_CHUNK = 12 * 1024
+BUDGET_TOTAL = 32 * 1024
+
+_SCRIPT_RE = re.compile(r'\s*<script type="text/babel">(.*?)</script>', re.S)
+_FUNCTION_RE = re.compile(r"^ {8}function (\w+)\(", re.M)
+_RENDER_RE = re.compile(r"^ {8}const root = ReactDOM", re.M)
+
+
+def split_components(code: str) -> Dict[str, str]:
+    """Розбиття коду на бандли за межами функцій-компонентів верхнього рівня"""
+    owner = {name: chunk for chunk, names in CHUNKS for name in names}
+    parts: Dict[str, List[str]] = {chunk: [] for chunk, _ in CHUNKS}
+
+    render = _RENDER_RE.search(code)
+    body, tail = (code[:render.start()], code[render.start():]) if render else (code, "")
+    matches = list(_FUNCTION_RE.finditer(body))
+
+    parts["core"].append(body[:matches[0].start()] if matches else body)
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(body)
+        parts[owner.get(match.group(1), "core")].append(body[match.start():end])
+    parts["app"].append(tail)
+    return {chunk: "".join(chunks) for chunk, chunks in parts.items() if "".join(chunks).strip()}
+
+
+def find_esbuild() -> Optional[str]:
+    """esbuild з package.json (node_modules/.bin), інакше з PATH"""
+    local = os.path.join("node_modules", ".bin", "esbuild")
+    return local if os.path.exists(local) else shutil.which("esbuild")
+
+
+def esbuild_version(esbuild: str) -> str:
+    result = subprocess.run([esbuild, "--version"], capture_output=True, check=False)
+    return result.stdout.decode("utf-8").strip()
+
+
+def transpile(code: str, esbuild: str) -> str:
+    result = subprocess.run(
+        [esbuild, "--loader=jsx", "--minify", "--target=es2018",
+         "--jsx-factory=React.createElement", "--jsx-fragment=React.Fragment"],
+        input=code.encode("utf-8"), capture_output=True, check=False
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode("utf-8", "replace"))
+    return result.stdout.decode("utf-8")
+
+
+def build(check_budget: bool = True) -> int:
+    with open(SOURCE, encoding="utf-8") as f:
+        html = f.read()
+
+    match = _SCRIPT_RE.search(html)
+    if not match:
+        print(f"У {SOURCE} не знайдено <script type=\"text/babel\">")
+        return 1
+
+    esbuild = find_esbuild()
+    if esbuild is None:
+        # Бандли text/babel нічого не дають порівняно з вихідним index.html
+        print("❌ esbuild не знайдено: виконайте npm install (версія з package.json). Роздається webapp/index.html")
+        return 1
+    version = esbuild_version(esbuild)
+    if version != ESBUILD_VERSION:
+        print(f"❌ esbuild {version or '?'} замість закріпленого {ESBUILD_VERSION}: виконайте npm install")
+        return 1
+
+    shutil.rmtree(DIST, ignore_errors=True)
+    os.makedirs(DIST)
+
+    tags, sizes = [], []
+    for chunk, code in split_components(match.group(1)).items():
+        output = transpile(code, esbuild)
+        data = output.encode("utf-8")
+        name = f"{chunk}.{hashlib.sha256(data).hexdigest()[:10]}.js"
+        with open(os.path.join(DIST, name), "wb") as f:
+            f.write(data)
+        sizes.append((name, len(data), len(gzip.compress(data, 9))))
+        tags.append(f'<script defer src="/{name}"></script>')
+
+    page = html[:match.start()] + "\n    " + "\n    ".join(tags) + html[match.end():]
+    page = page.replace(BABEL_SCRIPT, "")
+    with open(os.path.join(DIST, "index.html"), "w", encoding="utf-8") as f:
+        f.write(page)
+    precompress(DIST)
+
+    total = sum(gz for _, _, gz in sizes)
+    print(f"{'Файл':<28}{'байт':>10}{'gzip':>10}")
+    for name, raw, gz in sizes:
+        flag = "  ⚠️ понад бюджет" if gz > BUDGET_CHUNK else ""
+        print(f"{name:<28}{raw:>10}{gz:>10}{flag}")
+    print(f"{'Разом':<28}{sum(raw for _, raw, _ in sizes):>10}{total:>10}")
+
+    over = total > BUDGET_TOTAL or any(gz > BUDGET_CHUNK for _, _, gz in sizes)
+    if over and check_budget:
+        print(f"❌ Перевищено бюджет: {BUDGET_CHUNK} Б на бандл, {BUDGET_TOTAL} Б разом (gzip)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(build(check_budget="--no-budget" not in sys.argv))
@@ -5,6 +5,8 @@ from dotenv import load_dotenv
 load_dotenv()
 
 BOT_TOKEN = os.getenv('BOT_TOKEN')
+# Власний сервер Bot API (локальний telegram-bot-api або фейковий з benchmarks/load)
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL')
 
 GROUP_ID = int(os.getenv('GROUP_ID'))
 
@@ -12,14 +14,82 @@ admin_env = os.getenv('ADMIN_ID', '')
 ADMIN_IDS = [int(id_str.strip()) for id_str in admin_env.split(',') if id_str.strip()]
 
 MONGODB_URL = os.getenv('MONGODB_URL', 'mongodb://localhost:27017/university_bot')
+MONGO_DATABASE = os.getenv('MONGO_DATABASE', 'university_bot')
+
+# Пул з'єднань MongoDB і таймаути (мс): без них збій бази вішає кожен хендлер на 30 с
+MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', '50'))
+MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', '2'))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv('MONGO_MAX_IDLE_TIME_MS', '60000'))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', '5000'))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', '20000'))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', '5000'))
+MONGO_RETRY_READS = os.getenv('MONGO_RETRY_READS', '1') != '0'
+MONGO_RETRY_WRITES = os.getenv('MONGO_RETRY_WRITES', '1') != '0'
+# Стиснення трафіку в порядку пріоритету; недоступні бібліотеки (zstandard, python-snappy) пропускаються
+MONGO_COMPRESSORS = [c.strip() for c in os.getenv('MONGO_COMPRESSORS', 'zstd,snappy,zlib').split(',') if c.strip()]
+# Read preference для db.read_db: лише читання, яким не шкодять застарілі дані і які
+# не читають щойно записане тим самим клієнтом (/api/subjects і /api/users ідуть на primary)
+MONGO_READ_ONLY_PREFERENCE = os.getenv('MONGO_READ_ONLY_PREFERENCE', 'secondaryPreferred')
+
+# Точкові find_one, які об'єднуються в один $in-запит (колекція -> поля)
+MONGO_BATCHED_READS = {
+    "users": ("telegramId", "_id"),
+    "queues": ("_id", "subjectId"),
+}
 
 KPI_GROUP_ID = os.getenv('KPI_GROUP_ID')
-KPI_API_URL = f"https://api.campus.kpi.ua/schedule/lessons?groupId={KPI_GROUP_ID}"
+KPI_API_BASE = os.getenv('KPI_API_BASE', "https://api.campus.kpi.ua/schedule/lessons")
+KPI_API_URL = f"{KPI_API_BASE}?groupId={KPI_GROUP_ID}"
 WEBAPP_URL = "https://ip-55.onrender.com"
 TIMEZONE = 'Europe/Kiev'
 
 NOTIFICATION_MINUTES_BEFORE = 10
 
+# Особисті нагадування в приватні повідомлення
+REMINDER_MAX_LEADS = 3
+REMINDER_MAX_LEAD_MINUTES = 180
+REMINDER_WORKERS = 8
+REMINDER_RATE_PER_SECOND = 25   # ліміт Telegram ~30 повідомлень/с на бота
+
+# Щоденний дайджест дедлайнів домашніх завдань
+HOMEWORK_REMINDER_HOUR = 18
+HOMEWORK_REMINDER_WINDOW_HOURS = 48
+
+MAX_TOPICS_PER_USER = 2
+
+# Як часто перевіряти зміни кешованих колекцій з інших процесів (якщо немає change streams), секунди
+INVALIDATION_POLL_INTERVAL = 10
+
+# Буфер оновлень учасників: запис у БД раз на інтервал (секунди) або після стількох подій
+MEMBER_FLUSH_INTERVAL = 5
+MEMBER_FLUSH_MAX_EVENTS = 500
+
+# Звірка учасників з Telegram: раз на інтервал (секунди), не більше стількох
+# перевірок get_chat_member на групу за прохід і запитів за секунду
+MEMBERSHIP_SYNC_INTERVAL = 6 * 60 * 60
+MEMBERSHIP_SYNC_MAX_CHECKS = 100
+MEMBERSHIP_SYNC_RATE_PER_SECOND = 5
+
+# Скільки живе незавершений діалог (стан FSM) після останньої дії, секунди
+FSM_STATE_TTL = 6 * 60 * 60
+
+SCHEDULE_CACHE_TTL = 300
+
+# Фонове оновлення розкладів КПІ (секунди)
+SCHEDULE_REFRESH_CONCURRENCY = 2
+SCHEDULE_REFRESH_JITTER = 0.1
+SCHEDULE_REFRESH_INTERVAL_START = 15 * 60      # перші тижні семестру: розклад ще змінюється
+SCHEDULE_REFRESH_INTERVAL_DEFAULT = 60 * 60
+SCHEDULE_REFRESH_INTERVAL_MIDTERM = 6 * 60 * 60
+SCHEDULE_REFRESH_RETRY = 5 * 60
+# Початок семестрів (місяць, день) і скільки тижнів вважати "початком"
+SEMESTER_STARTS = ((9, 1), (2, 1))
+SEMESTER_START_WEEKS = 3
+
+# Мінімальна впевненість нечіткого збігу посилання з парою (0..1)
+LINK_MATCH_THRESHOLD = 0.7
+
 DAYS_TRANSLATION = {
     'Пн': 'Понеділок',
     'Вв': 'Вівторок', 
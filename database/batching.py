@@ -0,0 +1,120 @@
+import asyncio
+import copy
+import weakref
+from typing import Dict, Any, List, Optional, Tuple
+
+# Скільки чекати на сусідні запити перед спільним $in (секунди)
+BATCH_WINDOW = 0.001
+# Більший пакет відправляється одразу, не чекаючи вікна
+MAX_BATCH_SIZE = 500
+
+
+class _PendingBatch:
+    __slots__ = ("waiters", "handle")
+
+    def __init__(self):
+        self.waiters: Dict[Any, List[asyncio.Future]] = {}
+        self.handle: Optional[asyncio.TimerHandle] = None
+
+
+class PointReadLoader:
+    """DataLoader для find_one за одним полем однієї колекції.
+
+    Запити, що прийшли в межах BATCH_WINDOW, об'єднуються в один
+    find({field: {"$in": [...]}}), однакові ключі — в один. Кожен
+    очікувач отримує власну копію документа, бо маршрути змінюють
+    знайдені документи на місці.
+    """
+
+    def __init__(self, collection, field: str, window: float = BATCH_WINDOW):
+        self.collection = collection
+        self.field = field
+        self.window = window
+        # Окремий пакет для кожного event loop
+        self._pending: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _PendingBatch]" = weakref.WeakKeyDictionary()
+        self.stats = {"calls": 0, "queries": 0}
+
+    def load(self, key: Any) -> "asyncio.Future":
+        loop = asyncio.get_running_loop()
+        batch = self._pending.get(loop)
+        if batch is None:
+            batch = self._pending[loop] = _PendingBatch()
+            batch.handle = loop.call_later(self.window, self._dispatch, loop)
+
+        future = loop.create_future()
+        batch.waiters.setdefault(key, []).append(future)
+        self.stats["calls"] += 1
+        if len(batch.waiters) >= MAX_BATCH_SIZE:
+            batch.handle.cancel()
+            self._dispatch(loop)
+        return future
+
+    def _dispatch(self, loop: asyncio.AbstractEventLoop):
+        batch = self._pending.pop(loop, None)
+        if batch is not None:
+            loop.create_task(self._run(batch.waiters))
+
+    async def _run(self, waiters: Dict[Any, List[asyncio.Future]]):
+        self.stats["queries"] += 1
+        try:
+            found: Dict[Any, Dict[str, Any]] = {}
+            async for doc in self.collection.find({self.field: {"$in": list(waiters)}}):
+                found.setdefault(doc.get(self.field), doc)
+        except Exception as e:
+            for futures in waiters.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for key, futures in waiters.items():
+            doc = found.get(key)
+            for i, future in enumerate(futures):
+                if future.done():
+                    continue
+                future.set_result(doc if doc is None or i == 0 else copy.deepcopy(doc))
+
+
+class BatchedCollection:
+    """Обгортка колекції Motor: find_one за налаштованим полем іде через PointReadLoader,
+    решта методів — без змін."""
+
+    def __init__(self, collection, fields: Tuple[str, ...]):
+        self._collection = collection
+        self._loaders = {field: PointReadLoader(collection, field) for field in fields}
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    def __getitem__(self, name):
+        return self._collection[name]
+
+    def find_one(self, filter=None, *args, **kwargs):
+        if not args and not kwargs and isinstance(filter, dict) and len(filter) == 1:
+            (field, value), = filter.items()
+            loader = self._loaders.get(field)
+            if loader is not None and not isinstance(value, (dict, list)):
+                return loader.load(value)
+        return self._collection.find_one(filter, *args, **kwargs)
+
+    @property
+    def loader_stats(self) -> Dict[str, Dict[str, int]]:
+        return {field: loader.stats for field, loader in self._loaders.items()}
+
+
+class BatchedDatabase:
+    """Обгортка бази Motor, що підміняє лише колекції з точковими читаннями"""
+
+    def __init__(self, database, batched: Dict[str, Tuple[str, ...]]):
+        self._database = database
+        self._collections = {name: BatchedCollection(database[name], fields) for name, fields in batched.items()}
+
+    def __getattr__(self, name):
+        if name in self._collections:
+            return self._collections[name]
+        return getattr(self._database, name)
+
+    def __getitem__(self, name):
+        if name in self._collections:
+            return self._collections[name]
+        return self._database[name]
@@ -1,47 +1,156 @@
+import asyncio
+import importlib.util
+import time
+from typing import Dict, Any, List, Optional, Tuple
 from motor.motor_asyncio import AsyncIOMotorClient
-from config import MONGODB_URL
+from pymongo.read_preferences import make_read_preference, read_pref_mode_from_name
+from config import (
+    MONGODB_URL, MONGO_BATCHED_READS, MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_TIME_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_CONNECT_TIMEOUT_MS, MONGO_SOCKET_TIMEOUT_MS,
+    MONGO_WAIT_QUEUE_TIMEOUT_MS, MONGO_RETRY_READS, MONGO_RETRY_WRITES, MONGO_COMPRESSORS,
+    MONGO_READ_ONLY_PREFERENCE, MONGO_DATABASE
+)
+from database.batching import BatchedDatabase
+from database.monitoring import pool_stats
 import logging
 
 logger = logging.getLogger(__name__)
 
+DATABASE_NAME = MONGO_DATABASE
+
+# Стиснення -> модуль, без якого pymongo його не підтримує
+_COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": None}
+
+def available_compressors() -> List[str]:
+    return [
+        c for c in MONGO_COMPRESSORS
+        if c in _COMPRESSOR_MODULES
+        and (_COMPRESSOR_MODULES[c] is None or importlib.util.find_spec(_COMPRESSOR_MODULES[c]) is not None)
+    ]
+
+def client_options() -> Dict[str, Any]:
+    """Параметри AsyncIOMotorClient з config.py"""
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "retryReads": MONGO_RETRY_READS,
+        "retryWrites": MONGO_RETRY_WRITES,
+        "appname": "university-bot",
+        "event_listeners": [pool_stats],
+    }
+    compressors = available_compressors()
+    if compressors:
+        options["compressors"] = compressors
+    return options
+
 class Database:
     def __init__(self):
         self.client = None
         self.db = None
+        # Та сама база з MONGO_READ_ONLY_PREFERENCE: лише для читань, яким не шкодить
+        # відставання репліки (не read-your-writes і не для ключів кешів)
+        self.read_db = None
+        self.index_task: Optional[asyncio.Task] = None
+        # Стан фонової побудови індексів (віддається в /readyz)
+        self.index_status: Dict[str, Any] = {"state": "pending"}
     
     async def connect(self):
-        """Підключення до MongoDB"""
+        """Підключення до MongoDB; індекси будуються у фоні"""
         try:
-            self.client = AsyncIOMotorClient(MONGODB_URL)
-            self.db = self.client.university_bot
+            options = client_options()
+            self.client = AsyncIOMotorClient(MONGODB_URL, **options)
+            # Точкові читання з конкурентних запитів групуються в пакети
+            self.db = BatchedDatabase(self.client[DATABASE_NAME], MONGO_BATCHED_READS)
+            self.read_db = self.client.get_database(
+                DATABASE_NAME,
+                read_preference=make_read_preference(read_pref_mode_from_name(MONGO_READ_ONLY_PREFERENCE), None)
+            )
             
-            await self.client.admin.command('ismaster')
-            logger.info("Успішно підключено до MongoDB")
+            await self.client.admin.command('ping')
+            logger.info(
+                f"Успішно підключено до MongoDB (пул {MONGO_MIN_POOL_SIZE}..{MONGO_MAX_POOL_SIZE}, "
+                f"стиснення: {', '.join(options.get('compressors', [])) or 'немає'})"
+            )
             
-            await self.create_indexes()
+            # Унікальні індекси, на які покладаються записи, — до обслуговування запитів
+            for collection, keys, options in self._required_index_specs():
+                await self.db[collection].create_index(keys, **options)
+            self.index_task = asyncio.create_task(self.create_indexes())
             
         except Exception as e:
             logger.error(f"Помилка підключення до MongoDB: {e}")
             raise
     
+    def _required_index_specs(self) -> List[Tuple[str, Any, Dict[str, Any]]]:
+        """Індекси, без яких код некоректний; створюються в connect(), а не у фоні.
+
+        claim_topic виявляє паралельні бронювання через DuplicateKeyError:
+        без унікального індексу виникли б дублікати лічильників і ліміт тем
+        можна було б обійти.
+        """
+        return [
+            ("topic_claims", [("subjectId", 1), ("userId", 1)], {"unique": True}),
+        ]
+
+    def _index_specs(self) -> List[Tuple[str, Any, Dict[str, Any]]]:
+        """(колекція, ключі, параметри) усіх індексів застосунку"""
+        return [
+            ("tenants", "groupId", {"unique": True}),
+            ("links", [("groupId", 1), ("subject_name", 1), ("teacher_name", 1), ("class_type", 1)], {"unique": True}),
+            ("group_members", [("groupId", 1), ("user_id", 1)], {"unique": True}),
+            ("group_members", [("user_id", 1), ("is_active", 1)], {}),
+            ("group_members", [("groupId", 1), ("is_active", 1), ("checked_at", 1)], {}),
+            ("group_members", [("groupId", 1), ("reminder_leads", 1)],
+             {"partialFilterExpression": {"reminder_leads": {"$exists": True}}}),
+            ("settings", [("groupId", 1), ("key", 1)], {"unique": True}),
+            ("subjects", [("groupId", 1), ("name", 1)], {}),
+            ("queues", [("groupId", 1), ("subjectId", 1)], {}),
+            ("queues", "subjectId", {}),
+            ("users", "telegramId", {}),
+            ("homework", [("groupId", 1), ("deadlineAt", 1)], {}),
+            ("homework", [("subjectId", 1), ("createdAt", -1)], {}),
+            ("topics", "subjectId", {}),
+            # Покинуті діалоги FSM видаляються автоматично
+            ("fsm_states", "expiresAt", {"expireAfterSeconds": 0}),
+        ]
+    
     async def create_indexes(self):
-        """Створення індексів для оптимізації"""
-        try:
-            await self.db.links.create_index([
-                ("subject_name", 1),
-                ("teacher_name", 1),
-                ("class_type", 1)
-            ], unique=True)
-            
-            await self.db.group_members.create_index("user_id", unique=True)
-            
-            logger.info("Індекси створено успішно")
-            
-        except Exception as e:
-            logger.error(f"Помилка створення індексів: {e}")
+        """Створення індексів для оптимізації (паралельно, з обліком стану)"""
+        started = time.perf_counter()
+        self.index_status = {"state": "running", "created": 0, "failed": []}
+        
+        # Унікальні індекси без groupId (одна група на процес) заважають мультигруповості
+        for collection, name in (
+            ("links", "subject_name_1_teacher_name_1_class_type_1"),
+            ("group_members", "user_id_1")
+        ):
+            try:
+                await self.db[collection].drop_index(name)
+            except Exception:
+                pass
+        
+        async def create(collection: str, keys: Any, options: Dict[str, Any]):
+            try:
+                await self.db[collection].create_index(keys, **options)
+                self.index_status["created"] += 1
+            except Exception as e:
+                logger.error(f"Помилка створення індексу {collection} {keys}: {e}")
+                self.index_status["failed"].append(f"{collection}: {keys}")
+        
+        await asyncio.gather(*(create(*spec) for spec in self._index_specs()))
+        self.index_status["state"] = "failed" if self.index_status["failed"] else "done"
+        self.index_status["seconds"] = round(time.perf_counter() - started, 3)
+        logger.info(f"Індекси: створено {self.index_status['created']}, помилок {len(self.index_status['failed'])}")
     
     async def disconnect(self):
         """Відключення від MongoDB"""
+        if self.index_task and not self.index_task.done():
+            self.index_task.cancel()
         if self.client:
             self.client.close()
             logger.info("Відключено від MongoDB")
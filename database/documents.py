@@ -0,0 +1,228 @@
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+from bson import ObjectId
+
+_MISSING = object()
+
+
+def _jsonable(value: Any) -> Any:
+    """BSON-значення -> JSON-сумісне (ObjectId -> str, datetime -> ISO 8601)"""
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    return value
+
+
+class Document:
+    """Компактний документ MongoDB на __slots__.
+
+    Поля, яких немає в документі, лишаються незаповненими слотами, тож
+    get/in/[] поводяться як у словника, і код, що працював із сирими
+    dict, працює без змін. Поля поза схемою зберігаються в _extra, щоб
+    нічого не губилося при записі назад. _id зберігається як є (ObjectId)
+    і стає рядком лише в to_json.
+    """
+
+    __slots__ = ("_id", "_extra")
+
+    # Ключі документа, для яких є слоти, у порядку схеми (заповнюється в __init_subclass__)
+    _fields: Tuple[str, ...] = ()
+    _keys: frozenset = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        fields = []
+        for klass in reversed(cls.__mro__):
+            fields.extend(f for f in klass.__dict__.get("__slots__", ()) if f != "_extra")
+        cls._fields = tuple(fields)
+        cls._keys = frozenset(fields)
+
+    def __init__(self, **fields: Any):
+        self._extra = None
+        for key, value in fields.items():
+            self._set(key, value)
+
+    def _set(self, key: str, value: Any):
+        if key in self._keys:
+            object.__setattr__(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    @classmethod
+    def from_bson(cls, doc: Optional[Dict[str, Any]]):
+        """Обгортка над уже декодованим драйвером dict (без власного декодування BSON).
+
+        Значення не копіюються, лише розкладаються по слотах: виграш — у
+        пам'яті на документ і в серіалізації без jsonable_encoder, а не в
+        швидкості читання з бази.
+        """
+        if doc is None:
+            return None
+        obj = cls.__new__(cls)
+        obj._extra = None
+        keys = cls._keys
+        for key, value in doc.items():
+            if key in keys:
+                object.__setattr__(obj, key, value)
+            else:
+                if obj._extra is None:
+                    obj._extra = {}
+                obj._extra[key] = value
+        return obj
+
+    @classmethod
+    def from_bson_list(cls, docs: Iterable[Dict[str, Any]]) -> List["Document"]:
+        from_bson = cls.from_bson
+        return [from_bson(d) for d in docs]
+
+    def items(self) -> Iterable[Tuple[str, Any]]:
+        for key in self._fields:
+            value = getattr(self, key, _MISSING)
+            if value is not _MISSING:
+                yield key, value
+        if self._extra:
+            yield from self._extra.items()
+
+    def keys(self) -> List[str]:
+        return [key for key, _ in self.items()]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._keys:
+            return getattr(self, key, default)
+        return self._extra.get(key, default) if self._extra else default
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    @property
+    def id(self) -> Optional[str]:
+        value = getattr(self, "_id", None)
+        return str(value) if value is not None else None
+
+    def to_bson(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def to_json(self) -> Dict[str, Any]:
+        return {key: _jsonable(value) for key, value in self.items()}
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Document):
+            return type(self) is type(other) and self.to_bson() == other.to_bson()
+        return NotImplemented
+
+    # Навмисно нехешовані, як і dict, які документи замінили: вони змінювані,
+    # а рівність порівнює вміст. Для множин і ключів словників — doc.id
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_bson()!r})"
+
+
+class Link(Document):
+    __slots__ = ("groupId", "subject_name", "teacher_name", "class_type", "meet_link",
+                 "classroom_link", "is_placeholder", "created_at", "updated_at")
+    groupId: int
+    subject_name: str
+    teacher_name: str
+    class_type: str
+    meet_link: Optional[str]
+    classroom_link: Optional[str]
+    is_placeholder: bool
+    created_at: datetime
+    updated_at: datetime
+
+
+class Member(Document):
+    __slots__ = ("groupId", "user_id", "username", "first_name", "last_name",
+                 "joined_at", "last_seen_at", "checked_at", "is_active", "allow_ping", "reminder_leads")
+    groupId: int
+    user_id: int
+    username: Optional[str]
+    first_name: Optional[str]
+    last_name: Optional[str]
+    joined_at: datetime
+    last_seen_at: datetime
+    checked_at: datetime
+    is_active: bool
+    allow_ping: bool
+    reminder_leads: List[int]
+
+
+class User(Document):
+    __slots__ = ("telegramId", "username", "fullName", "officialName", "avatarUrl")
+    telegramId: int
+    username: Optional[str]
+    fullName: Optional[str]
+    officialName: Optional[str]
+    avatarUrl: Optional[str]
+
+    def public(self) -> Dict[str, Any]:
+        """Дані, які показуються іншим учасникам (наприклад, у черзі)"""
+        return {
+            "_id": self.id,
+            "fullName": self.get("fullName"),
+            "officialName": self.get("officialName"),
+            "avatarUrl": self.get("avatarUrl"),
+            "telegramId": self.get("telegramId")
+        }
+
+
+class Subject(Document):
+    __slots__ = ("groupId", "name", "teachers", "resources", "teacherLecture", "teacherPractice",
+                 "note", "hasQueue", "hasTopics", "hasHomework")
+    groupId: int
+    name: str
+    teachers: List[Dict[str, Any]]
+    resources: Dict[str, Any]
+    teacherLecture: Optional[str]
+    teacherPractice: Optional[str]
+    note: Optional[str]
+    hasQueue: bool
+    hasTopics: bool
+    hasHomework: bool
+
+
+class Queue(Document):
+    __slots__ = ("groupId", "subjectId", "isActive", "config", "entries", "version", "createdAt")
+    groupId: int
+    subjectId: str
+    isActive: bool
+    config: Dict[str, Any]
+    entries: List[Dict[str, Any]]
+    version: int
+    createdAt: datetime
+
+
+class Topic(Document):
+    __slots__ = ("groupId", "subjectId", "title", "maxUsers", "users")
+    groupId: int
+    subjectId: str
+    title: str
+    maxUsers: Optional[int]
+    users: List[Dict[str, Any]]
+
+
+class Homework(Document):
+    __slots__ = ("groupId", "subjectId", "text", "deadline", "deadlineAt", "authorId", "createdAt")
+    groupId: int
+    subjectId: str
+    text: str
+    deadline: str
+    deadlineAt: Optional[datetime]
+    authorId: int
+    createdAt: datetime
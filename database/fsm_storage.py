@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from pymongo import ReturnDocument
+from config import FSM_STATE_TTL
+from .connection import db
+
+
+class MongoFSMStorage(BaseStorage):
+    """Сховище станів FSM у колекції fsm_states.
+
+    Стан і дані одного користувача — один документ, тож діалог переживає
+    перезапуск і спільний для кількох процесів. Кожен запис продовжує
+    expiresAt, а TTL-індекс прибирає покинуті діалоги; прострочені, але ще
+    не видалені документи при читанні вважаються відсутніми. Підключення
+    береться з database.connection, тому сховище можна створити до connect().
+    """
+
+    def __init__(self, ttl: int = FSM_STATE_TTL, key_builder: Optional[KeyBuilder] = None):
+        self.ttl = ttl
+        self._key_builder = key_builder or DefaultKeyBuilder()
+
+    @property
+    def _collection(self):
+        return db.db.fsm_states
+
+    def _write(self, fields: Dict[str, Any]) -> list:
+        """Оновлення-конвеєр для запису полів із продовженням expiresAt.
+
+        Перший етап прибирає стан і дані документа, що прострочився, але ще
+        не видалений TTL-індексом, — інакше запис воскресив би покинутий
+        діалог. Значення обгорнуті в $literal, щоб рядки на "$" не читались
+        як шляхи до полів.
+        """
+        now = datetime.utcnow()
+        alive = {"$gt": ["$expiresAt", now]}
+        return [
+            {"$set": {field: {"$cond": [alive, f"${field}", "$$REMOVE"]} for field in ("state", "data")}},
+            {"$set": {**{k: {"$literal": v} for k, v in fields.items()},
+                      "expiresAt": now + timedelta(seconds=self.ttl)}},
+        ]
+
+    def _alive(self, document_id: str) -> Dict[str, Any]:
+        return {"_id": document_id, "expiresAt": {"$gt": datetime.utcnow()}}
+
+    @staticmethod
+    def _resolve_state(state: StateType) -> Optional[str]:
+        if state is None:
+            return None
+        return state.state if isinstance(state, State) else str(state)
+
+    async def _unset(self, document_id: str, field: str):
+        """Видалення поля; порожній документ видаляється повністю"""
+        await self._collection.update_one({"_id": document_id}, {"$unset": {field: 1}})
+        await self._collection.delete_one({"_id": document_id, "state": {"$exists": False}, "data": {"$exists": False}})
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        document_id = self._key_builder.build(key)
+        if state is None:
+            await self._unset(document_id, "state")
+            return
+        await self._collection.update_one(
+            {"_id": document_id},
+            self._write({"state": self._resolve_state(state)}),
+            upsert=True
+        )
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        document = await self._collection.find_one(self._alive(self._key_builder.build(key)), {"state": 1})
+        return document.get("state") if document else None
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        document_id = self._key_builder.build(key)
+        if not data:
+            await self._unset(document_id, "data")
+            return
+        await self._collection.update_one(
+            {"_id": document_id},
+            self._write({"data": data}),
+            upsert=True
+        )
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        document = await self._collection.find_one(self._alive(self._key_builder.build(key)), {"data": 1})
+        return dict(document.get("data") or {}) if document else {}
+
+    async def update_data(self, key: StorageKey, data: Dict[str, Any]) -> Dict[str, Any]:
+        if not data:
+            return await self.get_data(key)
+        document = await self._collection.find_one_and_update(
+            {"_id": self._key_builder.build(key)},
+            self._write({f"data.{k}": v for k, v in data.items()}),
+            projection={"data": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return dict(document.get("data") or {})
+
+    async def close(self) -> None:
+        # Клієнт спільний із рештою застосунку і закривається в db.disconnect()
+        pass
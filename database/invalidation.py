@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Any, List, Callable, Optional
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure, PyMongoError
+from config import INVALIDATION_POLL_INTERVAL
+from .connection import db
+
+logger = logging.getLogger(__name__)
+
+# Повторне підключення change stream після збою (секунди)
+RECONNECT_DELAYS = (1, 2, 5, 10, 30)
+
+
+class ChangeEvent:
+    """Зміна в колекції.
+
+    operation: insert, update, replace, delete — з change stream;
+    reload — зміна, про яку відомо лише «щось змінилося» (опитування
+    або втрачені події), тож підписник має перечитати все.
+    """
+
+    __slots__ = ("collection", "operation", "document_id", "document")
+
+    def __init__(self, collection: str, operation: str, document_id: Any = None,
+                 document: Optional[Dict[str, Any]] = None):
+        self.collection = collection
+        self.operation = operation
+        self.document_id = document_id
+        self.document = document
+
+    @property
+    def group_id(self) -> Optional[int]:
+        return self.document.get("groupId") if self.document else None
+
+    def __repr__(self) -> str:
+        return f"ChangeEvent({self.collection}, {self.operation}, {self.document_id})"
+
+
+Handler = Callable[[ChangeEvent], Any]
+
+
+class InvalidationBus:
+    """Спільна шина інвалідації кешів між процесами.
+
+    Кеші підписуються на колекції декоратором on_change. На replica set
+    шина читає один change stream бази й розсилає кожну зміну; на
+    standalone-сервері change streams немає, тож записи викликають
+    publish(), що збільшує лічильник колекції в meta.invalidation, а шина
+    опитує ці лічильники й надсилає reload. Тому кожен запис у колекцію,
+    дані якої кешуються або можуть кешуватися (менеджери в models.py),
+    закінчується publish() — інакше в режимі опитування інші процеси
+    віддають застарілі дані до перезапуску.
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._seen: Dict[str, int] = {}
+        self.mode: Optional[str] = None
+        self.events = 0
+        self.last_event_at: Optional[float] = None
+
+    def on_change(self, *collections: str):
+        """Декоратор підписки: @bus.on_change("links", "subjects")"""
+        def decorator(handler: Handler) -> Handler:
+            for collection in collections:
+                self._handlers.setdefault(collection, []).append(handler)
+            return handler
+        return decorator
+
+    @property
+    def collections(self) -> List[str]:
+        return sorted(self._handlers)
+
+    async def dispatch(self, event: ChangeEvent):
+        self.events += 1
+        self.last_event_at = time.time()
+        for handler in self._handlers.get(event.collection, []):
+            try:
+                result = handler(event)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Помилка обробки {event}: {e}")
+
+    async def _reload_all(self):
+        for collection in self.collections:
+            await self.dispatch(ChangeEvent(collection, "reload"))
+
+    async def publish(self, collection: str):
+        """Позначити зміну колекції для процесів, що опитують лічильники.
+
+        Через change stream зміни видно й так, тоді запис не потрібен.
+        """
+        if self.mode == "changestream":
+            return
+        try:
+            meta = await db.db.meta.find_one_and_update(
+                {"_id": "invalidation"}, {"$inc": {collection: 1}},
+                upsert=True, return_document=ReturnDocument.AFTER
+            )
+            # Власну зміну перечитувати не потрібно
+            if meta and meta.get(collection, 0) == self._seen.get(collection, 0) + 1:
+                self._seen[collection] = meta[collection]
+        except Exception as e:
+            logger.error(f"Помилка публікації зміни {collection}: {e}")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        if await self._watch():
+            return
+        self.mode = "polling"
+        logger.info(f"Change streams недоступні, інвалідація кешів опитуванням кожні {INVALIDATION_POLL_INTERVAL} с")
+        await self._poll()
+
+    async def _watch(self) -> bool:
+        """Читання change stream; False, якщо сервер їх не підтримує"""
+        resume_token = None
+        attempt = 0
+        pipeline = [{"$match": {"ns.coll": {"$in": self.collections}}}]
+        while True:
+            try:
+                async with db.db.watch(pipeline, full_document="updateLookup", resume_after=resume_token) as stream:
+                    if self.mode != "changestream":
+                        self.mode = "changestream"
+                        logger.info(f"Інвалідація кешів через change stream: {', '.join(self.collections)}")
+                    if attempt:
+                        # Поки потік був розірваний, події могли загубитися
+                        await self._reload_all()
+                    attempt = 0
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        await self.dispatch(ChangeEvent(
+                            change["ns"]["coll"],
+                            change["operationType"],
+                            change.get("documentKey", {}).get("_id"),
+                            change.get("fullDocument")
+                        ))
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if self.mode is None:
+                    # Standalone-сервер: $changeStream підтримується лише на replica set
+                    logger.info(f"Change stream недоступний: {e}")
+                    return False
+                logger.error(f"Помилка change stream: {e}")
+                resume_token = None
+            except PyMongoError as e:
+                if self.mode is None:
+                    logger.info(f"Change stream недоступний: {e}")
+                    return False
+                logger.error(f"Change stream розірвано: {e}")
+            delay = RECONNECT_DELAYS[min(attempt, len(RECONNECT_DELAYS) - 1)]
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _poll(self):
+        try:
+            meta = await db.db.meta.find_one({"_id": "invalidation"}) or {}
+            self._seen = {c: meta.get(c, 0) for c in self.collections}
+        except Exception as e:
+            logger.error(f"Помилка читання лічильників інвалідації: {e}")
+        while True:
+            await asyncio.sleep(INVALIDATION_POLL_INTERVAL)
+            try:
+                meta = await db.db.meta.find_one({"_id": "invalidation"}) or {}
+            except Exception as e:
+                logger.error(f"Помилка читання лічильників інвалідації: {e}")
+                continue
+            for collection in self.collections:
+                version = meta.get(collection, 0)
+                if version != self._seen.get(collection, 0):
+                    self._seen[collection] = version
+                    await self.dispatch(ChangeEvent(collection, "reload"))
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "collections": self.collections,
+            "events": self.events,
+            "lastEventAt": self.last_event_at,
+        }
+
+
+bus = InvalidationBus()
+on_change = bus.on_change
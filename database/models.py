@@ -1,29 +1,166 @@
-from datetime import datetime
-from typing import Optional, List, Dict, Any
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Tuple, Set
 from .connection import db
+from .invalidation import bus, on_change, ChangeEvent
+from .write_behind import member_buffer
 import logging
 from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from bot.utils.link_index import get_link_index
+from .documents import Link, Member, User, Homework, Topic
+from bot.utils.deadlines import parse_deadline
+from config import LINK_MATCH_THRESHOLD, MAX_TOPICS_PER_USER, GROUP_ID, KPI_GROUP_ID, ADMIN_IDS
 logger = logging.getLogger(__name__)
 
+TENANT_COLLECTIONS = ("links", "group_members", "subjects", "queues", "topics", "homework", "settings")
+
+class TenantsManager:
+    """Реєстр груп (тенантів), які обслуговує один процес бота.
+
+    Конфігурація груп зберігається в колекції tenants і тримається в пам'яті,
+    тому перевірки в хендлерах не звертаються до БД. Група з .env (GROUP_ID,
+    KPI_GROUP_ID, ADMIN_ID) завжди реєструється як група за замовчуванням.
+    """
+    
+    _by_group: Dict[int, Dict[str, Any]] = {}
+    
+    @staticmethod
+    def default_tenant() -> Dict[str, Any]:
+        return {
+            "groupId": GROUP_ID,
+            "kpiGroupId": KPI_GROUP_ID,
+            "adminIds": list(ADMIN_IDS),
+            "title": None,
+            "isActive": True
+        }
+    
+    @staticmethod
+    async def load():
+        try:
+            await db.db.tenants.update_one(
+                {"groupId": GROUP_ID},
+                {"$setOnInsert": TenantsManager.default_tenant()},
+                upsert=True
+            )
+            tenants = await db.db.tenants.find({"isActive": True}).to_list(None)
+            TenantsManager._by_group = {t["groupId"]: t for t in tenants}
+            logger.info(f"Завантажено груп: {len(tenants)}")
+        except Exception as e:
+            logger.error(f"Помилка завантаження груп: {e}")
+            TenantsManager._by_group = {GROUP_ID: TenantsManager.default_tenant()}
+    
+    @staticmethod
+    async def migrate():
+        """Одноразове проставлення groupId старим документам (до появи мультигруповості)"""
+        for collection in TENANT_COLLECTIONS:
+            try:
+                result = await db.db[collection].update_many(
+                    {"groupId": {"$exists": False}},
+                    {"$set": {"groupId": GROUP_ID}}
+                )
+                if result.modified_count:
+                    logger.info(f"Міграція {collection}: groupId додано {result.modified_count} документам")
+            except Exception as e:
+                logger.error(f"Помилка міграції {collection}: {e}")
+    
+    @staticmethod
+    async def add_tenant(group_id: int, kpi_group_id: str, admin_ids: List[int], title: Optional[str] = None) -> bool:
+        try:
+            tenant = {
+                "groupId": group_id,
+                "kpiGroupId": kpi_group_id,
+                "adminIds": admin_ids,
+                "title": title,
+                "isActive": True
+            }
+            await db.db.tenants.update_one({"groupId": group_id}, {"$set": tenant}, upsert=True)
+            TenantsManager._by_group[group_id] = tenant
+            await bus.publish("tenants")
+            return True
+        except Exception as e:
+            logger.error(f"Помилка додавання групи {group_id}: {e}")
+            return False
+    
+    @staticmethod
+    @on_change("tenants")
+    async def _on_change(event: ChangeEvent):
+        tenant = event.document
+        if tenant is None:
+            await TenantsManager.load()
+        elif tenant.get("isActive"):
+            TenantsManager._by_group = {**TenantsManager._by_group, tenant["groupId"]: tenant}
+        else:
+            TenantsManager._by_group = {g: t for g, t in TenantsManager._by_group.items() if g != tenant["groupId"]}
+    
+    @staticmethod
+    def get(group_id: int) -> Optional[Dict[str, Any]]:
+        tenant = TenantsManager._by_group.get(group_id)
+        if tenant is None and group_id == GROUP_ID and not TenantsManager._by_group:
+            return TenantsManager.default_tenant()
+        return tenant
+    
+    @staticmethod
+    def all() -> List[Dict[str, Any]]:
+        return list(TenantsManager._by_group.values()) or [TenantsManager.default_tenant()]
+    
+    @staticmethod
+    def kpi_group_id(group_id: int) -> Optional[str]:
+        tenant = TenantsManager.get(group_id)
+        return tenant.get("kpiGroupId") if tenant else None
+    
+    @staticmethod
+    def is_admin(user_id: int, group_id: int) -> bool:
+        if user_id in ADMIN_IDS:
+            return True
+        tenant = TenantsManager.get(group_id)
+        return bool(tenant) and user_id in tenant.get("adminIds", [])
+    
+    @staticmethod
+    def admin_groups(user_id: int) -> List[int]:
+        """Групи, в яких користувач є адміністратором (глобальні адміни з .env — у групі за замовчуванням)"""
+        groups = sorted(t["groupId"] for t in TenantsManager.all() if user_id in t.get("adminIds", []))
+        if not groups and user_id in ADMIN_IDS:
+            groups = [GROUP_ID]
+        return groups
+
 class LinksManager:
     """Клас для роботи з посиланнями на пари (старий функціонал, залишаємо для сумісності з ботом)"""
     
+    # Карта нормалізації по групах: (назва, викладач, тип) з КПІ -> ключ збереженого посилання
+    _aliases: Dict[int, Dict[Tuple[str, str, str], Tuple[str, str, str]]] = {}
+    
+    @staticmethod
+    def set_aliases(aliases: Dict[Tuple[str, str, str], Tuple[str, str, str]], group_id: int = GROUP_ID):
+        LinksManager._aliases[group_id] = dict(aliases)
+    
+    @staticmethod
+    def _resolve_alias(subject_name: str, teacher_name: str, class_type: str, group_id: int) -> Tuple[str, str, str]:
+        return LinksManager._aliases.get(group_id, {}).get(
+            (subject_name, teacher_name, class_type),
+            (subject_name, teacher_name, class_type)
+        )
+    
     @staticmethod
     async def add_link(subject_name: str, teacher_name: str, class_type: str, 
-                      meet_link: str, classroom_link: Optional[str] = None) -> bool:
+                      meet_link: str, classroom_link: Optional[str] = None,
+                      group_id: int = GROUP_ID) -> bool:
         try:
             link_data = {
+                "groupId": group_id,
                 "subject_name": subject_name,
                 "teacher_name": teacher_name,
                 "class_type": class_type,
                 "meet_link": meet_link,
                 "classroom_link": classroom_link,
+                "is_placeholder": False,
                 "created_at": datetime.utcnow(),
                 "updated_at": datetime.utcnow()
             }
             
             result = await db.db.links.update_one(
                 {
+                    "groupId": group_id,
                     "subject_name": subject_name,
                     "teacher_name": teacher_name,
                     "class_type": class_type
@@ -31,34 +168,85 @@ class LinksManager:
                 {"$set": link_data},
                 upsert=True
             )
+            get_link_index(group_id).upsert(Link.from_bson(link_data))
+            await bus.publish("links")
             return True
         except Exception as e:
             logger.error(f"Помилка додавання посилання: {e}")
             return False
     
     @staticmethod
-    async def get_link(subject_name: str, teacher_name: str, class_type: str) -> Optional[Dict[str, Any]]:
+    async def load_index() -> bool:
+        """Побудова in-memory індексів посилань (по одному на групу) для нечіткого пошуку"""
+        try:
+            links = await db.db.links.find({}).to_list(length=None)
+            by_group: Dict[int, List[Dict[str, Any]]] = {t["groupId"]: [] for t in TenantsManager.all()}
+            for link in Link.from_bson_list(links):
+                by_group.setdefault(link.get("groupId", GROUP_ID), []).append(link)
+            for group_id, group_links in by_group.items():
+                get_link_index(group_id).load(group_links)
+            logger.info(f"Індекс посилань побудовано: {len(links)} записів, груп: {len(by_group)}")
+            return True
+        except Exception as e:
+            logger.error(f"Помилка побудови індексу посилань: {e}")
+            return False
+    
+    @staticmethod
+    @on_change("links")
+    async def _on_change(event: ChangeEvent):
+        # Видалення приходить без документа, тож індекс перебудовується повністю
+        if event.document is None:
+            await LinksManager.load_index()
+        else:
+            get_link_index(event.group_id or GROUP_ID).upsert(Link.from_bson(event.document))
+    
+    @staticmethod
+    def match_link(subject_name: str, teacher_name: str, class_type: str,
+                   group_id: int = GROUP_ID) -> Tuple[Optional[Link], float]:
+        """Найкраще посилання з індексу та впевненість збігу (0..1)"""
+        subject_name, teacher_name, class_type = LinksManager._resolve_alias(subject_name, teacher_name, class_type, group_id)
+        return get_link_index(group_id).resolve(subject_name, teacher_name, class_type, LINK_MATCH_THRESHOLD)
+    
+    @staticmethod
+    async def get_link(subject_name: str, teacher_name: str, class_type: str,
+                       group_id: int = GROUP_ID) -> Optional[Link]:
+        if get_link_index(group_id).loaded:
+            link, score = LinksManager.match_link(subject_name, teacher_name, class_type, group_id)
+            return link if score >= LINK_MATCH_THRESHOLD else None
+        
         try:
+            subject_name, teacher_name, class_type = LinksManager._resolve_alias(subject_name, teacher_name, class_type, group_id)
+            
+            # Заготовки без посилань пропускаємо, як і в індексі: інакше точний
+            # збіг із заготовкою затуляє посилання, знайдене без типу пари
+            real = {"$ne": True}
+            
             # Спроба точного пошуку
             link = await db.db.links.find_one({
+                "groupId": group_id,
                 "subject_name": subject_name,
                 "teacher_name": teacher_name,
-                "class_type": class_type
+                "class_type": class_type,
+                "is_placeholder": real
             })
-            if link: return link
+            if link: return Link.from_bson(link)
             
             # Спроба пошуку без типу пари
             link = await db.db.links.find_one({
+                "groupId": group_id,
                 "subject_name": subject_name,
-                "teacher_name": teacher_name
+                "teacher_name": teacher_name,
+                "is_placeholder": real
             })
-            if link: return link
+            if link: return Link.from_bson(link)
 
             # Пошук тільки за назвою предмета
             link = await db.db.links.find_one({
-                "subject_name": subject_name
+                "groupId": group_id,
+                "subject_name": subject_name,
+                "is_placeholder": real
             })
-            if link: return link
+            if link: return Link.from_bson(link)
             
             return None
         except Exception as e:
@@ -66,90 +254,210 @@ class LinksManager:
             return None
     
     @staticmethod
-    async def get_all_links() -> List[Dict[str, Any]]:
+    async def get_link_by_id(link_id: ObjectId, group_id: int = GROUP_ID) -> Optional[Link]:
         try:
-            return await db.db.links.find({}).to_list(length=None)
+            return Link.from_bson(await db.db.links.find_one({"_id": link_id, "groupId": group_id}))
+        except Exception as e:
+            logger.error(f"Помилка отримання посилання {link_id}: {e}")
+            return None
+
+    @staticmethod
+    async def get_all_links(group_id: int = GROUP_ID) -> List[Link]:
+        try:
+            # Заготовки, створені синхронізацією з розкладом, без посилань не показуємо
+            links = await db.db.links.find({"groupId": group_id, "is_placeholder": {"$ne": True}}).to_list(length=None)
+            return Link.from_bson_list(links)
         except Exception as e:
             logger.error(f"Помилка отримання всіх посилань: {e}")
             return []
     
     @staticmethod
-    async def delete_link(subject_name: str, teacher_name: str, class_type: str) -> bool:
+    async def delete_link(subject_name: str, teacher_name: str, class_type: str, group_id: int = GROUP_ID) -> bool:
         try:
             result = await db.db.links.delete_one({
+                "groupId": group_id,
                 "subject_name": subject_name,
                 "teacher_name": teacher_name,
                 "class_type": class_type
             })
+            get_link_index(group_id).remove(subject_name, teacher_name, class_type)
+            await bus.publish("links")
             return result.deleted_count > 0
         except Exception as e:
             logger.error(f"Помилка видалення посилання: {e}")
             return False
 
 class SettingsManager:
+    """Налаштування груп як знімок у пам'яті.
+
+    Усі налаштування читаються з БД один раз (load) і далі віддаються з
+    пам'яті; set_setting пише в БД і замінює знімок групи цілком, тож
+    читачі ніколи не бачать його наполовину оновленим. Зміни з інших
+    процесів приходять через шину інвалідації (database.invalidation).
+    """
+
+    # Відомі налаштування: тип і значення за замовчуванням
+    SCHEMA: Dict[str, Tuple[type, Any]] = {
+        "notifications_enabled": (bool, True),
+    }
+
+    _snapshot: Dict[int, Dict[str, Any]] = {}
+    _loaded = False
+
     @staticmethod
-    async def get_setting(key: str, default: Any = None) -> Any:
+    def _coerce(key: str, value: Any) -> Any:
+        spec = SettingsManager.SCHEMA.get(key)
+        if spec is None or value is None:
+            return value
         try:
-            doc = await db.db.settings.find_one({"key": key})
-            return doc["value"] if doc else default
+            return spec[0](value)
+        except (TypeError, ValueError):
+            return spec[1]
+
+    @staticmethod
+    async def load() -> bool:
+        """Повне перечитування налаштувань (атомарна заміна знімка)"""
+        try:
+            snapshot: Dict[int, Dict[str, Any]] = {}
+            async for doc in db.db.settings.find({}, {"groupId": 1, "key": 1, "value": 1}):
+                group = snapshot.setdefault(doc.get("groupId", GROUP_ID), {})
+                group[doc["key"]] = SettingsManager._coerce(doc["key"], doc.get("value"))
+            SettingsManager._snapshot = snapshot
+            SettingsManager._loaded = True
+            return True
+        except Exception as e:
+            logger.error(f"Помилка завантаження налаштувань: {e}")
+            return False
+
+    @staticmethod
+    @on_change("settings")
+    async def _on_change(event: ChangeEvent):
+        await SettingsManager.load()
+
+    @staticmethod
+    def get(key: str, default: Any = None, group_id: int = GROUP_ID) -> Any:
+        """Значення зі знімка (без звернення до БД)"""
+        group = SettingsManager._snapshot.get(group_id, {})
+        if key in group:
+            return group[key]
+        if default is None and key in SettingsManager.SCHEMA:
+            return SettingsManager.SCHEMA[key][1]
+        return default
+
+    @staticmethod
+    def notifications_enabled(group_id: int = GROUP_ID) -> bool:
+        return SettingsManager.get("notifications_enabled", group_id=group_id)
+
+    @staticmethod
+    async def get_setting(key: str, default: Any = None, group_id: int = GROUP_ID) -> Any:
+        if SettingsManager._loaded:
+            return SettingsManager.get(key, default, group_id)
+        try:
+            doc = await db.db.settings.find_one({"groupId": group_id, "key": key})
+            return SettingsManager._coerce(key, doc["value"]) if doc else SettingsManager.get(key, default, group_id)
         except Exception:
             return default
 
     @staticmethod
-    async def set_setting(key: str, value: Any) -> bool:
+    async def set_setting(key: str, value: Any, group_id: int = GROUP_ID) -> bool:
+        value = SettingsManager._coerce(key, value)
         try:
             await db.db.settings.update_one(
-                {"key": key},
+                {"groupId": group_id, "key": key},
                 {"$set": {"value": value}},
                 upsert=True
             )
-            return True
         except Exception as e:
             logger.error(f"Помилка збереження налаштування {key}: {e}")
             return False
+        SettingsManager._snapshot = {
+            **SettingsManager._snapshot,
+            group_id: {**SettingsManager._snapshot.get(group_id, {}), key: value}
+        }
+        await bus.publish("settings")
+        return True
         
 class GroupMembersManager:
+    # Активні учасники по групах: AuthMiddleware перевіряє членство на кожне повідомлення.
+    # Промах кешу перевіряється в БД, тож учасники, додані іншим процесом, не губляться.
+    _active: Dict[int, Set[int]] = {}
+
     @staticmethod
-    async def add_member(user_id: int, username: str, first_name: str, last_name: Optional[str] = None) -> bool:
+    async def load_membership() -> bool:
         try:
-            member_data = {
-                "user_id": user_id,
-                "username": username,
-                "first_name": first_name,
-                "last_name": last_name,
-                "joined_at": datetime.utcnow(),
-                "is_active": True
-            }
-            await db.db.group_members.update_one(
-                {"user_id": user_id},
-                {"$set": member_data},
-                upsert=True
-            )
+            active: Dict[int, Set[int]] = {}
+            async for m in db.db.group_members.find({"is_active": True}, {"groupId": 1, "user_id": 1}):
+                active.setdefault(m.get("groupId", GROUP_ID), set()).add(m["user_id"])
+            GroupMembersManager._active = active
+            logger.info(f"Кеш учасників: {sum(map(len, active.values()))} записів, груп: {len(active)}")
             return True
         except Exception as e:
-            logger.error(f"Помилка додавання учасника: {e}")
+            logger.error(f"Помилка завантаження учасників: {e}")
             return False
+
+    @staticmethod
+    @on_change("group_members")
+    async def _on_change(event: ChangeEvent):
+        member = event.document
+        if member is None:
+            await GroupMembersManager.load_membership()
+        else:
+            GroupMembersManager._remember(member["user_id"], member.get("groupId", GROUP_ID), member.get("is_active", False))
+
+    @staticmethod
+    def _remember(user_id: int, group_id: int, active: bool):
+        if active:
+            GroupMembersManager._active.setdefault(group_id, set()).add(user_id)
+        else:
+            GroupMembersManager._active.get(group_id, set()).discard(user_id)
+
+    @staticmethod
+    async def add_member(user_id: int, username: str, first_name: str, last_name: Optional[str] = None,
+                         group_id: int = GROUP_ID) -> bool:
+        """Учасник активний у групі: профіль і last_seen_at пишуться пакетом (write_behind)"""
+        member_buffer.record(user_id, group_id, username, first_name, last_name)
+        GroupMembersManager._remember(user_id, group_id, True)
+        return True
     
     @staticmethod
-    async def is_member(user_id: int) -> bool:
+    async def is_member(user_id: int, group_id: int = GROUP_ID) -> bool:
+        if user_id in GroupMembersManager._active.get(group_id, ()):
+            return True
         try:
-            member = await db.db.group_members.find_one({"user_id": user_id, "is_active": True})
+            member = await db.db.group_members.find_one({"groupId": group_id, "user_id": user_id, "is_active": True})
+            if member is not None:
+                GroupMembersManager._remember(user_id, group_id, True)
             return member is not None
         except Exception:
             return False
     
     @staticmethod
-    async def get_all_members() -> List[Dict[str, Any]]:
+    async def get_member_groups(user_id: int) -> List[int]:
+        """Групи, в яких користувач є активним учасником"""
+        cached = sorted(g for g, users in GroupMembersManager._active.items() if user_id in users)
+        if cached:
+            return cached
         try:
-            return await db.db.group_members.find({"is_active": True}).to_list(length=None)
+            members = await db.db.group_members.find(
+                {"user_id": user_id, "is_active": True}, {"groupId": 1}
+            ).to_list(length=None)
+            return sorted(m.get("groupId", GROUP_ID) for m in members)
+        except Exception:
+            return []
+    
+    @staticmethod
+    async def get_all_members(group_id: int = GROUP_ID) -> List[Member]:
+        try:
+            members = await db.db.group_members.find({"groupId": group_id, "is_active": True}).to_list(length=None)
+            return Member.from_bson_list(members)
         except Exception:
             return []
 
     @staticmethod
-    async def set_ping_status(user_id: int, allow_ping: bool) -> bool:
+    async def set_ping_status(user_id: int, allow_ping: bool, group_id: int = GROUP_ID) -> bool:
         try:
             result = await db.db.group_members.update_one(
-                {"user_id": user_id},
+                {"groupId": group_id, "user_id": user_id},
                 {"$set": {"allow_ping": allow_ping}}
             )
             return result.modified_count > 0 or result.matched_count > 0
@@ -157,41 +465,210 @@ class GroupMembersManager:
             return False
 
     @staticmethod
-    async def get_member_by_username(username: str) -> Optional[Dict[str, Any]]:
+    async def get_member_by_id(user_id: int, group_id: int = GROUP_ID) -> Optional[Member]:
         try:
-            return await db.db.group_members.find_one({
+            return Member.from_bson(await db.db.group_members.find_one({"groupId": group_id, "user_id": user_id, "is_active": True}))
+        except Exception:
+            return None
+
+    @staticmethod
+    async def get_member_by_username(username: str, group_id: int = GROUP_ID) -> Optional[Member]:
+        try:
+            return Member.from_bson(await db.db.group_members.find_one({
+                "groupId": group_id,
                 "username": {"$regex": f"^{username}$", "$options": "i"},
                 "is_active": True
-            })
+            }))
         except Exception:
             return None
 
     @staticmethod
-    async def remove_member(user_id: int) -> bool:
+    async def remove_member(user_id: int, group_id: int = GROUP_ID) -> bool:
+        # Відкладений запис інакше знову зробив би учасника активним
+        await member_buffer.discard(group_id, [user_id])
         try:
             result = await db.db.group_members.update_one(
-                {"user_id": user_id},
+                {"groupId": group_id, "user_id": user_id},
                 {"$set": {"is_active": False}}
             )
+            GroupMembersManager._remember(user_id, group_id, False)
+            await bus.publish("group_members")
             return result.modified_count > 0
         except Exception:
             return False
             
     @staticmethod
-    async def get_muted_members() -> List[Dict[str, Any]]:
+    async def upsert_members(members: List[Dict[str, Any]], group_id: int = GROUP_ID) -> int:
+        """Пакетне додавання учасників, відомих з Telegram (адміністратори групи)"""
+        if not members:
+            return 0
+        now = datetime.utcnow()
+        ops = [
+            UpdateOne(
+                {"groupId": group_id, "user_id": m["user_id"]},
+                {
+                    "$set": {
+                        "username": m.get("username") or '',
+                        "first_name": m.get("first_name") or '',
+                        "last_name": m.get("last_name"),
+                        "is_active": True,
+                        "checked_at": now
+                    },
+                    "$setOnInsert": {"joined_at": now}
+                },
+                upsert=True
+            )
+            for m in members
+        ]
+        try:
+            result = await db.db.group_members.bulk_write(ops, ordered=False)
+        except Exception as e:
+            logger.error(f"Помилка пакетного додавання учасників: {e}")
+            return 0
+        for m in members:
+            GroupMembersManager._remember(m["user_id"], group_id, True)
+        await bus.publish("group_members")
+        return result.upserted_count
+
+    @staticmethod
+    async def get_least_recently_checked(group_id: int = GROUP_ID, limit: int = 100) -> List[int]:
+        """Активні учасники, яких найдовше не звіряли з Telegram (ніколи не звірені — першими)"""
         try:
-            return await db.db.group_members.find({"allow_ping": False, "is_active": True}).to_list(length=None)
+            members = await db.db.group_members.find(
+                {"groupId": group_id, "is_active": True}, {"user_id": 1}
+            ).sort("checked_at", 1).limit(limit).to_list(length=None)
+            return [m["user_id"] for m in members]
+        except Exception:
+            return []
+
+    @staticmethod
+    async def mark_checked(user_ids: List[int], group_id: int = GROUP_ID):
+        if not user_ids:
+            return
+        try:
+            await db.db.group_members.update_many(
+                {"groupId": group_id, "user_id": {"$in": user_ids}},
+                {"$set": {"checked_at": datetime.utcnow()}}
+            )
+        except Exception as e:
+            logger.error(f"Помилка позначення звірених учасників: {e}")
+
+    @staticmethod
+    async def mark_inactive(user_ids: List[int], group_id: int = GROUP_ID) -> int:
+        """Пакетна деактивація учасників, яких уже немає в групі"""
+        if not user_ids:
+            return 0
+        await member_buffer.discard(group_id, user_ids)
+        try:
+            result = await db.db.group_members.update_many(
+                {"groupId": group_id, "user_id": {"$in": user_ids}},
+                {"$set": {"is_active": False, "checked_at": datetime.utcnow()}}
+            )
+        except Exception as e:
+            logger.error(f"Помилка деактивації учасників: {e}")
+            return 0
+        for user_id in user_ids:
+            GroupMembersManager._remember(user_id, group_id, False)
+        await bus.publish("group_members")
+        return result.modified_count
+
+    @staticmethod
+    async def count_active(group_id: int = GROUP_ID) -> int:
+        try:
+            return await db.db.group_members.count_documents({"groupId": group_id, "is_active": True})
+        except Exception:
+            return 0
+
+    @staticmethod
+    async def set_reminder_leads(user_id: int, leads: List[int], group_id: int = GROUP_ID) -> bool:
+        """За скільки хвилин до пари надсилати особисті нагадування (порожній список — вимкнено)"""
+        try:
+            # Учасник, який щойно писав у групі, може бути ще лише в буфері
+            await member_buffer.flush_member(group_id, user_id)
+            result = await db.db.group_members.update_one(
+                {"groupId": group_id, "user_id": user_id},
+                {"$set": {"reminder_leads": sorted(set(leads), reverse=True)}}
+            )
+            if result.matched_count:
+                # Кошики нагадувань інших процесів теж мають перебудуватися
+                await bus.publish("group_members")
+            return result.matched_count > 0
+        except Exception as e:
+            logger.error(f"Помилка збереження нагадувань: {e}")
+            return False
+
+    @staticmethod
+    async def get_reminder_subscribers(group_id: int = GROUP_ID) -> List[Member]:
+        try:
+            members = await db.db.group_members.find(
+                {"groupId": group_id, "is_active": True, "reminder_leads": {"$exists": True, "$ne": []}},
+                {"user_id": 1, "reminder_leads": 1}
+            ).to_list(length=None)
+            return Member.from_bson_list(members)
+        except Exception:
+            return []
+
+    @staticmethod
+    async def get_muted_members(group_id: int = GROUP_ID) -> List[Member]:
+        try:
+            members = await db.db.group_members.find({"groupId": group_id, "allow_ping": False, "is_active": True}).to_list(length=None)
+            return Member.from_bson_list(members)
         except Exception:
             return []
 
 class UsersManager:
+    # Група, обрана в особистих повідомленнях: telegramId -> groupId (None — не обирав)
+    _active_groups: Dict[int, Optional[int]] = {}
+
     @staticmethod
-    async def get_all_users():
-        users = await db.db.users.find({}).to_list(length=None)
-        for u in users: u["_id"] = str(u["_id"])
-        return users
+    @on_change("user_prefs")
+    def _on_change(event: ChangeEvent):
+        if event.operation == "reload":
+            UsersManager._active_groups = {}
+        else:
+            UsersManager._active_groups.pop(event.document_id, None)
+
+    @staticmethod
+    async def get_active_group(telegram_id: int) -> Optional[int]:
+        if telegram_id in UsersManager._active_groups:
+            return UsersManager._active_groups[telegram_id]
+        try:
+            prefs = await db.db.user_prefs.find_one({"_id": telegram_id}, {"activeGroupId": 1})
+        except Exception as e:
+            logger.error(f"Помилка читання обраної групи {telegram_id}: {e}")
+            return None
+        group_id = prefs.get("activeGroupId") if prefs else None
+        UsersManager._active_groups[telegram_id] = group_id
+        return group_id
+
+    @staticmethod
+    async def set_active_group(telegram_id: int, group_id: int):
+        await db.db.user_prefs.update_one(
+            {"_id": telegram_id}, {"$set": {"activeGroupId": group_id}}, upsert=True
+        )
+        UsersManager._active_groups[telegram_id] = group_id
+        await bus.publish("user_prefs")
+
+    @staticmethod
+    async def get_all_users() -> List[User]:
+        return User.from_bson_list(await db.db.users.find({}).to_list(length=None))
+
+    @staticmethod
+    async def get_by_telegram_id(telegram_id: int) -> Optional[User]:
+        return User.from_bson(await db.db.users.find_one({"telegramId": telegram_id}))
 
 class SubjectsManager:
+    # Група кожного предмета: не змінюється, поки предмет існує
+    _groups: Dict[str, int] = {}
+
+    @staticmethod
+    @on_change("subjects")
+    def _on_change(event: ChangeEvent):
+        if event.operation == "reload":
+            SubjectsManager._groups = {}
+        elif event.document is None:
+            SubjectsManager._groups.pop(str(event.document_id), None)
+
     @staticmethod
     async def update_subject(id: str, data: dict):
         update_data = {
@@ -212,49 +689,166 @@ class SubjectsManager:
             {"_id": ObjectId(id)},
             {"$set": update_data}
         )
+        await bus.publish("subjects")
+
+    @staticmethod
+    async def create_subject(data: dict, group_id: int = GROUP_ID) -> str:
+        result = await db.db.subjects.insert_one({**data, "groupId": group_id})
+        SubjectsManager._groups[str(result.inserted_id)] = group_id
+        await bus.publish("subjects")
+        return str(result.inserted_id)
+
+    @staticmethod
+    async def get_group_id(subject_id: str) -> Optional[int]:
+        """Група, якій належить предмет"""
+        if subject_id in SubjectsManager._groups:
+            return SubjectsManager._groups[subject_id]
+        if not ObjectId.is_valid(subject_id):
+            return None
+        subject = await db.db.subjects.find_one({"_id": ObjectId(subject_id)}, {"groupId": 1})
+        if subject is None:
+            return None
+        SubjectsManager._groups[subject_id] = subject.get("groupId", GROUP_ID)
+        return SubjectsManager._groups[subject_id]
+
+    @staticmethod
+    async def delete_subject(subject_id: str):
+        await db.db.subjects.delete_one({"_id": ObjectId(subject_id)})
+        SubjectsManager._groups.pop(subject_id, None)
+        await bus.publish("subjects")
+
+    @staticmethod
+    async def get_names(ids: List[str]) -> Dict[str, str]:
+        """Назви предметів за їх id одним запитом"""
+        object_ids = [ObjectId(i) for i in set(ids) if ObjectId.is_valid(i)]
+        if not object_ids:
+            return {}
+        subjects = await db.db.subjects.find({"_id": {"$in": object_ids}}, {"name": 1}).to_list(None)
+        return {str(s["_id"]): s.get("name", "") for s in subjects}
 
 class HomeworkManager:
+    # Лічильник змін домашок (для кешів, що залежать від них); зміни з інших
+    # процесів збільшують його через шину інвалідації
+    version = 0
+
     @staticmethod
-    async def add_hw(subject_id: str, text: str, deadline: str, author_id: int):
+    @on_change("homework")
+    def _on_change(event: ChangeEvent):
+        HomeworkManager.version += 1
+
+    @staticmethod
+    async def add_hw(subject_id: str, text: str, deadline: str, author_id: int, group_id: int = GROUP_ID):
+        HomeworkManager.version += 1
         await db.db.homework.insert_one({
+            "groupId": group_id,
             "subjectId": subject_id,
             "text": text,
             "deadline": deadline,
+            "deadlineAt": parse_deadline(deadline),
             "authorId": author_id,
             "createdAt": datetime.utcnow()
         })
+        await bus.publish("homework")
 
     @staticmethod
     async def update_hw(hw_id: str, text: str, deadline: str):
+        HomeworkManager.version += 1
         await db.db.homework.update_one(
             {"_id": ObjectId(hw_id)},
-            {"$set": {"text": text, "deadline": deadline}}
+            {"$set": {"text": text, "deadline": deadline, "deadlineAt": parse_deadline(deadline)}}
         )
+        await bus.publish("homework")
+
+    @staticmethod
+    async def get_upcoming(hours: Optional[int] = None, group_id: int = GROUP_ID,
+                           since: Optional[datetime] = None, now: Optional[datetime] = None) -> List[Homework]:
+        """Домашки з майбутнім дедлайном по всіх предметах групи (найближчі першими).
+
+        now — UTC без tzinfo; за замовчуванням поточний час.
+        """
+        now = now or datetime.utcnow()
+        deadline_filter = {"$gte": since or now}
+        if hours is not None:
+            deadline_filter["$lte"] = now + timedelta(hours=hours)
+        hws = await db.db.homework.find({"groupId": group_id, "deadlineAt": deadline_filter}).sort("deadlineAt", 1).to_list(None)
+        return Homework.from_bson_list(hws)
+
+    @staticmethod
+    async def backfill_deadlines() -> int:
+        """Заповнення deadlineAt для старих записів, де дедлайн зберігався лише рядком"""
+        try:
+            ops = []
+            async for h in db.db.homework.find({"deadlineAt": {"$exists": False}}, {"deadline": 1}):
+                ops.append(UpdateOne(
+                    {"_id": h["_id"]},
+                    {"$set": {"deadlineAt": parse_deadline(h.get("deadline"))}}
+                ))
+            if ops:
+                await db.db.homework.bulk_write(ops, ordered=False)
+                HomeworkManager.version += 1
+                await bus.publish("homework")
+            return len(ops)
+        except Exception as e:
+            logger.error(f"Помилка заповнення дедлайнів: {e}")
+            return 0
 
     @staticmethod
-    async def get_hw(subject_id: str):
+    async def get_hw(subject_id: str) -> List[Homework]:
         hws = await db.db.homework.find({"subjectId": subject_id}).sort("createdAt", -1).to_list(None)
-        for h in hws: h["_id"] = str(h["_id"])
-        return hws
+        return Homework.from_bson_list(hws)
 
     @staticmethod
     async def delete_hw(hw_id: str):
+        HomeworkManager.version += 1
         await db.db.homework.delete_one({"_id": ObjectId(hw_id)})
+        await bus.publish("homework")
 
 class TopicsManager:
     @staticmethod
-    async def get_topics(subject_id: str):
-        topics = await db.db.topics.find({"subjectId": subject_id}).to_list(None)
-        for t in topics: t["_id"] = str(t["_id"])
-        return topics
+    async def migrate_claims():
+        """Одноразове заповнення topic_claims для тем, заброньованих до їх появи.
+
+        Виконана міграція позначається в meta.migrations. $max лише піднімає
+        лічильник до фактичної кількості тем у topics.users, тож одночасний
+        запуск кількома процесами нічого не зламає і не зменшить живі бронювання.
+        """
+        try:
+            if await db.db.meta.find_one({"_id": "migrations", "topic_claims": {"$exists": True}}, {"_id": 1}):
+                return
+            held = await db.db.topics.aggregate([
+                {"$unwind": "$users"},
+                {"$group": {"_id": {"subjectId": "$subjectId", "userId": "$users.userId"}, "count": {"$sum": 1}}}
+            ]).to_list(None)
+            if held:
+                result = await db.db.topic_claims.bulk_write([
+                    UpdateOne(
+                        {"subjectId": h["_id"]["subjectId"], "userId": h["_id"]["userId"]},
+                        {"$max": {"count": h["count"]}},
+                        upsert=True
+                    )
+                    for h in held
+                ], ordered=False)
+                logger.info(f"Міграція topic_claims: оновлено {result.modified_count + result.upserted_count} лічильників")
+            await db.db.meta.update_one(
+                {"_id": "migrations"}, {"$set": {"topic_claims": datetime.utcnow()}}, upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Помилка міграції topic_claims: {e}")
 
     @staticmethod
-    async def create_topic(subject_id: str, title: str):
+    async def get_topics(subject_id: str) -> List[Topic]:
+        return Topic.from_bson_list(await db.db.topics.find({"subjectId": subject_id}).to_list(None))
+
+    @staticmethod
+    async def create_topic(subject_id: str, title: str, max_users: Optional[int] = None, group_id: int = GROUP_ID):
         await db.db.topics.insert_one({
+            "groupId": group_id,
             "subjectId": subject_id,
             "title": title,
+            "maxUsers": max_users,
             "users": [] 
         })
+        await bus.publish("topics")
     
     @staticmethod
     async def update_topic(topic_id: str, title: str):
@@ -262,24 +856,88 @@ class TopicsManager:
             {"_id": ObjectId(topic_id)},
             {"$set": {"title": title}}
         )
+        await bus.publish("topics")
 
     @staticmethod
     async def delete_topic(topic_id: str):
-        await db.db.topics.delete_one({"_id": ObjectId(topic_id)})
+        topic = await db.db.topics.find_one_and_delete({"_id": ObjectId(topic_id)})
+        if topic and topic.get("users"):
+            await db.db.topic_claims.bulk_write([
+                UpdateOne(
+                    {"subjectId": topic["subjectId"], "userId": u["userId"], "count": {"$gt": 0}},
+                    {"$inc": {"count": -1}}
+                )
+                for u in topic["users"]
+            ], ordered=False)
+        if topic:
+            await bus.publish("topics")
 
     @staticmethod
-    async def toggle_topic(topic_id: str, user_id: str, user_name: str):
-        topic = await db.db.topics.find_one({"_id": ObjectId(topic_id)})
-        if not topic: return False
-        
-        users = topic.get("users", [])
-        existing_user = next((u for u in users if u["userId"] == user_id), None)
-        
-        if existing_user:
-            new_users = [u for u in users if u["userId"] != user_id]
-            await db.db.topics.update_one({"_id": ObjectId(topic_id)}, {"$set": {"users": new_users}})
-            return True
-        else:
-            users.append({"userId": user_id, "userName": user_name})
-            await db.db.topics.update_one({"_id": ObjectId(topic_id)}, {"$set": {"users": users}})
-            return True
\ No newline at end of file
+    async def claim_topic(topic_id: str, user_id: str, user_name: str) -> str:
+        """Атомарне бронювання теми.
+
+        Лічильник тем користувача в межах предмета (topic_claims) збільшується
+        умовним upsert'ом, тому ліміт MAX_TOPICS_PER_USER не обійти паралельними
+        запитами. Сама тема оновлюється одним $addToSet з перевіркою місткості;
+        якщо він не спрацював, лічильник повертається назад.
+        Повертає "claimed", "already", "full", "limit" або "not_found".
+        """
+        topic = await db.db.topics.find_one({"_id": ObjectId(topic_id)}, {"subjectId": 1})
+        if not topic:
+            return "not_found"
+        subject_id = topic["subjectId"]
+
+        claim_filter = {"subjectId": subject_id, "userId": user_id, "count": {"$lt": MAX_TOPICS_PER_USER}}
+        try:
+            await db.db.topic_claims.update_one(claim_filter, {"$inc": {"count": 1}}, upsert=True)
+        except DuplicateKeyError:
+            # Документ уже існує: або ліміт вичерпано, або паралельний upsert встиг першим
+            result = await db.db.topic_claims.update_one(claim_filter, {"$inc": {"count": 1}})
+            if not result.modified_count:
+                return "limit"
+
+        result = await db.db.topics.update_one(
+            {
+                "_id": ObjectId(topic_id),
+                "users.userId": {"$ne": user_id},
+                "$or": [
+                    {"maxUsers": None},
+                    {"$expr": {"$lt": [{"$size": {"$ifNull": ["$users", []]}}, "$maxUsers"]}}
+                ]
+            },
+            {"$addToSet": {"users": {"userId": user_id, "userName": user_name}}}
+        )
+        if result.modified_count:
+            await bus.publish("topics")
+            return "claimed"
+
+        await db.db.topic_claims.update_one(
+            {"subjectId": subject_id, "userId": user_id, "count": {"$gt": 0}},
+            {"$inc": {"count": -1}}
+        )
+        if await db.db.topics.find_one({"_id": ObjectId(topic_id), "users.userId": user_id}, {"_id": 1}):
+            return "already"
+        return "full"
+
+    @staticmethod
+    async def release_topic(topic_id: str, user_id: str) -> bool:
+        """Атомарне звільнення теми одним $pull"""
+        topic = await db.db.topics.find_one_and_update(
+            {"_id": ObjectId(topic_id), "users.userId": user_id},
+            {"$pull": {"users": {"userId": user_id}}},
+            projection={"subjectId": 1}
+        )
+        if not topic:
+            return False
+        await db.db.topic_claims.update_one(
+            {"subjectId": topic["subjectId"], "userId": user_id, "count": {"$gt": 0}},
+            {"$inc": {"count": -1}}
+        )
+        await bus.publish("topics")
+        return True
+
+    @staticmethod
+    async def toggle_topic(topic_id: str, user_id: str, user_name: str) -> str:
+        if await TopicsManager.release_topic(topic_id, user_id):
+            return "released"
+        return await TopicsManager.claim_topic(topic_id, user_id, user_name)
@@ -0,0 +1,88 @@
+import logging
+import threading
+from typing import Dict, Any
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Статистика пулу з'єднань MongoDB з подій драйвера.
+
+    Події приходять з потоків pymongo, тож лічильники захищені блокуванням.
+    Час очікування з'єднання (checkout) показує, чи вистачає пулу: якщо він
+    росте разом із in_use == maxPoolSize, пул замалий.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.created = 0
+        self.closed = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.checkouts = 0
+        self.checkout_failed: Dict[str, int] = {}
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.pool_cleared = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_cleared += 1
+        logger.warning(f"Пул з'єднань MongoDB {event.address} очищено")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.closed += 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failed[event.reason] = self.checkout_failed.get(event.reason, 0) + 1
+
+    def connection_checked_out(self, event):
+        wait = event.duration or 0.0
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            self.checkout_wait_total += wait
+            self.checkout_wait_max = max(self.checkout_wait_max, wait)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "open": self.created - self.closed,
+                "inUse": self.in_use,
+                "peakInUse": self.peak_in_use,
+                "checkouts": self.checkouts,
+                "checkoutFailed": dict(self.checkout_failed),
+                "checkoutWaitAvgMs": round(self.checkout_wait_total / self.checkouts * 1e3, 2) if self.checkouts else 0.0,
+                "checkoutWaitMaxMs": round(self.checkout_wait_max * 1e3, 2),
+                "poolCleared": self.pool_cleared,
+            }
+
+
+pool_stats = PoolStats()
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Any, Iterable, Optional, Tuple
+from pymongo import UpdateOne
+from config import MEMBER_FLUSH_INTERVAL, MEMBER_FLUSH_MAX_EVENTS
+from .connection import db
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[int, int]
+
+
+class MemberWriteBuffer:
+    """Відкладений запис активності учасників групи.
+
+    Кожне повідомлення в групі оновлює профіль учасника і last_seen_at.
+    Замість окремого upsert на кожне повідомлення зміни збираються в пам'яті
+    (останній стан на учасника) і пишуться одним bulk_write раз на
+    MEMBER_FLUSH_INTERVAL секунд або після MEMBER_FLUSH_MAX_EVENTS подій.
+    joined_at ставиться лише при вставці ($setOnInsert). Невдалий пакет
+    повертається в буфер, а stop() записує залишок перед вимкненням.
+    """
+
+    def __init__(self, interval: float = MEMBER_FLUSH_INTERVAL, max_events: int = MEMBER_FLUSH_MAX_EVENTS):
+        self.interval = interval
+        self.max_events = max_events
+        self._pending: Dict[Key, Dict[str, Any]] = {}
+        self._events = 0
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self.stats = {"events": 0, "flushes": 0, "written": 0, "failed": 0}
+
+    def record(self, user_id: int, group_id: int, username: str, first_name: str,
+               last_name: Optional[str] = None):
+        """Учасник активний у групі (без звернення до БД)"""
+        self._pending[(group_id, user_id)] = {
+            "username": username,
+            "first_name": first_name,
+            "last_name": last_name,
+            "is_active": True,
+            "last_seen_at": datetime.utcnow(),
+        }
+        self._events += 1
+        self.stats["events"] += 1
+        if self._events >= self.max_events:
+            self._wakeup.set()
+
+    async def discard(self, group_id: int, user_ids: Iterable[int]):
+        """Скасувати відкладені записи учасників, які вийшли з групи.
+
+        Чекає на flush(), що вже виконується: інакше пакет, узятий до виклику,
+        або повернений у буфер після невдачі записав би is_active: True уже
+        після деактивації. Тож після discard() деактивацію можна писати в БД.
+        """
+        async with self._lock:
+            for user_id in user_ids:
+                self._pending.pop((group_id, user_id), None)
+
+    async def flush_member(self, group_id: int, user_id: int):
+        """Записати відкладений стан одного учасника зараз.
+
+        Для записів, які оновлюють наявний документ учасника (update без
+        upsert): новий учасник інакше ще не існує в БД. Спершу чекає на
+        flush(), що вже виконується, — учасник міг бути в його пакеті.
+        """
+        async with self._lock:
+            fields = self._pending.pop((group_id, user_id), None)
+            if fields is None:
+                return
+            try:
+                await db.db.group_members.bulk_write([self._op((group_id, user_id), fields)])
+            except Exception as e:
+                logger.error(f"Помилка запису активності учасника {user_id}: {e}")
+                self._pending.setdefault((group_id, user_id), fields)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    @staticmethod
+    def _op(key: Key, fields: Dict[str, Any]) -> UpdateOne:
+        group_id, user_id = key
+        return UpdateOne(
+            {"groupId": group_id, "user_id": user_id},
+            {"$set": fields, "$setOnInsert": {"joined_at": fields["last_seen_at"]}},
+            upsert=True
+        )
+
+    async def flush(self) -> int:
+        async with self._lock:
+            if not self._pending:
+                return 0
+            batch, self._pending, self._events = self._pending, {}, 0
+            ops = [self._op(key, fields) for key, fields in batch.items()]
+            # Шину не сповіщаємо: новий чи повернений учасник, якого немає в кеші
+            # іншого процесу, знаходиться там через is_member з БД
+            try:
+                await db.db.group_members.bulk_write(ops, ordered=False)
+            except Exception as e:
+                logger.error(f"Помилка запису активності учасників ({len(ops)}): {e}")
+                self.stats["failed"] += 1
+                # Новіші записи, що прийшли під час спроби, важливіші за старі
+                for key, fields in batch.items():
+                    self._pending.setdefault(key, fields)
+                return 0
+            self.stats["flushes"] += 1
+            self.stats["written"] += len(ops)
+            return len(ops)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+
+member_buffer = MemberWriteBuffer()
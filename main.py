@@ -1,38 +1,75 @@
+import time
+STARTED = time.perf_counter()
+
 import asyncio
+import importlib
 import logging
 import os
-import uvicorn
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
-from aiogram import Bot, Dispatcher
-from aiogram.client.default import DefaultBotProperties
-from aiogram.enums import ParseMode
 
 from api.routes import router as api_router 
+from api.health import router as health_router, readiness, warm_up
+from api.responses import FastJSONResponse
+from api.compression import CompressionMiddleware, precompress
+from api.static import CachedStaticFiles
 from database.connection import db
-from bot.handlers import admin, schedule, group, webapp
-from bot.middlewares.auth import AuthMiddleware
-from bot.utils.scheduler import NotificationScheduler
-from config import BOT_TOKEN, GROUP_ID
+from database.models import HomeworkManager, TenantsManager, TopicsManager
+from database.invalidation import bus as invalidation_bus
+from database.write_behind import member_buffer
+from bot.utils.schedule_sync import ScheduleSync
+from bot.utils.schedule_refresh import schedule_refresher
+from bot.utils.api import ScheduleAPI
+from config import BOT_TOKEN, TELEGRAM_API_URL
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.MARKDOWN))
-dp = Dispatcher()
+# aiogram (типи на pydantic) і хендлери імпортуються кілька секунд, тож вони
+# завантажуються у фоні під час прогріву, а HTTP-сервер стартує без них
+BOT_MODULES = (
+    "aiogram", "aiogram.client.default", "aiogram.enums",
+    "database.fsm_storage", "bot.middlewares.auth", "bot.utils.scheduler", "bot.utils.membership_sync",
+    "bot.handlers.webapp", "bot.handlers.admin", "bot.handlers.group", "bot.handlers.schedule",
+)
+
+bot = None
+dp = None
+# Фонові задачі бота; зупиняються в on_shutdown до закриття з'єднання з БД
+scheduler = None
+reconciler = None
+
+def _import_bot_modules():
+    for name in BOT_MODULES:
+        importlib.import_module(name)
+
+def _create_bot():
+    from aiogram import Bot, Dispatcher
+    from aiogram.client.default import DefaultBotProperties
+    from aiogram.enums import ParseMode
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from database.fsm_storage import MongoFSMStorage
+    from bot.handlers import admin, schedule, group, webapp
+    from bot.middlewares.auth import AuthMiddleware
+
+    session = AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL)) if TELEGRAM_API_URL else None
+    bot = Bot(token=BOT_TOKEN, session=session, default=DefaultBotProperties(parse_mode=ParseMode.MARKDOWN))
+    dp = Dispatcher(storage=MongoFSMStorage())
 
-dp.include_router(webapp.router)
-dp.include_router(admin.router)
-admin.router.message.middleware(AuthMiddleware())
-admin.router.callback_query.middleware(AuthMiddleware())
-dp.include_router(group.router)
-dp.include_router(schedule.router)
-schedule.router.message.middleware(AuthMiddleware())
-schedule.router.callback_query.middleware(AuthMiddleware())
+    dp.include_router(webapp.router)
+    # Кнопки Mini App відкривають її для групи користувача
+    webapp.router.message.middleware(AuthMiddleware())
+    dp.include_router(admin.router)
+    admin.router.message.middleware(AuthMiddleware())
+    admin.router.callback_query.middleware(AuthMiddleware())
+    dp.include_router(group.router)
+    dp.include_router(schedule.router)
+    schedule.router.message.middleware(AuthMiddleware())
+    schedule.router.callback_query.middleware(AuthMiddleware())
+    return bot, dp
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -41,30 +78,87 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
 
+app.include_router(health_router)
 app.include_router(api_router, prefix="/api")
+readiness.started_at = STARTED
+
+def _webapp_dir() -> str:
+    """Зібрана версія (python build_webapp.py), якщо вона не старіша за вихідний index.html"""
+    built, source = os.path.join("webapp", "dist", "index.html"), os.path.join("webapp", "index.html")
+    if os.path.exists(built) and os.path.exists(source) and os.path.getmtime(built) >= os.path.getmtime(source):
+        return os.path.join("webapp", "dist")
+    return "webapp"
+
+WEBAPP_DIR = _webapp_dir()
 
 if os.path.exists("webapp"):
-    app.mount("/", StaticFiles(directory="webapp", html=True), name="webapp")
+    app.mount("/", CachedStaticFiles(directory=WEBAPP_DIR, html=True), name="webapp")
 else:
     logger.error("Папка 'webapp' не знайдена!")
 
-@app.on_event("startup")
-async def on_startup():
-    await db.connect()
-    logger.info("БД підключено")
+async def _precompress_static():
+    written = await asyncio.to_thread(precompress, WEBAPP_DIR)
+    logger.info(f"Стиснуто статичних файлів: {written}")
+
+async def _warm_up_and_start():
+    """Прогрів кешів, і лише потім фонові задачі та отримання оновлень Telegram"""
+    global bot, dp, scheduler, reconciler
+    # Шина стартує до прогріву, щоб зміни, зроблені під час нього, не загубилися
+    invalidation_bus.start()
+    try:
+        await warm_up(bot=asyncio.to_thread(_import_bot_modules))
+    except Exception as e:
+        logger.error(f"Помилка прогріву: {e}")
+    
+    from bot.utils.scheduler import NotificationScheduler
+    from bot.utils.membership_sync import MembershipReconciler
+    bot, dp = _create_bot()
+    
+    member_buffer.start()
+    asyncio.create_task(HomeworkManager.backfill_deadlines())
+    asyncio.create_task(ScheduleSync.run_all())
+    await schedule_refresher.start()
     
     scheduler = NotificationScheduler(bot)
     await scheduler.start()
     
+    reconciler = MembershipReconciler(bot)
+    await reconciler.start()
+    
     asyncio.create_task(dp.start_polling(bot))
+    readiness.mark_ready()
     logger.info("Бот запущено в фоні")
 
+@app.on_event("startup")
+async def on_startup():
+    if os.path.exists("webapp"):
+        asyncio.create_task(_precompress_static())
+    
+    await db.connect()
+    logger.info("БД підключено")
+    
+    # Незалежні кроки: міграції не чіпають колекцію tenants
+    await asyncio.gather(TenantsManager.migrate(), TopicsManager.migrate_claims(), TenantsManager.load())
+    # Сервер уже відповідає на /healthz і /readyz, поки кеші прогріваються
+    asyncio.create_task(_warm_up_and_start())
+
 @app.on_event("shutdown")
 async def on_shutdown():
+    await schedule_refresher.stop()
+    await invalidation_bus.stop()
+    # Планувальник і звірка пишуть у БД, тож зупиняються до буфера й disconnect()
+    for worker in (scheduler, reconciler):
+        if worker is not None:
+            await worker.stop()
+    # Залишок буфера учасників записується до закриття з'єднання з БД
+    await member_buffer.stop()
+    await ScheduleAPI.close()
     await db.disconnect()
     logger.info("Бот зупинено")
 
 if __name__ == "__main__":
+    import uvicorn
     port = int(os.environ.get("PORT", 8000))
     uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
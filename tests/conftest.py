@@ -0,0 +1,8 @@
+import os
+
+# config.py читає обов'язкові змінні оточення під час імпорту; тести не
+# звертаються ні до Telegram, ні до MongoDB, тож достатньо заглушок
+os.environ.setdefault("BOT_TOKEN", "123456:TEST-TOKEN")
+os.environ.setdefault("GROUP_ID", "-100123")
+os.environ.setdefault("ADMIN_ID", "1")
+os.environ.setdefault("KPI_GROUP_ID", "test-group")
@@ -0,0 +1,117 @@
+import asyncio
+import database.batching as batching
+from database.batching import BatchedCollection, BatchedDatabase, PointReadLoader
+
+
+class FakeCursor:
+    def __init__(self, docs, error=None):
+        self.docs = docs
+        self.error = error
+
+    async def __aiter__(self):
+        for doc in self.docs:
+            yield doc
+        if self.error:
+            raise self.error
+
+
+class FakeCollection:
+    def __init__(self, docs, error=None):
+        self.docs = docs
+        self.error = error
+        self.queries = []
+        self.find_one_calls = []
+
+    def find(self, filter):
+        self.queries.append(filter)
+        (field, spec), = filter.items()
+        return FakeCursor([d for d in self.docs if d.get(field) in spec["$in"]], self.error)
+
+    async def find_one(self, filter=None, *args, **kwargs):
+        self.find_one_calls.append((filter, args, kwargs))
+        return None
+
+
+USERS = [{"telegramId": 1, "name": "a", "tags": []}, {"telegramId": 2, "name": "b", "tags": []}]
+
+
+def test_concurrent_loads_share_one_query():
+    collection = FakeCollection(USERS)
+    loader = PointReadLoader(collection, "telegramId")
+
+    async def main():
+        return await asyncio.gather(*(loader.load(key) for key in (1, 2, 3, 1)))
+
+    first, second, missing, duplicate = asyncio.run(main())
+    assert collection.queries == [{"telegramId": {"$in": [1, 2, 3]}}]
+    assert (first["name"], second["name"], missing) == ("a", "b", None)
+    assert loader.stats == {"calls": 4, "queries": 1}
+
+    # Однаковий ключ дає незалежні копії документа
+    assert duplicate == first and duplicate is not first
+    duplicate["tags"].append("x")
+    assert first["tags"] == []
+
+
+def test_separate_windows_are_separate_queries():
+    collection = FakeCollection(USERS)
+    loader = PointReadLoader(collection, "telegramId")
+
+    async def main():
+        await loader.load(1)
+        await loader.load(2)
+
+    asyncio.run(main())
+    assert len(collection.queries) == 2
+
+
+def test_full_batch_dispatches_without_waiting(monkeypatch):
+    monkeypatch.setattr(batching, "MAX_BATCH_SIZE", 2)
+    collection = FakeCollection(USERS)
+    loader = PointReadLoader(collection, "telegramId", window=60)
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(loader.load(1), loader.load(2)), 1)
+
+    assert [doc["name"] for doc in asyncio.run(main())] == ["a", "b"]
+
+
+def test_cursor_error_reaches_every_waiter():
+    collection = FakeCollection(USERS, error=RuntimeError("cursor died"))
+    loader = PointReadLoader(collection, "telegramId")
+
+    async def main():
+        return await asyncio.gather(loader.load(1), loader.load(1), loader.load(3), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_find_one_routes_only_simple_point_reads():
+    collection = FakeCollection(USERS)
+    batched = BatchedCollection(collection, ("telegramId",))
+
+    async def main():
+        found = await batched.find_one({"telegramId": 2})
+        await batched.find_one({"telegramId": {"$in": [1]}})
+        await batched.find_one({"telegramId": 1, "name": "a"})
+        await batched.find_one({"name": "a"})
+        await batched.find_one({"telegramId": 1}, {"name": 1})
+        return found
+
+    assert asyncio.run(main())["name"] == "b"
+    assert len(collection.queries) == 1
+    assert len(collection.find_one_calls) == 4
+    assert batched.loader_stats == {"telegramId": {"calls": 1, "queries": 1}}
+
+
+def test_batched_database_wraps_only_listed_collections():
+    raw = {"users": FakeCollection(USERS), "queues": FakeCollection([])}
+
+    class FakeDatabase(dict):
+        def __getattr__(self, name):
+            return self[name]
+
+    db = BatchedDatabase(FakeDatabase(raw), {"users": ("telegramId",)})
+    assert isinstance(db.users, BatchedCollection) and db["users"] is db.users
+    assert db.queues is raw["queues"] and db["queues"] is raw["queues"]
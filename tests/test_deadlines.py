@@ -0,0 +1,59 @@
+from datetime import datetime
+import pytest
+import pytz
+from bot.utils.deadlines import parse_deadline
+
+NOW = datetime(2024, 10, 1, 12, 0)
+
+
+@pytest.mark.parametrize("value, expected", [
+    # Зима: UTC+2, літо: UTC+3; дата без часу означає 23:59 за Києвом
+    ("2024-01-15", datetime(2024, 1, 15, 21, 59)),
+    ("2024-07-15", datetime(2024, 7, 15, 20, 59)),
+    # Перехід на літній час 31.03.2024 та на зимовий 27.10.2024
+    ("2024-03-30", datetime(2024, 3, 30, 21, 59)),
+    ("2024-03-31", datetime(2024, 3, 31, 20, 59)),
+    ("2024-10-26", datetime(2024, 10, 26, 20, 59)),
+    ("2024-10-27", datetime(2024, 10, 27, 21, 59)),
+])
+def test_dst_edges(value, expected):
+    assert parse_deadline(value, NOW) == expected
+
+
+def test_ambiguous_hour_resolves_to_winter_time():
+    # 03:30 27.10.2024 трапляється двічі; береться зимовий час (UTC+2)
+    assert parse_deadline("2024-10-27T03:30", NOW) == datetime(2024, 10, 27, 1, 30)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024-10-21T18:00", datetime(2024, 10, 21, 15, 0)),
+    ("2024-10-21 18:00", datetime(2024, 10, 21, 15, 0)),
+    ("21.10.2024", datetime(2024, 10, 21, 20, 59)),
+    ("21.10.24", datetime(2024, 10, 21, 20, 59)),
+    ("21/10", datetime(2024, 10, 21, 20, 59)),
+    ("21.10 18:00", datetime(2024, 10, 21, 15, 0)),
+    ("  21.10, 18:00 ", datetime(2024, 10, 21, 15, 0)),
+])
+def test_formats(value, expected):
+    assert parse_deadline(value, NOW) == expected
+
+
+def test_date_without_year_rolls_over():
+    now = datetime(2024, 12, 20, 12, 0)
+    assert parse_deadline("05.01", now) == datetime(2025, 1, 5, 21, 59)
+
+
+def test_recent_date_without_year_stays_in_current_year():
+    # Дедлайн тижневої давнини ще не переноситься на наступний рік
+    assert parse_deadline("25.09", NOW) == datetime(2024, 9, 25, 20, 59)
+
+
+@pytest.mark.parametrize("value", [None, "", "завтра", "31.02.2024", "2024-13-01", 20241021])
+def test_invalid(value):
+    assert parse_deadline(value, NOW) is None
+
+
+def test_aware_now():
+    now = datetime(2024, 10, 1, 9, 0, tzinfo=pytz.utc)
+    assert parse_deadline("25.09", now) == datetime(2024, 9, 25, 20, 59)
+
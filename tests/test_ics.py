@@ -0,0 +1,127 @@
+from datetime import date, datetime
+import pytest
+from api.ics import build_calendar, escape_text, fold
+from bot.utils.api import ScheduleAPI
+
+SEMESTER = (date(2024, 9, 2), date(2025, 1, 27))
+
+SCHEDULE = {
+    "scheduleFirstWeek": [
+        {"day": "Пн", "pairs": [
+            {"name": "Вища математика", "type": "Лек on-line", "teacherName": "Іванов І.І.", "time": "08:30:00"},
+            {"name": "Фізика", "type": "Прак", "teacherName": "Петренко П.П.", "time": "10:25:00", "place": "7-101"},
+        ]},
+    ],
+    "scheduleSecondWeek": [
+        {"day": "Ср", "pairs": [
+            {"name": "Хімія", "type": "Лаб", "teacherName": "", "time": "17:00:00"},
+            {"name": "Без часу", "type": "Лек", "time": ""},
+        ]},
+        {"day": "Нд", "pairs": [{"name": "Неділя", "time": "08:30:00"}]},
+    ],
+}
+
+LINKS = {"Вища математика": {"meet_link": "https://meet.google.com/abc", "classroom_link": "https://classroom/x"}}
+
+
+def unfold(text):
+    return text.replace("\r\n ", "")
+
+
+def events(text):
+    blocks = unfold(text).split("BEGIN:VEVENT\r\n")[1:]
+    return [dict(line.split(":", 1) for line in block.split("\r\nEND:VEVENT")[0].split("\r\n")) for block in blocks]
+
+
+@pytest.fixture
+def calendar():
+    homeworks = [
+        {"_id": "hw1", "subjectId": "s1", "text": "Задачі 1, 2; 3", "deadlineAt": datetime(2024, 10, 21, 20, 59)},
+        {"_id": "hw2", "subjectId": "s1", "text": "Без дедлайну", "deadlineAt": None},
+    ]
+    return build_calendar(SCHEDULE, SEMESTER, -100123, lambda pair: LINKS.get(pair["name"]),
+                          homeworks, {"s1": "Фізика"}, title="ІП-55")
+
+
+# --- Форматування рядків ---
+
+def test_escape_text():
+    assert escape_text("a\\b;c,d\ne") == "a\\\\b\\;c\\,d\\ne"
+    assert escape_text(None) == ""
+
+
+def test_short_line_is_not_folded():
+    assert fold("SUMMARY:коротко") == "SUMMARY:коротко"
+
+
+@pytest.mark.parametrize("line", [
+    "DESCRIPTION:" + "x" * 200,
+    "DESCRIPTION:" + "ї" * 100,
+    "SUMMARY:" + "a" + "📝" * 40,
+])
+def test_fold_limits_octets_and_round_trips(line):
+    folded = fold(line)
+    parts = folded.split("\r\n")
+    assert len(parts) > 1
+    assert all(len(part.encode("utf-8")) <= 75 for part in parts)
+    assert all(part.startswith(" ") for part in parts[1:])
+    assert unfold(folded) == line
+
+
+# --- Календар ---
+
+def test_calendar_structure(calendar):
+    assert calendar.startswith("BEGIN:VCALENDAR\r\n")
+    assert calendar.endswith("END:VCALENDAR\r\n")
+    # Усі рядки розділені CRLF, без поодиноких \n
+    assert "\n" not in calendar.replace("\r\n", "")
+    assert "X-WR-CALNAME:ІП-55" in calendar
+    assert "BEGIN:VTIMEZONE\r\nTZID:Europe/Kiev" in calendar
+
+
+def test_pair_events(calendar):
+    pairs = [e for e in events(calendar) if "RRULE" in e]
+    # Пари без часу та в неіснуючий день пропускаються
+    assert [e["SUMMARY"] for e in pairs] == ["Вища математика", "Фізика", "Хімія"]
+
+    math, physics, chemistry = pairs
+    assert math["DTSTART;TZID=Europe/Kiev"] == "20240909T083000"
+    assert math["DTEND;TZID=Europe/Kiev"] == "20240909T100500"
+    assert physics["DTSTART;TZID=Europe/Kiev"] == "20240909T102500"
+    assert physics["LOCATION"] == "7-101"
+    assert chemistry["DTSTART;TZID=Europe/Kiev"] == "20240904T170000"
+    for event in pairs:
+        assert event["RRULE"] == "FREQ=WEEKLY;INTERVAL=2;UNTIL=20250126T235959Z"
+
+
+def test_first_occurrence_matches_rotation_week(calendar):
+    pairs = [e for e in events(calendar) if "RRULE" in e]
+    starts = [datetime.strptime(e["DTSTART;TZID=Europe/Kiev"], "%Y%m%dT%H%M%S") for e in pairs]
+    assert [ScheduleAPI.get_week_number(s) for s in starts] == [1, 1, 2]
+    assert all(SEMESTER[0] <= s.date() < SEMESTER[0].replace(day=16) for s in starts)
+
+
+def test_links_go_to_url_and_description(calendar):
+    math = events(calendar)[0]
+    assert math["URL"] == "https://meet.google.com/abc"
+    assert math["DESCRIPTION"] == "Лек on-line\\nІванов І.І.\\nClassroom: https://classroom/x"
+    assert "URL" not in events(calendar)[1]
+
+
+def test_homework_events_use_utc(calendar):
+    homeworks = [e for e in events(calendar) if "RRULE" not in e]
+    assert len(homeworks) == 1
+    assert homeworks[0]["DTSTART"] == "20241021T205900Z"
+    assert homeworks[0]["SUMMARY"] == "📝 Фізика: дедлайн"
+    assert homeworks[0]["DESCRIPTION"] == "Задачі 1\\, 2\\; 3"
+
+
+def test_uids_are_stable_and_unique(calendar):
+    again = build_calendar(SCHEDULE, SEMESTER, -100123, lambda pair: None, [], {})
+    uids = [e["UID"] for e in events(calendar)]
+    assert len(set(uids)) == len(uids)
+    assert all(uid.endswith("@ip-55") for uid in uids)
+    assert [e["UID"] for e in events(again)] == uids[:3]
+
+    other_group = build_calendar(SCHEDULE, SEMESTER, -100999, lambda pair: None, [], {})
+    assert not set(e["UID"] for e in events(other_group)) & set(uids)
@@ -0,0 +1,102 @@
+import pytest
+import bot.utils.link_index as link_index
+from bot.utils.link_index import LinkIndex, teacher_similarity, teacher_tokens
+
+
+def link(subject, teacher, class_type="Лек on-line", meet="https://meet/x", classroom=None):
+    return {"subject_name": subject, "teacher_name": teacher, "class_type": class_type,
+            "meet_link": meet, "classroom_link": classroom}
+
+
+@pytest.fixture
+def index():
+    idx = LinkIndex()
+    idx.load([
+        link("Вища математика", "доц. Іванов Іван Іванович"),
+        link("Фізика", "Петренко П.П.", "Прак", meet="https://meet/phys"),
+    ])
+    return idx
+
+
+def test_teacher_tokens_drop_titles():
+    assert teacher_tokens("доц. Іванов І.І.") == ["іванов", "і", "і"]
+
+
+def test_initials_match_full_names():
+    assert teacher_similarity(["іванов", "і", "і"], ["іванов", "іван", "іванович"]) == 1.0
+
+
+def test_exact_normalized_match(index):
+    found, score = index.resolve("вища  математика", "Іванов Іван Іванович", "Лек", 0.7)
+    assert score == 1.0
+    assert found["meet_link"] == "https://meet/x"
+
+
+def test_initials_resolve_above_threshold(index):
+    found, score = index.resolve("Вища математика", "Іванов І.І.", "Лек", 0.7)
+    assert found["subject_name"] == "Вища математика"
+    assert score >= 0.7
+
+
+def test_subject_only_match_scores_threshold(index):
+    # Збіг лише предмета без викладача й типу дає рівно 0.7
+    found, score = index.resolve("Фізика", "Коваль", "Лек", 0.7)
+    assert found["subject_name"] == "Фізика"
+    assert score == 0.7
+
+
+def test_unrelated_subject_is_not_found(index):
+    assert index.resolve("Історія", "Коваль", "Лек", 0.7) == (None, 0.0)
+
+
+def test_real_link_beats_placeholder_above_threshold():
+    idx = LinkIndex()
+    idx.load([
+        link("Хімія", "Сидоренко", meet=None),
+        link("Хімія", "Шевчук", meet="https://meet/chem"),
+    ])
+    found, score = idx.resolve("Хімія", "Сидоренко", "Лек", 0.7)
+    assert found["meet_link"] == "https://meet/chem"
+    assert score >= 0.7
+
+    # Якщо справжнє посилання не проходить поріг, перемагає найкращий збіг
+    found, score = idx.resolve("Хімія", "Сидоренко", "Лек", 0.99)
+    assert found["teacher_name"] == "Сидоренко"
+    assert score == 1.0
+
+
+def test_resolve_returns_copy(index):
+    found, _ = index.resolve("Фізика", "Петренко П.П.", "Прак", 0.7)
+    found["meet_link"] = "changed"
+    again, _ = index.resolve("Фізика", "Петренко П.П.", "Прак", 0.7)
+    assert again["meet_link"] == "https://meet/phys"
+
+
+def test_memo_is_bounded(index, monkeypatch):
+    monkeypatch.setattr(link_index, "RESOLVE_MEMO_SIZE", 2)
+    for teacher in ("А", "Б", "В"):
+        index.resolve("Фізика", teacher, "Прак", 0.7)
+    assert len(index._memo) == 2
+
+
+def test_memo_shares_spelling_variants(index):
+    index.resolve("Фізика", "Петренко П.П.", "Прак", 0.7)
+    index.resolve("  фізика ", "Петренко П. П.", "Практика", 0.7)
+    assert len(index._memo) == 1
+
+
+def test_upsert_invalidates_memo_and_bumps_version(index):
+    assert index.resolve("Хімія", "Шевчук", "Лек", 0.7) == (None, 0.0)
+    version = index.version
+    index.upsert(link("Хімія", "Шевчук", meet="https://meet/chem"))
+    assert index.version > version
+    found, score = index.resolve("Хімія", "Шевчук", "Лек", 0.7)
+    assert (found["meet_link"], score) == ("https://meet/chem", 1.0)
+
+
+def test_remove(index):
+    index.remove("Фізика", "Петренко П.П.", "Прак")
+    found, score = index.resolve("Фізика", "Петренко П.П.", "Прак", 0.7)
+    # Найкращий залишок далеко під порогом: викликач його відкине
+    assert found is None or found["subject_name"] != "Фізика"
+    assert score < 0.7
@@ -0,0 +1,210 @@
+import copy
+import random
+import pytest
+from api.queue_engine import QueueEngine, QueueError
+
+
+def apply_update(doc, update, array_filters):
+    """Мінімальне застосування оновлень з take_update так, як це робить MongoDB"""
+    doc = copy.deepcopy(doc)
+    for path, value in update.get("$set", {}).items():
+        if path.startswith("entries.$[e]."):
+            (field, wanted), = array_filters[0].items()
+            for entry in doc["entries"]:
+                if entry[field[2:]] == wanted:
+                    entry[path.rsplit(".", 1)[1]] = value
+        else:
+            doc[path] = copy.deepcopy(value)
+    for path, spec in update.get("$push", {}).items():
+        doc[path].extend(copy.deepcopy(spec["$each"]))
+        doc[path].sort(key=lambda e: e[next(iter(spec["$sort"]))])
+    for path, spec in update.get("$pull", {}).items():
+        gone = set(spec["userId"]["$in"])
+        doc[path] = [e for e in doc[path] if e["userId"] not in gone]
+    return doc
+
+
+def queue(*users, config=None):
+    engine = QueueEngine(config=config)
+    for position, (user_id, lab) in enumerate(users, start=1):
+        engine.join(user_id, lab, position)
+    engine.take_update()
+    return engine
+
+
+def positions(engine):
+    return [(e["position"], e["userId"]) for e in engine.entries()]
+
+
+# --- Стан черги ---
+
+def test_join_rejects_duplicates_and_taken_places():
+    engine = queue(("a", 1))
+    with pytest.raises(QueueError, match="Ви вже в черзі"):
+        engine.join("a", 1, 2)
+    with pytest.raises(QueueError, match="Місце зайняте"):
+        engine.join("b", 1, 1)
+    assert not engine.dirty
+
+
+@pytest.mark.parametrize("position", [0, 32, "1", 1.0])
+def test_join_checks_position_range(position):
+    with pytest.raises(QueueError, match="не існує"):
+        QueueEngine().join("a", 1, position)
+
+
+def test_admin_add_bypasses_duplicate_and_min_max():
+    engine = queue(("a", 1))
+    engine.set_status("a", "preparing")
+    engine.join("a", 9, 2, is_admin_add=True)
+    assert positions(engine) == [(1, "a"), (2, "a")]
+
+
+def test_min_max_rule_follows_active_labs():
+    engine = queue(("a", 2), ("b", 4))
+    # Поки ніхто не здає, обмеження немає
+    engine.join("c", 10, 3)
+    engine.set_status("a", "preparing")
+    with pytest.raises(QueueError, match=r"Макс\. лаба = 4 \(Мін: 2\)"):
+        engine.join("d", 5, 4)
+    engine.join("d", 4, 4)
+
+    # Мінімальна активна лаба оновлюється після зміни статусу
+    engine.set_status("b", "defending")
+    engine.set_status("a", "skipped")
+    assert engine.min_active_lab == 4
+    engine.join("e", 6, 5)
+
+
+def test_min_max_rule_can_be_disabled():
+    engine = queue(("a", 1), config={"minMaxRule": False})
+    engine.set_status("a", "completed")
+    engine.join("b", 9, 2)
+
+
+def test_kick_removes_all_entries_of_user():
+    engine = queue(("a", 1), ("b", 1))
+    engine.join("a", 2, 3, is_admin_add=True)
+    assert engine.kick("a") == 2
+    assert positions(engine) == [(2, "b")]
+    assert engine.kick("a") == 0
+
+
+def test_set_status_validation():
+    engine = queue(("a", 1))
+    with pytest.raises(QueueError, match="Невідомий статус"):
+        engine.set_status("a", "done")
+    with pytest.raises(QueueError, match="немає в черзі"):
+        engine.set_status("b", "waiting")
+
+
+def test_failed_attempts_are_limited():
+    engine = queue(("a", 1), config={"maxAttempts": 2})
+    engine.set_status("a", "failed")
+    engine.set_status("a", "failed")
+    assert engine.user_entry("a")["attempts"] == 2
+    with pytest.raises(QueueError, match=r"Вичерпано спроби здачі \(2\)"):
+        engine.set_status("a", "failed")
+    # Останню невдалу спробу адмін усе ще може зарахувати
+    assert engine.set_status("a", "completed")["attempts"] == 2
+
+
+def test_move_to_free_place():
+    engine = queue(("a", 1), ("b", 1))
+    engine.move("a", 5)
+    assert positions(engine) == [(2, "b"), (5, "a")]
+
+
+def test_move_to_taken_place_requires_priority():
+    engine = queue(("a", 1), ("b", 1))
+    with pytest.raises(QueueError, match="Місце зайняте"):
+        engine.move("b", 1)
+    engine = queue(("a", 1), ("b", 1), config={"priorityMove": False})
+    with pytest.raises(QueueError, match="Місце зайняте"):
+        engine.move("b", 1, priority=True)
+
+
+def test_prioritize_shifts_contiguous_block_only():
+    engine = queue(("a", 1), ("b", 1), ("c", 1))
+    engine.join("d", 1, 6)
+    engine.prioritize("c")
+    assert positions(engine) == [(1, "c"), (2, "a"), (3, "b"), (6, "d")]
+
+
+def test_priority_move_without_room_keeps_state():
+    # Звільнене місце #1 лежить перед цільовим, тож блок 2-3 зсунути нікуди
+    engine = queue(("a", 1), ("b", 1), ("c", 1), config={"maxSlots": 3})
+    with pytest.raises(QueueError, match="Немає вільного місця"):
+        engine.move("a", 2, priority=True)
+    assert positions(engine) == [(1, "a"), (2, "b"), (3, "c")]
+    assert engine.user_entry("a")["position"] == 1
+    assert not engine.dirty
+
+
+# --- take_update ---
+
+def test_take_update_empty():
+    assert QueueEngine().take_update() == ({}, None)
+
+
+def test_take_update_push():
+    engine = QueueEngine()
+    engine.join("a", 1, 3)
+    engine.join("b", 1, 1)
+    update, filters = engine.take_update()
+    assert filters is None
+    assert list(update) == ["$push"]
+    assert [e["userId"] for e in update["$push"]["entries"]["$each"]] == ["a", "b"]
+    assert update["$push"]["entries"]["$sort"] == {"position": 1}
+    assert not engine.dirty
+
+
+def test_take_update_pull():
+    engine = queue(("a", 1), ("b", 1))
+    engine.kick("a")
+    assert engine.take_update() == ({"$pull": {"entries": {"userId": {"$in": ["a"]}}}}, None)
+
+
+def test_take_update_single_status():
+    engine = queue(("a", 1), ("b", 1))
+    engine.set_status("b", "failed")
+    assert engine.take_update() == (
+        {"$set": {"entries.$[e].status": "failed", "entries.$[e].attempts": 1}},
+        [{"e.position": 2}],
+    )
+
+
+def test_take_update_mixed_writes_full_array():
+    engine = queue(("a", 1), ("b", 1))
+    engine.set_status("a", "preparing")
+    engine.set_status("b", "preparing")
+    update, filters = engine.take_update()
+    assert filters is None
+    assert update == {"$set": {"entries": engine.entries()}}
+
+
+def test_take_update_matches_engine_state():
+    rng = random.Random(7)
+    doc = {"entries": []}
+    engine = QueueEngine(config={"maxSlots": 8, "minMaxRule": False})
+    users = ["u1", "u2", "u3", "u4", "u5"]
+    for _ in range(500):
+        op = rng.choice(["join", "kick", "status", "move", "prioritize"])
+        user = rng.choice(users)
+        try:
+            if op == "join":
+                engine.join(user, rng.randint(1, 5), rng.randint(1, 8))
+            elif op == "kick":
+                engine.kick(user)
+            elif op == "status":
+                engine.set_status(user, rng.choice(["waiting", "preparing", "completed", "failed"]))
+            elif op == "move":
+                engine.move(user, rng.randint(1, 8), priority=rng.random() < 0.5)
+            else:
+                engine.prioritize(user)
+        except QueueError:
+            pass
+        doc = apply_update(doc, *engine.take_update())
+        assert doc["entries"] == engine.entries()
+        # Документ, перечитаний з бази, дає той самий стан
+        assert QueueEngine.from_doc(doc).entries() == engine.entries()
@@ -0,0 +1,98 @@
+import asyncio
+import json
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from starlette.responses import StreamingResponse
+import api.responses as responses
+from api.responses import FastJSONResponse, dumps, stream_json
+from database.documents import Subject
+
+
+class Cursor:
+    """Курсор Motor у мініатюрі: віддає документи і, за потреби, падає після fail_after"""
+
+    def __init__(self, docs, fail_after=None):
+        self.docs = docs
+        self.fail_after = fail_after
+
+    async def __aiter__(self):
+        for i, doc in enumerate(self.docs):
+            if i == self.fail_after:
+                raise RuntimeError("cursor died")
+            yield doc
+
+
+def respond(docs):
+    """Відповідь stream_json та її тіло, прочитане в тому ж event loop, що й курсор"""
+    async def main():
+        response = await stream_json(docs)
+        if isinstance(response, StreamingResponse):
+            return response, b"".join([chunk async for chunk in response.body_iterator])
+        return response, response.body
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(responses, "STREAM_CHUNK_DOCS", 2)
+
+
+def test_dumps_handles_bson_types():
+    oid = ObjectId()
+    value = {"_id": oid, "at": datetime(2024, 10, 21, 18, 0), "subject": Subject(_id=oid, name="Фізика")}
+    assert json.loads(dumps(value)) == {
+        "_id": str(oid), "at": "2024-10-21T18:00:00", "subject": {"_id": str(oid), "name": "Фізика"},
+    }
+    with pytest.raises(TypeError):
+        dumps({"x": object()})
+
+
+def test_fast_json_response():
+    response = FastJSONResponse({"name": "Фізика"})
+    assert json.loads(response.body) == {"name": "Фізика"}
+    assert response.media_type == "application/json"
+
+
+@pytest.mark.parametrize("docs", [[], [{"a": 1}]])
+def test_small_result_is_a_plain_response(small_chunks, docs):
+    response, body = respond(Cursor(docs))
+    assert not isinstance(response, StreamingResponse)
+    assert json.loads(body) == docs
+
+
+def test_large_result_is_streamed(small_chunks):
+    # Уже повна перша частина йде потоком: чи є ще документи, невідомо
+    for count in (2, 3, 4, 7):
+        docs = [{"n": i} for i in range(count)]
+        response, body = respond(Cursor(docs))
+        assert isinstance(response, StreamingResponse)
+        assert response.media_type == "application/json"
+        assert json.loads(body) == docs
+
+
+def test_plain_iterables_are_accepted(small_chunks):
+    docs = [{"n": i} for i in range(5)]
+    assert json.loads(respond(docs)[1]) == docs
+    assert json.loads(respond(iter(docs[:1]))[1]) == docs[:1]
+
+
+def test_error_before_first_chunk_is_raised(small_chunks):
+    # Заголовки ще не надіслані: маршрут отримає звичайну 500
+    with pytest.raises(RuntimeError, match="cursor died"):
+        respond(Cursor([{"n": 0}, {"n": 1}], fail_after=1))
+
+
+def test_error_mid_stream_aborts_the_body(small_chunks):
+    async def main():
+        response = await stream_json(Cursor([{"n": i} for i in range(6)], fail_after=4))
+        assert isinstance(response, StreamingResponse)
+        chunks = []
+        with pytest.raises(RuntimeError, match="cursor died"):
+            async for chunk in response.body_iterator:
+                chunks.append(chunk)
+        return b"".join(chunks)
+
+    # Заголовки вже надіслані: тіло обривається, а не закривається урізаним масивом
+    sent = asyncio.run(main())
+    assert sent.startswith(b"[") and not sent.endswith(b"]")
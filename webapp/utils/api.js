@@ -1,18 +1,32 @@
 import { CONFIG } from '../config';
 
+const tg = typeof window !== 'undefined' ? window.Telegram?.WebApp : undefined;
+
+// Група, для якої бот відкрив додаток (?groupId=... у кнопці або startapp-параметр)
+export const GROUP_ID =
+  (typeof window !== 'undefined' && new URLSearchParams(window.location.search).get('groupId')) ||
+  tg?.initDataUnsafe?.start_param ||
+  '';
+
 class ApiClient {
   constructor(baseURL) {
     this.baseURL = baseURL;
   }
 
   async request(endpoint, options = {}) {
-    const url = `${this.baseURL}${endpoint}`;
+    // groupId і підписаний initData: сервер перевіряє, що користувач належить до групи
+    const target = new URL(`${this.baseURL}${endpoint}`, window.location.origin);
+    if (GROUP_ID && !target.searchParams.has('groupId')) {
+      target.searchParams.set('groupId', GROUP_ID);
+    }
+    const url = target.toString();
     const config = {
+      ...options,
       headers: {
         'Content-Type': 'application/json',
+        ...(tg?.initData ? { 'X-Telegram-Init-Data': tg.initData } : {}),
         ...options.headers,
       },
-      ...options,
     };
 
     try {
@@ -93,11 +107,10 @@ export const homeworkApi = {
 };
 
 export const scheduleApi = {
+  // Розклад групи через сервер: KPI groupId береться з реєстру груп, а не з CONFIG
   getSchedule: async () => {
     try {
-      const response = await fetch(`${CONFIG.KPI_API_URL}?groupId=${CONFIG.KPI_GROUP_ID}`);
-      if (!response.ok) throw new Error('Schedule fetch failed');
-      return await response.json();
+      return await api.get('/schedule');
     } catch (error) {
       console.error('Schedule Error:', error);
       return null;